@@ -0,0 +1,272 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+
+from .compression import compress, negotiate
+from .config import settings
+from .database import get_redis
+from .metrics import RESPONSE_CACHE_REQUESTS
+
+
+logger = logging.getLogger(__name__)
+
+# Bodies are stored under a key that includes the center's version for the
+# namespace; a write bumps the version, so stale entries are never read
+# again and simply expire:
+#   cache:version:<namespace>:<center>   counter bumped on writes
+#   cache:body:<digest>                  JSON body
+#   cache:lock:<digest>                  held by the worker rendering it
+VERSION_KEY = "cache:version:{}:{}"
+BODY_KEY = "cache:body:{}"
+LOCK_KEY = "cache:lock:{}"
+
+# Arguments that identify the caller or the session rather than the response
+SKIPPED_ARGUMENTS = ("current_user", "db", "request")
+
+
+class LocalLRU:
+    """Small per-worker LRU of rendered bodies with per-entry expiry"""
+    
+    def __init__(self, size: int):
+        self.size = size
+        # key -> (expires_at, body, variants derived from the body)
+        self._entries: "OrderedDict[str, Tuple[float, bytes, Dict[str, bytes]]]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, body, _ = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return body
+    
+    def variant(self, key: str, name: str, build: Callable[[bytes], bytes]) -> Optional[bytes]:
+        """``build(body)`` for a live entry, computed once and dropped with the entry"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        variants = entry[2]
+        if name not in variants:
+            variants[name] = build(entry[1])
+        return variants[name]
+    
+    def set(self, key: str, body: bytes, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, body, {})
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class ResponseCache:
+    """Versioned response bodies: local LRU, then Redis, then the endpoint
+    
+    Concurrent misses for the same key share one render within a worker,
+    and across workers a short Redis lock lets one worker render while the
+    others wait (up to RESPONSE_CACHE_LOCK_WAIT) for its result. Any Redis
+    failure falls back to rendering without caching.
+    """
+    
+    def __init__(self):
+        self.local = LocalLRU(settings.RESPONSE_CACHE_LOCAL_SIZE)
+        self._inflight: Dict[str, asyncio.Future] = {}
+    
+    async def version(self, namespace: str, learning_center_id: Optional[int]) -> Optional[str]:
+        """Current version, or None when Redis is unavailable (cache bypassed)"""
+        try:
+            version = await get_redis().get(VERSION_KEY.format(namespace, learning_center_id))
+        except RedisError as e:
+            logger.warning(f"Response cache bypassed, version lookup failed: {e}")
+            return None
+        return version or "0"
+    
+    async def bump(self, namespace: str, *learning_center_ids: Optional[int]) -> None:
+        """Invalidate a namespace for the given centers (call after the write commits)"""
+        centers = {center_id for center_id in learning_center_ids if center_id is not None}
+        if not centers:
+            return
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for center_id in centers:
+                    pipe.incr(VERSION_KEY.format(namespace, center_id))
+                await pipe.execute()
+        except RedisError as e:
+            # Entries are still bounded by their TTL
+            logger.warning(f"Failed to bump {namespace} cache version for {sorted(centers)}: {e}")
+    
+    async def get_or_render(
+        self,
+        namespace: str,
+        key: str,
+        ttl: int,
+        render: Callable[[], Awaitable[bytes]]
+    ) -> Tuple[bytes, str]:
+        """Body for ``key`` and where it came from (local, redis, coalesced or miss)"""
+        body = self.local.get(key)
+        if body is not None:
+            RESPONSE_CACHE_REQUESTS.labels(namespace, "local").inc()
+            return body, "local"
+        
+        future = self._inflight.get(key)
+        if future is not None:
+            RESPONSE_CACHE_REQUESTS.labels(namespace, "coalesced").inc()
+            return await asyncio.shield(future), "coalesced"
+        
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        # Mark a failure as retrieved when no other request was waiting on it
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            body, source = await self._load(key, ttl, render)
+            future.set_result(body)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._inflight[key]
+        
+        self.local.set(key, body, ttl)
+        RESPONSE_CACHE_REQUESTS.labels(namespace, source).inc()
+        return body, source
+    
+    def compressed(self, key: str, body: bytes, encoding: str) -> bytes:
+        """``body`` compressed with ``encoding``, once per cached entry in this worker"""
+        compressed = self.local.variant(key, encoding, lambda body: compress(body, encoding))
+        return compressed if compressed is not None else compress(body, encoding)
+    
+    async def _load(self, key: str, ttl: int, render: Callable[[], Awaitable[bytes]]) -> Tuple[bytes, str]:
+        redis = get_redis()
+        body_key = BODY_KEY.format(key)
+        lock_key = LOCK_KEY.format(key)
+        locked = False
+        try:
+            body = await redis.get(body_key)
+            if body is not None:
+                return body.encode(), "redis"
+            
+            lock_ms = int(settings.RESPONSE_CACHE_LOCK_WAIT * 1000) * 2
+            locked = bool(await redis.set(lock_key, "1", nx=True, px=lock_ms))
+            if not locked:
+                # Another worker is rendering this key; wait for its result
+                deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_WAIT
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+                    body = await redis.get(body_key)
+                    if body is not None:
+                        return body.encode(), "redis"
+        except RedisError as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return await render(), "miss"
+        
+        body = await render()
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.setex(body_key, ttl, body.decode())
+                if locked:
+                    pipe.delete(lock_key)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Failed to store cached response: {e}")
+        return body, "miss"
+
+
+# TypeAdapter per response model, built on first render
+_adapters: Dict[object, TypeAdapter] = {}
+
+
+def _render_body(route, result) -> bytes:
+    """Serialize like FastAPI would: through the route's response_model if it has one"""
+    if isinstance(result, Response):
+        # Endpoints that render their own body (e.g. FastJSONResponse)
+        return result.body
+    
+    response_model = getattr(route, "response_model", None)
+    if response_model is None:
+        return json.dumps(
+            jsonable_encoder(result),
+            ensure_ascii=False,
+            separators=(",", ":")
+        ).encode()
+    
+    adapter = _adapters.get(response_model)
+    if adapter is None:
+        adapter = _adapters[response_model] = TypeAdapter(response_model)
+    return adapter.dump_json(adapter.validate_python(result, from_attributes=True), by_alias=True)
+
+
+def cached_response(namespace: str, ttl: Optional[int] = None):
+    """Cache a GET endpoint whose response is shared by a whole learning center
+    
+    The key is the endpoint, its query/path arguments, the caller's
+    learning_center_id and the center's version for ``namespace``; writers
+    call ``response_cache.bump(namespace, center_id)``. Authentication
+    dependencies still run on every request. Only use it for endpoints whose
+    response does not depend on who the caller is within the center.
+    """
+    def decorator(endpoint):
+        signature = inspect.signature(endpoint)
+        if "current_user" not in signature.parameters:
+            raise TypeError(f"{endpoint.__name__} needs a current_user parameter to be cached per center")
+        adds_request = "request" not in signature.parameters
+        name = f"{endpoint.__module__}.{endpoint.__qualname__}"
+        
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs.pop("request") if adds_request else kwargs["request"]
+            center_id = kwargs["current_user"].learning_center_id
+            
+            version = await response_cache.version(namespace, center_id)
+            if version is None:
+                RESPONSE_CACHE_REQUESTS.labels(namespace, "bypass").inc()
+                return await endpoint(*args, **kwargs)
+            
+            arguments = {
+                key: value for key, value in kwargs.items()
+                if key not in SKIPPED_ARGUMENTS
+            }
+            raw_key = json.dumps([name, center_id, version, arguments], sort_keys=True, default=str)
+            key = hashlib.sha1(raw_key.encode()).hexdigest()
+            
+            async def render() -> bytes:
+                return _render_body(request.scope.get("route"), await endpoint(*args, **kwargs))
+            
+            body, source = await response_cache.get_or_render(
+                namespace, key, ttl or settings.RESPONSE_CACHE_TTL, render
+            )
+            
+            # Hot bodies are compressed once here; the compression middleware
+            # leaves responses that already carry a Content-Encoding alone
+            headers = {"X-Cache": source, "Vary": "Accept-Encoding"}
+            encoding = negotiate(request.headers.get("accept-encoding", ""))
+            if encoding is not None and len(body) >= settings.COMPRESSION_MIN_SIZE:
+                body = response_cache.compressed(key, body, encoding)
+                headers["Content-Encoding"] = encoding
+            return Response(body, media_type="application/json", headers=headers)
+        
+        if adds_request:
+            parameters = list(signature.parameters.values()) + [
+                inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+            ]
+            wrapper.__signature__ = signature.replace(parameters=parameters)
+        return wrapper
+    
+    return decorator
+
+
+# Singleton instance
+response_cache = ResponseCache()
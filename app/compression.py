@@ -0,0 +1,157 @@
+import gzip
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from .config import settings
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; without it only gzip is offered
+    brotli = None
+
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Text-like media types are compressed; images, audio, video and archives
+# (most of /static) are already compressed and pass through untouched
+COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "application/xml", "image/svg+xml")
+# Streams must reach the client as they are written, not in compressor blocks
+NEVER_COMPRESSED = ("text/event-stream",)
+
+# No body, a partial body, or not modified
+SKIPPED_STATUSES = (204, 206, 304)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best encoding the client accepts from Accept-Encoding (br over gzip at equal q)"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.partition(";")[0].strip().lower()
+    if media_type in NEVER_COMPRESSED:
+        return False
+    return (
+        media_type in COMPRESSIBLE_TYPES
+        or media_type.startswith("text/")
+        or media_type.endswith("+json")
+    )
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Whole-body compression with the configured level"""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class StreamCompressor:
+    """Incremental compression for streamed bodies"""
+    
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            self.compress, self.finish = compressor.process, compressor.finish
+        else:
+            # wbits 16 + MAX_WBITS writes the gzip container
+            compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self.compress, self.finish = compressor.compress, compressor.flush
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing responses with br or gzip as negotiated
+    
+    A response is compressed when its media type is text-like, it has no
+    Content-Encoding yet (precompressed cached bodies pass through) and a
+    complete body is at least COMPRESSION_MIN_SIZE bytes. Streamed bodies
+    are compressed incrementally.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start = None
+        compressor = None
+        passthrough = False
+        
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if passthrough:
+                await send(message)
+                return
+            
+            if compressor is not None:
+                body = compressor.compress(message.get("body", b""))
+                more_body = message.get("more_body", False)
+                if not more_body:
+                    body += compressor.finish()
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+            
+            # First message after the start: decide for the whole response
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if (
+                message["type"] != "http.response.body"
+                or start["status"] in SKIPPED_STATUSES
+                or "content-encoding" in headers
+                or not is_compressible(headers.get("content-type", ""))
+                or (not more_body and len(body) < settings.COMPRESSION_MIN_SIZE)
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # Same entity, different bytes
+                headers["ETag"] = "W/" + etag
+            
+            if more_body:
+                compressor = StreamCompressor(encoding)
+                del headers["Content-Length"]
+                body = compressor.compress(body)
+            else:
+                body = compress(body, encoding)
+                headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+        
+        await self.app(scope, receive, send_compressed)
@@ -16,6 +16,13 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
     REDIS_URL: str
+    # Pool connections opened at startup, before traffic arrives
+    DB_POOL_WARM_CONNECTIONS: int = 2
+    # Per-worker pool; run_prod.py sizes these so that all workers together
+    # stay within DB_CONNECTION_BUDGET (not applied to SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
     
     # CORS Configuration
     ALLOWED_ORIGINS: str = "http://localhost:3000,http://localhost:8000"
@@ -26,6 +33,8 @@ class Settings(BaseSettings):
     
     # Storage Configuration
     STORAGE_PATH: str = "/tmp/persistent_storage"
+    # History partition archives; never under STORAGE_PATH, which is served at /static
+    ARCHIVE_PATH: str = "/tmp/persistent_archive"
     
     # Eskiz SMS Configuration
     ESKIZ_URL: str
@@ -37,6 +46,40 @@ class Settings(BaseSettings):
     
     # Narakeet TTS Configuration
     NARAKEET: str
+    NARAKEET_URL: str = "https://api.narakeet.com"
+    
+    # Readiness probes: per-probe timeout and how long results are reused (seconds)
+    HEALTH_PROBE_TIMEOUT: float = 1.0
+    HEALTH_CACHE_SECONDS: float = 2.0
+    HEALTH_CHECK_SMS: bool = False
+    
+    # Request profiling: fraction of requests sampled (0 = only signed
+    # X-Debug-Profile requests), stack sampling interval (seconds) and
+    # how many profiles are kept
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL: float = 0.005
+    PROFILING_BUFFER_SIZE: int = 50
+    
+    # Statements slower than this (ms, 0 = off) are logged and aggregated;
+    # on Postgres their plan is captured with EXPLAIN
+    SLOW_QUERY_MS: float = 200.0
+    SLOW_QUERY_EXPLAIN: bool = True
+    
+    # Center-scoped response cache: default TTL (seconds), per-worker LRU
+    # entries, and how long a worker waits for another worker's render
+    RESPONSE_CACHE_TTL: int = 300
+    RESPONSE_CACHE_LOCAL_SIZE: int = 1024
+    RESPONSE_CACHE_LOCK_WAIT: float = 2.0
+    
+    # Response compression (br when the Brotli package is installed, else gzip);
+    # smaller bodies are sent as they are
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    
+    # Outbound HTTP timeouts (seconds)
+    ESKIZ_TIMEOUT: float = 10.0
+    NARAKEET_TIMEOUT: float = 60.0
     
     @property
     def cors_origins(self) -> List[str]:
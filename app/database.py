@@ -1,23 +1,49 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import redis.asyncio as redis
+import time
 
 from .config import settings
+from .metrics import REDIS_COMMAND_SECONDS, instrument_engine
+
+# Pool sizing only applies to server databases; SQLite keeps its default pool
+_pool_options = {} if settings.DATABASE_URL.startswith("sqlite") else {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+}
 
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
     pool_recycle=300,
-    echo=False
+    echo=False,
+    **_pool_options
 )
 
+instrument_engine(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Append-only history tables are range-partitioned on Postgres only
+IS_POSTGRES = engine.dialect.name == "postgresql"
+
 Base = declarative_base()
 
-# Redis connection (for auth verification codes only)
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+class InstrumentedRedis(redis.Redis):
+    """Redis client that times every command (pipelines are not broken down)"""
+    
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_SECONDS.labels(str(args[0]).upper()).observe(time.perf_counter() - start)
+
+
+# Redis connection pool; opened in the app lifespan (or on first use in jobs)
+redis_client = None
 
 
 def get_db():
@@ -29,4 +55,37 @@ def get_db():
 
 
 def get_redis():
-    return redis_client
\ No newline at end of file
+    global redis_client
+    if redis_client is None:
+        redis_client = InstrumentedRedis.from_url(settings.REDIS_URL, decode_responses=True)
+    return redis_client
+
+
+def warm_db_pool(connections: int) -> None:
+    """Open pool connections up front so the first requests don't pay for them"""
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in opened:
+            connection.close()
+
+
+def ping_db() -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+async def ping_redis() -> None:
+    await get_redis().ping()
+
+
+async def close_redis() -> None:
+    """Close the Redis pool; the next get_redis() opens a new one"""
+    global redis_client
+    if redis_client is not None:
+        await redis_client.aclose()
+        redis_client = None
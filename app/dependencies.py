@@ -12,65 +12,128 @@ from .models.user import User
 security = HTTPBearer()
 
 
-async def get_current_user(
-    token: str = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
+class Principal:
+    """Authenticated identity built from signed token claims (no ORM row loaded)"""
+    is_active = True
+    
+    def __init__(
+        self,
+        id: int,
+        role: str,
+        learning_center_id: Optional[int],
+        token_version: int = 0
+    ):
+        self.id = id
+        self.role = role
+        self.learning_center_id = learning_center_id
+        self.token_version = token_version
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def _decode_token(token) -> dict:
     try:
         payload = jwt.decode(
-            token.credentials, 
-            settings.SECRET_KEY, 
+            token.credentials,
+            settings.SECRET_KEY,
             algorithms=[settings.ALGORITHM]
         )
-        user_id_str = payload.get("sub")
-        if user_id_str is None:
-            raise credentials_exception
-        user_id: int = int(user_id_str)
-    except jwt.PyJWTError:
-        raise credentials_exception
+        if payload.get("sub") is None:
+            raise _credentials_exception()
+        payload["sub"] = int(payload["sub"])
+    except (jwt.PyJWTError, ValueError):
+        raise _credentials_exception()
+    
+    return payload
+
+
+async def get_current_user(
+    token: str = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Authorize from the database: the user's claims and the center's payment in one row"""
+    credentials_exception = _credentials_exception()
+    
+    payload = _decode_token(token)
+    user_id: int = payload["sub"]
     
     # Super admin check (user_id = 0)
     if user_id == 0:
-        # Return a mock user object for super admin
-        class SuperAdmin:
-            id = 0
-            role = "super_admin"
-            is_active = True
-            learning_center_id = None
-        return SuperAdmin()
+        return Principal(id=0, role="super_admin", learning_center_id=None)
     
-    # Get user from database
-    user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
+    # Only the columns authorization needs; no User/LearningCenter entities are built
+    from .models import LearningCenter
+    user = db.query(
+        User.id,
+        User.role,
+        User.learning_center_id,
+        User.token_version,
+        LearningCenter.is_paid
+    ).outerjoin(
+        LearningCenter, LearningCenter.id == User.learning_center_id
+    ).filter(User.id == user_id, User.is_active == True).first()
     
     if user is None:
         raise credentials_exception
     
-    # Skip payment check for super admin (they have system-wide access)
-    if getattr(user, 'role', None) == "super_admin":
-        return user
-    
-    # Check if learning center is paid (for regular users only)
-    from .models import LearningCenter
-    learning_center = db.query(LearningCenter).filter(
-        LearningCenter.id == user.learning_center_id
-    ).first()
+    # Tokens issued before a revocation carry an older version
+    if payload.get("ver", 0) != user.token_version:
+        raise credentials_exception
     
-    if not learning_center or not learning_center.is_paid:
+    # Check if learning center is paid
+    if not user.is_paid:
         raise HTTPException(
             status_code=status.HTTP_402_PAYMENT_REQUIRED,
             detail="Learning center subscription expired"
         )
     
-    return user
+    return Principal(
+        id=user.id,
+        role=user.role.value,
+        learning_center_id=user.learning_center_id,
+        token_version=user.token_version
+    )
 
 
-async def get_super_admin_user(current_user = Depends(get_current_user)):
+async def get_current_principal(
+    token: str = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Authorize from token claims; the database is only hit on a claims-cache miss"""
+    payload = _decode_token(token)
+    user_id: int = payload["sub"]
+    
+    if user_id == 0:
+        return Principal(id=0, role="super_admin", learning_center_id=None)
+    
+    role = payload.get("role")
+    if role is None:
+        # Token issued before role claims existed: fall back to the database
+        return await get_current_user(token, db)
+    
+    from .services import auth_service
+    await auth_service.check_token_claims(
+        user_id,
+        payload.get("lc"),
+        payload.get("ver", 0),
+        db
+    )
+    
+    return Principal(
+        id=user_id,
+        role=role,
+        learning_center_id=payload.get("lc"),
+        token_version=payload.get("ver", 0)
+    )
+
+
+async def get_super_admin_user(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """Require super admin permissions"""
     if getattr(current_user, 'role', None) != "super_admin":
         raise HTTPException(
@@ -80,7 +143,7 @@ async def get_super_admin_user(current_user = Depends(get_current_user)):
     return current_user
 
 
-async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_admin_user(current_user: Principal = Depends(get_current_principal)) -> Principal:
     if current_user.role not in ["admin"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -89,7 +152,7 @@ async def get_admin_user(current_user: User = Depends(get_current_user)) -> User
     return current_user
 
 
-async def get_teacher_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_teacher_user(current_user: Principal = Depends(get_current_principal)) -> Principal:
     if current_user.role not in ["admin", "teacher"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -98,10 +161,10 @@ async def get_teacher_user(current_user: User = Depends(get_current_user)) -> Us
     return current_user
 
 
-async def get_student_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_student_user(current_user: Principal = Depends(get_current_principal)) -> Principal:
     if current_user.role not in ["admin", "teacher", "student"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return current_user
\ No newline at end of file
+    return current_user
@@ -0,0 +1,133 @@
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict
+
+from fastapi.concurrency import run_in_threadpool
+
+from .config import settings
+from .database import ping_db, ping_redis
+from .utils.http_clients import get_http_client
+
+
+async def _probe_database() -> None:
+    await run_in_threadpool(ping_db)
+
+
+async def _probe_redis() -> None:
+    await ping_redis()
+
+
+def _write_probe_file() -> None:
+    with tempfile.NamedTemporaryFile(dir=settings.STORAGE_PATH, prefix=".health_") as probe:
+        probe.write(b"ok")
+        probe.flush()
+        os.fsync(probe.fileno())
+
+
+async def _probe_storage() -> None:
+    await run_in_threadpool(_write_probe_file)
+
+
+async def _probe_sms() -> None:
+    # Any answer below 500 means Eskiz is reachable; no SMS is sent
+    response = await get_http_client("eskiz").get("/", timeout=settings.HEALTH_PROBE_TIMEOUT)
+    if response.status_code >= 500:
+        raise RuntimeError(f"Eskiz returned {response.status_code}")
+
+
+class HealthChecker:
+    """Dependency probes for the readiness endpoint
+    
+    Probes run concurrently, each bounded by HEALTH_PROBE_TIMEOUT, and the
+    combined result is cached for HEALTH_CACHE_SECONDS. Concurrent callers
+    share one in-flight round, so a load balancer polling every worker
+    costs at most one probe round per worker per cache period. A probe that
+    outlives its timeout (a hung DB call keeps its thread) is awaited again
+    by the next round instead of being started a second time.
+    """
+    
+    def __init__(self):
+        self._result = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self._running: Dict[str, asyncio.Task] = {}
+    
+    def _probes(self) -> Dict[str, Callable[[], Awaitable[None]]]:
+        probes = {
+            "database": _probe_database,
+            "redis": _probe_redis,
+            "storage": _probe_storage,
+        }
+        if settings.HEALTH_CHECK_SMS:
+            probes["sms"] = _probe_sms
+        return probes
+    
+    async def check(self) -> dict:
+        if self._fresh():
+            return self._result
+        
+        async with self._lock:
+            # Another request may have refreshed the result while we waited
+            if self._fresh():
+                return self._result
+            
+            probes = self._probes()
+            results = await asyncio.gather(*(
+                self._run_probe(name, probe) for name, probe in probes.items()
+            ))
+            checks = dict(zip(probes, results))
+            
+            # The SMS provider is reported but does not take the worker out of rotation
+            healthy = all(
+                check["status"] == "ok"
+                for name, check in checks.items()
+                if name != "sms"
+            )
+            self._result = {
+                "status": "healthy" if healthy else "unhealthy",
+                "checked_at": datetime.utcnow().isoformat(),
+                "checks": checks,
+            }
+            self._checked_at = time.monotonic()
+            return self._result
+    
+    def _fresh(self) -> bool:
+        return (
+            self._result is not None
+            and time.monotonic() - self._checked_at < settings.HEALTH_CACHE_SECONDS
+        )
+    
+    async def _run_probe(self, name: str, probe: Callable[[], Awaitable[None]]) -> dict:
+        task = self._running.get(name)
+        if task is None or task.done():
+            task = self._running[name] = asyncio.ensure_future(probe())
+            # Mark a late failure as retrieved; it is reported by whoever awaits it next
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=settings.HEALTH_PROBE_TIMEOUT)
+            status = "ok"
+            error = None
+        except asyncio.TimeoutError:
+            status = "timeout"
+            error = f"no response within {settings.HEALTH_PROBE_TIMEOUT}s"
+        except Exception as e:
+            # Only the exception type: the endpoint is public and messages may hold hosts or DSNs
+            status = "error"
+            error = type(e).__name__
+        
+        result = {
+            "status": status,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+        if error:
+            result["error"] = error
+        return result
+
+
+# Singleton instance
+health_checker = HealthChecker()
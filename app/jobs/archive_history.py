@@ -0,0 +1,119 @@
+"""
+History partition maintenance job (Postgres only)
+
+    python -m app.jobs.archive_history ensure [--months-ahead 3]
+    python -m app.jobs.archive_history archive [--keep-months 12] [--archive-dir DIR]
+
+`ensure` creates the upcoming monthly partitions of word_history,
+coin_transactions and otp_requests. `archive` moves every partition older
+than the retention window to gzip-compressed CSV files under
+ARCHIVE_PATH and drops it. Archived coin transactions are folded
+into archived_coin_totals so balance reconciliation keeps matching.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import ArchivedCoinTotal, CoinIdempotencyKey
+from ..utils.partitions import (
+    PARTITIONED_TABLES,
+    ensure_partitions,
+    export_and_drop_partition,
+    list_partitions,
+    partition_month,
+)
+from ..utils.sql import dialect_insert
+
+
+def check_archive_dir(archive_dir: str) -> None:
+    """Refuse directories under STORAGE_PATH: everything there is public at /static"""
+    archive_dir = os.path.realpath(archive_dir)
+    storage = os.path.realpath(settings.STORAGE_PATH)
+    if os.path.commonpath([archive_dir, storage]) == storage:
+        raise ValueError(f"Archive directory {archive_dir} is inside STORAGE_PATH ({storage}), which is served publicly")
+
+
+def archive_partitions(db: Session, keep_months: int, archive_dir: str) -> List[dict]:
+    """Archive and drop monthly partitions that ended before the retention window"""
+    check_archive_dir(archive_dir)
+    
+    today = date.today()
+    index = today.year * 12 + today.month - 1 - keep_months
+    cutoff = date(index // 12, index % 12 + 1, 1)
+    
+    archived = []
+    for table in PARTITIONED_TABLES:
+        for name in list_partitions(db, table):
+            if partition_month(table, name) >= cutoff:
+                continue
+            before_drop = _fold_coin_totals if table == "coin_transactions" else None
+            archived.append(export_and_drop_partition(db, table, name, archive_dir, before_drop))
+    
+    # Keys only guard against retries, which never arrive months later
+    db.query(CoinIdempotencyKey).filter(
+        CoinIdempotencyKey.created_at < datetime.combine(cutoff, datetime.min.time())
+    ).delete(synchronize_session=False)
+    db.commit()
+    
+    return archived
+
+
+def _fold_coin_totals(db: Session, partition: str) -> None:
+    totals = db.execute(text(
+        f"SELECT student_id, SUM(amount) AS amount, MAX(created_at) AS archived_through "
+        f"FROM {partition} GROUP BY student_id"
+    )).mappings().all()
+    if not totals:
+        return
+    
+    stmt = dialect_insert(db, ArchivedCoinTotal).values([dict(row) for row in totals])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["student_id"],
+        set_={
+            "amount": ArchivedCoinTotal.amount + stmt.excluded.amount,
+            "archived_through": stmt.excluded.archived_through,
+        }
+    ))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain history table partitions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    ensure_parser = subparsers.add_parser("ensure", help="Create upcoming monthly partitions")
+    ensure_parser.add_argument("--months-ahead", type=int, default=3)
+    
+    archive_parser = subparsers.add_parser("archive", help="Archive and drop old partitions")
+    archive_parser.add_argument("--keep-months", type=int, default=12)
+    archive_parser.add_argument("--archive-dir", default=settings.ARCHIVE_PATH)
+    
+    args = parser.parse_args(argv)
+    if args.command == "archive":
+        try:
+            check_archive_dir(args.archive_dir)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    db = SessionLocal()
+    try:
+        if args.command == "ensure":
+            result = ensure_partitions(db, months_ahead=args.months_ahead)
+        else:
+            result = archive_partitions(db, args.keep_months, args.archive_dir)
+    finally:
+        db.close()
+    
+    print(json.dumps(result, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""
+Daily word counter pruning job
+
+Deletes word_daily_stats rows older than the longest hardest-words window
+(30 days) and prints how many were removed. Lifetime counters in word_stats
+are kept. Schedule it daily, e.g. from cron:
+
+    python -m app.jobs.prune_word_stats [--keep-days 30]
+"""
+import argparse
+import json
+import sys
+
+from ..database import SessionLocal
+from ..services.progress_service import HARDEST_WORDS_MAX_DAYS, progress_service
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Delete expired daily word counters")
+    parser.add_argument("--keep-days", type=int, default=HARDEST_WORDS_MAX_DAYS)
+    args = parser.parse_args(argv)
+    
+    if args.keep_days < HARDEST_WORDS_MAX_DAYS:
+        parser.error(f"--keep-days must cover the {HARDEST_WORDS_MAX_DAYS}-day hardest-words window")
+    
+    db = SessionLocal()
+    try:
+        deleted = progress_service.prune_word_daily_stats(db, keep_days=args.keep_days)
+        db.commit()
+    finally:
+        db.close()
+    
+    print(json.dumps({"word_daily_stats_deleted": deleted}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""
+Progress aggregate rebuild job
+
+Recomputes student_course_stats, group_lesson_stats and student_stats from
+lesson_progress, word_history and coin_transactions in one transaction and
+prints the row counts as JSON. Run it once after the migration that creates
+the aggregate tables, before the new release starts serving, so existing
+progress shows up on the teacher and student dashboards; afterwards it
+repairs aggregates that drifted.
+
+    python -m app.jobs.rebuild_progress_stats
+"""
+import argparse
+import json
+import sys
+
+from ..database import SessionLocal
+from ..models import GroupLessonStats, StudentCourseStats, StudentStats
+from ..services.progress_service import progress_service
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild the progress aggregate tables")
+    parser.parse_args(argv)
+    
+    db = SessionLocal()
+    try:
+        progress_service.rebuild_aggregates(db)
+        db.commit()
+        report = {
+            "student_course_stats": db.query(StudentCourseStats).count(),
+            "group_lesson_stats": db.query(GroupLessonStats).count(),
+            "student_stats": db.query(StudentStats).count(),
+        }
+    finally:
+        db.close()
+    
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
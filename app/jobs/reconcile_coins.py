@@ -0,0 +1,34 @@
+"""
+Coin balance reconciliation job
+
+Compares users.coins against SUM(coin_transactions.amount) for every student
+in a single pass and prints the drift report as JSON. Exits with status 1 when
+any balance drifted, so it can be scheduled from cron and alert on failure.
+
+    python -m app.jobs.reconcile_coins [--learning-center-id N]
+"""
+import argparse
+import json
+import sys
+
+from ..database import SessionLocal
+from ..services.user_service import user_service
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reconcile coin balances with the ledger")
+    parser.add_argument("--learning-center-id", type=int, default=None)
+    args = parser.parse_args(argv)
+    
+    db = SessionLocal()
+    try:
+        report = user_service.reconcile_coins(db, learning_center_id=args.learning_center_id)
+    finally:
+        db.close()
+    
+    print(json.dumps(report, indent=2))
+    return 1 if report["students_drifted"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,65 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
-import os
+import logging
 
+from .compression import CompressionMiddleware
 from .config import settings
-from .database import engine, Base
-# Create tables
-Base.metadata.create_all(bind=engine)
+from .database import engine, warm_db_pool, ping_redis, close_redis
+from .health import health_checker
+from .metrics import MetricsMiddleware, render_metrics, mark_worker_exited
+from .profiling import ProfilingMiddleware
+from .utils.http_clients import init_http_clients, close_http_clients
+# Schema changes are applied with `alembic upgrade head`, never at import time
+
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Per-worker startup and shutdown of pools and shared clients
+    
+    Importing the app only wires routes; connections are opened and warmed
+    here, and the worker reports ready only afterwards. On shutdown (after
+    uvicorn has finished in-flight requests) everything is closed.
+    """
+    from .services import storage_service
+    
+    app.state.ready = False
+    storage_service.ensure_directories()
+    init_http_clients()
+    
+    # A dependency that is down at boot should not crash the worker;
+    # /health keeps reporting it until it recovers
+    try:
+        await run_in_threadpool(warm_db_pool, settings.DB_POOL_WARM_CONNECTIONS)
+    except Exception as e:
+        logger.warning(f"Database warm-up failed: {e}")
+    try:
+        await ping_redis()
+    except Exception as e:
+        logger.warning(f"Redis warm-up failed: {e}")
+    
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        await close_http_clients()
+        await close_redis()
+        engine.dispose()
+        mark_worker_exited()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     description="API for Language Learning Centers",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -23,9 +71,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files for serving uploaded content
-if os.path.exists(settings.STORAGE_PATH):
-    app.mount("/static", StaticFiles(directory=settings.STORAGE_PATH), name="static")
+# br/gzip for text responses of at least COMPRESSION_MIN_SIZE bytes
+app.add_middleware(CompressionMiddleware)
+
+# Inside MetricsMiddleware, whose per-request stats collect the SQL for profiles
+app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so the timing covers CORS handling too
+app.add_middleware(MetricsMiddleware)
+
+# Mount static files for serving uploaded content (the directory is created in lifespan)
+app.mount("/static", StaticFiles(directory=settings.STORAGE_PATH, check_dir=False), name="static")
 
 # Include routers
 from .routers import auth, admin, teacher, student, content, super_admin
@@ -47,4 +103,25 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    """Readiness: 503 until startup finished, during shutdown, or when a dependency is down"""
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "unavailable"})
+    
+    result = await health_checker.check()
+    return JSONResponse(
+        status_code=200 if result["status"] == "healthy" else 503,
+        content=result
+    )
+
+
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness: the worker's event loop is responding; dependencies are not checked"""
+    return {"status": "alive"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (aggregated across workers in multiprocess mode)"""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
@@ -0,0 +1,197 @@
+import os
+import time
+from contextlib import contextmanager
+
+import httpx
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+    generate_latest, multiprocess,
+)
+from sqlalchemy import event
+
+from .config import settings
+from .slow_queries import slow_query_log
+from .utils.request_context import SQL_CAPTURE_LIMIT, current_request, end_request, start_request
+
+
+# With several uvicorn workers each process writes its samples to
+# PROMETHEUS_MULTIPROC_DIR (set before start, emptied on each deploy) and
+# /metrics aggregates them, whichever worker serves the scrape
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements per request",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "Latency of single SQL statements",
+    buckets=FAST_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OPEN = Gauge(
+    "db_pool_open_connections",
+    "DBAPI connections currently open",
+    multiprocess_mode="livesum",
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency",
+    ["command"],
+    buckets=FAST_BUCKETS,
+)
+EXTERNAL_CALL_SECONDS = Histogram(
+    "external_call_duration_seconds",
+    "Latency of calls to third-party APIs",
+    ["service", "operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+EXTERNAL_CALLS = Counter(
+    "external_calls_total",
+    "Calls to third-party APIs by outcome",
+    ["service", "operation", "outcome"],
+)
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests_total",
+    "Cached endpoint lookups by where the body came from (local, redis, coalesced, miss, bypass)",
+    ["namespace", "result"],
+)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request by route template"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats, token = start_request(scope)
+        status_code = 500
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            # Unmatched paths share one label so scanners cannot blow up cardinality
+            route = stats.route
+            HTTP_REQUEST_SECONDS.labels(stats.method, route, str(status_code)).observe(elapsed)
+            HTTP_REQUEST_DB_QUERIES.labels(stats.method, route).observe(stats.db_queries)
+            HTTP_REQUEST_DB_SECONDS.labels(stats.method, route).observe(stats.db_seconds)
+            end_request(token)
+
+
+def instrument_engine(engine) -> None:
+    """Count and time SQL statements and track pool usage for an engine"""
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_QUERY_SECONDS.observe(elapsed)
+        if 0 < settings.SLOW_QUERY_MS <= elapsed * 1000:
+            slow_query_log.record(conn, cursor, statement, parameters, executemany, elapsed)
+        stats = current_request()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+            # Parameters are left out: they may hold phone numbers and codes
+            if stats.sql is not None and len(stats.sql) < SQL_CAPTURE_LIMIT:
+                stats.sql.append({
+                    "statement": statement,
+                    "duration_ms": round(elapsed * 1000, 3),
+                    "rows": cursor.rowcount,
+                    "executemany": executemany,
+                })
+    
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        # Failed statements never reach after_cursor_execute
+        if context.connection is not None:
+            starts = context.connection.info.get("query_start")
+            if starts:
+                starts.pop()
+    
+    @event.listens_for(engine.pool, "connect")
+    def _connect(dbapi_connection, connection_record):
+        DB_POOL_OPEN.inc()
+    
+    @event.listens_for(engine.pool, "close")
+    def _close(dbapi_connection, connection_record):
+        DB_POOL_OPEN.dec()
+    
+    @event.listens_for(engine.pool, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.inc()
+    
+    @event.listens_for(engine.pool, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+
+@contextmanager
+def observe_external(service: str, operation: str):
+    """Time a third-party call; the outcome is success, timeout or error"""
+    outcome = "success"
+    start = time.perf_counter()
+    try:
+        yield
+    except httpx.TimeoutException:
+        outcome = "timeout"
+        raise
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        EXTERNAL_CALL_SECONDS.labels(service, operation, outcome).observe(time.perf_counter() - start)
+        EXTERNAL_CALLS.labels(service, operation, outcome).inc()
+
+
+def render_metrics():
+    """Exposition payload and content type for /metrics"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_exited() -> None:
+    """Drop this worker's live gauges from the multiprocess aggregate"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
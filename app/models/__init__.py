@@ -5,7 +5,9 @@ from .lesson import Lesson
 from .word import Word, WordDifficulty
 from .group import Group, GroupStudent
 from .progress import LessonProgress, WordHistory, CoinTransaction, Leaderboard, TransactionType
+from .progress import CoinIdempotencyKey, ArchivedCoinTotal
 from .otp_request import OtpRequest
+from .stats import GroupLessonStats, StudentCourseStats, WordStats, WordDailyStats, StudentStats
 
 __all__ = [
     "User",
@@ -22,5 +24,12 @@ __all__ = [
     "CoinTransaction",
     "Leaderboard",
     "TransactionType",
+    "CoinIdempotencyKey",
+    "ArchivedCoinTotal",
     "OtpRequest",
+    "GroupLessonStats",
+    "StudentCourseStats",
+    "WordStats",
+    "WordDailyStats",
+    "StudentStats",
 ]
\ No newline at end of file
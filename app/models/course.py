@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -20,7 +20,11 @@ class Course(Base):
     lessons = relationship("Lesson", back_populates="course")
     groups = relationship("Group", back_populates="course")
     
-    # Indexes
+    # Indexes (partial: soft-deleted courses are never listed)
     __table_args__ = (
-        Index("ix_course_learning_center", "learning_center_id"),
+        Index(
+            "ix_course_center_live", "learning_center_id", "is_active",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
     )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -22,10 +22,18 @@ class Group(Base):
     teacher = relationship("User", back_populates="groups_as_teacher", foreign_keys=[teacher_id])
     student_memberships = relationship("GroupStudent", back_populates="group")
     
-    # Indexes
+    # Indexes (partial: deleted groups are never looked up)
     __table_args__ = (
-        Index("ix_group_learning_center", "learning_center_id"),
-        Index("ix_group_teacher", "teacher_id"),
+        Index(
+            "ix_group_center_live", "learning_center_id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_group_teacher_live", "teacher_id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
         Index("ix_group_course", "course_id"),
     )
 
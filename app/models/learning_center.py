@@ -15,6 +15,10 @@ class LearningCenter(Base):
     student_limit = Column(Integer, nullable=False)
     teacher_limit = Column(Integer, nullable=False)
     group_limit = Column(Integer, nullable=False)
+    # Usage counters maintained by usage_service (active students/teachers, live groups)
+    student_count = Column(Integer, default=0, server_default="0", nullable=False)
+    teacher_count = Column(Integer, default=0, server_default="0", nullable=False)
+    group_count = Column(Integer, default=0, server_default="0", nullable=False)
     is_active = Column(Boolean, default=True)
     is_paid = Column(Boolean, default=False)
     deleted_at = Column(DateTime, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -22,7 +22,12 @@ class Lesson(Base):
     lesson_progress = relationship("LessonProgress", back_populates="lesson")
     coin_transactions = relationship("CoinTransaction", back_populates="lesson")
     
-    # Indexes
+    # Indexes (partial: only live lessons are listed or counted)
     __table_args__ = (
-        Index("ix_lesson_course", "course_id"),
+        Index(
+            "ix_lesson_course_order_live", "course_id", "order",
+            postgresql_where=text("deleted_at IS NULL"),
+            postgresql_include=["id"],
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
     )
\ No newline at end of file
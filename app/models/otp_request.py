@@ -1,20 +1,33 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
-from ..database import Base
+from ..database import Base, IS_POSTGRES
+from ..utils.partitions import partition_by_month
 
 
 class OtpRequest(Base):
     __tablename__ = "otp_requests"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     phone = Column(String(20), nullable=False, index=True)
     learning_center_id = Column(Integer, ForeignKey("learning_centers.id"), nullable=False)
-    ip_address = Column(String(45), nullable=True, index=True)  # IPv4 (15) or IPv6 (45)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    ip_address = Column(String(45), nullable=True)  # IPv4 (15) or IPv6 (45)
+    # Partition key; Postgres requires it in the primary key of a partitioned table
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, primary_key=IS_POSTGRES)
     
     # Relationships
     user = relationship("User", back_populates="otp_requests")
-    learning_center = relationship("LearningCenter")
\ No newline at end of file
+    learning_center = relationship("LearningCenter")
+    
+    # Indexes (rate limits filter by user or IP within a time range)
+    __table_args__ = (
+        Index("ix_otp_requests_user_created", "user_id", "created_at"),
+        Index("ix_otp_requests_ip_created", "ip_address", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    __mapper_args__ = {"primary_key": [id]}
+
+
+partition_by_month(OtpRequest.__table__, "created_at")
@@ -3,7 +3,8 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
-from ..database import Base
+from ..database import Base, IS_POSTGRES
+from ..utils.partitions import partition_by_month
 
 
 class TransactionType(str, enum.Enum):
@@ -31,7 +32,7 @@ class LessonProgress(Base):
     # Indexes
     __table_args__ = (
         Index("ix_lesson_progress_student_lesson", "student_id", "lesson_id", unique=True),
-        Index("ix_lesson_progress_student", "student_id"),
+        Index("ix_lesson_progress_student_updated", "student_id", "updated_at"),
         Index("ix_lesson_progress_lesson", "lesson_id"),
     )
 
@@ -39,34 +40,37 @@ class LessonProgress(Base):
 class WordHistory(Base):
     __tablename__ = "word_history"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     word_id = Column(Integer, ForeignKey("words.id"), nullable=False)
     is_correct = Column(Boolean, nullable=False)
-    attempted_at = Column(DateTime, default=func.now())
+    # Partition key; Postgres requires it in the primary key of a partitioned table
+    attempted_at = Column(DateTime, default=func.now(), nullable=False, primary_key=IS_POSTGRES)
     
     # Relationships
     student = relationship("User", back_populates="word_history")
     word = relationship("Word", back_populates="word_history")
     
-    # Indexes
+    # Indexes (student_id lookups use the student_word prefix)
     __table_args__ = (
         Index("ix_word_history_student_word", "student_id", "word_id"),
-        Index("ix_word_history_student", "student_id"),
         Index("ix_word_history_word", "word_id"),
+        {"postgresql_partition_by": "RANGE (attempted_at)"},
     )
+    __mapper_args__ = {"primary_key": [id]}
 
 
 class CoinTransaction(Base):
     __tablename__ = "coin_transactions"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    lesson_id = Column(Integer, ForeignKey("lessons.id"), nullable=False)
-    amount = Column(Integer, nullable=False)
+    lesson_id = Column(Integer, ForeignKey("lessons.id"), nullable=True)  # Empty for manual bonus/penalty
+    amount = Column(Integer, nullable=False)  # Negative for penalties
     transaction_type = Column(Enum(TransactionType), nullable=False)
     description = Column(String, nullable=True)
-    created_at = Column(DateTime, default=func.now())
+    # Partition key; Postgres requires it in the primary key of a partitioned table
+    created_at = Column(DateTime, default=func.now(), nullable=False, primary_key=IS_POSTGRES)
     
     # Relationships
     student = relationship("User", back_populates="coin_transactions")
@@ -74,9 +78,47 @@ class CoinTransaction(Base):
     
     # Indexes
     __table_args__ = (
-        Index("ix_coin_transaction_student", "student_id"),
+        Index("ix_coin_transaction_student_created", "student_id", "created_at"),
         Index("ix_coin_transaction_lesson", "lesson_id"),
         Index("ix_coin_transaction_created", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    __mapper_args__ = {"primary_key": [id]}
+
+
+class CoinIdempotencyKey(Base):
+    """Client-supplied idempotency key of a coin transaction
+    
+    Kept outside the partitioned ledger because a unique index there would have
+    to include the partition column.
+    """
+    __tablename__ = "coin_idempotency_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    idempotency_key = Column(String(64), nullable=False)
+    transaction_id = Column(Integer, nullable=True)  # Set right after the ledger insert
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    
+    # Indexes
+    __table_args__ = (
+        Index("ix_coin_idempotency_student_key", "student_id", "idempotency_key", unique=True),
+        Index("ix_coin_idempotency_created", "created_at"),
+    )
+
+
+class ArchivedCoinTotal(Base):
+    """Per-student sum of coin transactions moved out of the ledger by the archive job"""
+    __tablename__ = "archived_coin_totals"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    amount = Column(Integer, default=0, nullable=False)
+    archived_through = Column(DateTime, nullable=True)  # End of the newest archived partition
+    
+    # Indexes
+    __table_args__ = (
+        Index("ix_archived_coin_totals_student", "student_id", unique=True),
     )
 
 
@@ -99,4 +141,8 @@ class Leaderboard(Base):
         Index("ix_leaderboard_learning_center", "learning_center_id"),
         Index("ix_leaderboard_center_rank", "learning_center_id", "rank"),
         Index("ix_leaderboard_student", "student_id", unique=True),
-    )
\ No newline at end of file
+    )
+
+
+partition_by_month(WordHistory.__table__, "attempted_at")
+partition_by_month(CoinTransaction.__table__, "created_at")
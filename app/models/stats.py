@@ -0,0 +1,102 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, Index, LargeBinary
+from sqlalchemy.sql import func
+
+from ..database import Base
+
+
+class GroupLessonStats(Base):
+    """Per-(group, lesson) aggregates maintained incrementally on lesson completion"""
+    __tablename__ = "group_lesson_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
+    lesson_id = Column(Integer, ForeignKey("lessons.id"), nullable=False)
+    students_completed = Column(Integer, default=0, nullable=False)
+    total_attempts = Column(Integer, default=0, nullable=False)
+    score_sum = Column(Integer, default=0, nullable=False)  # Sum of members' best scores
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    # Indexes
+    __table_args__ = (
+        Index("ix_group_lesson_stats_group_lesson", "group_id", "lesson_id", unique=True),
+    )
+
+
+class StudentCourseStats(Base):
+    """Per-(student, course) aggregates maintained incrementally on lesson completion"""
+    __tablename__ = "student_course_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+    lessons_completed = Column(Integer, default=0, nullable=False)
+    total_attempts = Column(Integer, default=0, nullable=False)
+    score_sum = Column(Integer, default=0, nullable=False)  # Sum of best scores
+    last_activity_at = Column(DateTime, nullable=True)
+    
+    # Indexes
+    __table_args__ = (
+        Index("ix_student_course_stats_student_course", "student_id", "course_id", unique=True),
+        Index("ix_student_course_stats_course", "course_id"),
+    )
+
+
+class WordStats(Base):
+    """Lifetime per-word attempt counters maintained on word-attempt ingest"""
+    __tablename__ = "word_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    word_id = Column(Integer, ForeignKey("words.id"), nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    correct = Column(Integer, default=0, nullable=False)
+    last_attempt_at = Column(DateTime, nullable=True)
+    
+    # Indexes
+    __table_args__ = (
+        Index("ix_word_stats_word", "word_id", unique=True),
+    )
+
+
+class WordDailyStats(Base):
+    """Per-(word, day) attempt counters backing the rolling 7/30 day windows"""
+    __tablename__ = "word_daily_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    word_id = Column(Integer, ForeignKey("words.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    correct = Column(Integer, default=0, nullable=False)
+    
+    # Indexes
+    __table_args__ = (
+        Index("ix_word_daily_stats_word_day", "word_id", "day", unique=True),
+        Index("ix_word_daily_stats_day", "day"),
+    )
+
+
+class StudentStats(Base):
+    """Per-student summary maintained incrementally on completion, attempt and coin events"""
+    __tablename__ = "student_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    lessons_completed = Column(Integer, default=0, nullable=False)
+    lesson_attempts = Column(Integer, default=0, nullable=False)
+    score_sum = Column(Integer, default=0, nullable=False)  # Sum of best scores
+    words_attempted = Column(Integer, default=0, nullable=False)
+    words_correct = Column(Integer, default=0, nullable=False)
+    coins_earned = Column(Integer, default=0, nullable=False)
+    coins_this_week = Column(Integer, default=0, nullable=False)
+    week_start = Column(Date, nullable=True)  # Monday of the week coins_this_week counts
+    current_streak = Column(Integer, default=0, nullable=False)  # Consecutive active days
+    longest_streak = Column(Integer, default=0, nullable=False)
+    last_active_date = Column(Date, nullable=True)
+    # Ring of 366 one-byte daily activity counters indexed by date ordinal % 366;
+    # slots between last_active_date and the next active day are cleared on write
+    activity = Column(LargeBinary, nullable=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    # Indexes
+    __table_args__ = (
+        Index("ix_student_stats_student", "student_id", unique=True),
+    )
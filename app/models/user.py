@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Index
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -22,6 +22,7 @@ class User(Base):
     learning_center_id = Column(Integer, ForeignKey("learning_centers.id"), nullable=False)
     coins = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)  # Bumped to revoke issued tokens
     deleted_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=func.now())
     
@@ -38,5 +39,17 @@ class User(Base):
     # Indexes
     __table_args__ = (
         Index("ix_user_phone_center", "phone", "learning_center_id"),
-        Index("ix_user_learning_center", "learning_center_id"),
+        # Limit checks and member lookups filter is_active, admin lists
+        # filter deleted_at; the predicates are spelled as each dialect
+        # renders `is_active == True` so the planner can match them
+        Index(
+            "ix_user_center_role_active", "learning_center_id", "role",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index(
+            "ix_user_center_role_live", "learning_center_id", "role",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
     )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -32,8 +32,13 @@ class Word(Base):
     lesson = relationship("Lesson", back_populates="words")
     word_history = relationship("WordHistory", back_populates="word")
     
-    # Indexes
+    # Indexes (partial: every lesson/word query skips soft-deleted rows;
+    # id is included so per-lesson counts are index-only on Postgres)
     __table_args__ = (
-        Index("ix_word_lesson", "lesson_id"),
-        Index("ix_word_lesson_order", "lesson_id", "order"),
+        Index(
+            "ix_word_lesson_order_live", "lesson_id", "order",
+            postgresql_where=text("deleted_at IS NULL"),
+            postgresql_include=["id"],
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
     )
\ No newline at end of file
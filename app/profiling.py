@@ -0,0 +1,207 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+
+from .config import settings
+from .database import get_redis
+from .utils.request_context import current_request
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Debug-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Summaries live in a capped Redis list shared by all workers; the full
+# profile (stacks and SQL) is a separate key that expires on its own
+PROFILES_KEY = "profiling:profiles"
+PROFILE_KEY = "profiling:profile:{}"
+PROFILE_TTL = 7 * 24 * 3600
+
+MAX_PROFILE_SECONDS = 60
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# One profile at a time per worker: the sampler sees every thread, so two
+# overlapping sessions would record each other's samples
+_session_lock = threading.Lock()
+
+
+def sign_profile_token(expires_at: int) -> str:
+    """Value for the X-Debug-Profile header, valid until ``expires_at`` (unix time)"""
+    signature = hmac.new(
+        settings.SECRET_KEY.encode(),
+        f"profile:{expires_at}".encode(),
+        hashlib.sha256
+    ).hexdigest()
+    return f"{expires_at}.{signature}"
+
+
+def verify_profile_token(token: str) -> bool:
+    expires_at = token.partition(".")[0]
+    if not expires_at.isdigit() or int(expires_at) < time.time():
+        return False
+    return hmac.compare_digest(sign_profile_token(int(expires_at)), token)
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(APP_DIR):
+        filename = "app" + filename[len(APP_DIR):]
+    elif "site-packages" in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[-1]
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Wall-clock sampler over all threads of the worker
+    
+    Every ``interval`` seconds the stacks of the other threads are read
+    with sys._current_frames(). Only stacks that pass through code under
+    app/ are kept, which drops idle event-loop and pool threads.
+    """
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+    
+    def start(self) -> None:
+        self._thread.start()
+    
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+    
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        deadline = time.monotonic() + MAX_PROFILE_SECONDS
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                labels = []
+                in_app = False
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    in_app = in_app or frame.f_code.co_filename.startswith(APP_DIR)
+                    frame = frame.f_back
+                if in_app:
+                    labels.append(names.get(ident, str(ident)))
+                    self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+
+def collapsed_stacks(stacks: dict) -> str:
+    """Brendan Gregg's collapsed format, which speedscope and flamegraph.pl import"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.items())
+
+
+class ProfilingMiddleware:
+    """Opt-in profiling of sampled requests or requests with a signed header
+    
+    PROFILING_SAMPLE_RATE (default 0) picks a random fraction of requests;
+    a valid X-Debug-Profile token (see sign_profile_token) forces one. The
+    stack samples and the SQL executed are stored for super admins, and the
+    response carries X-Profile-Id.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        
+        if not _session_lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        
+        profile_id = uuid.uuid4().hex[:12]
+        status_code = 500
+        
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_ID_HEADER.lower().encode(), profile_id.encode())
+                ]
+            await send(message)
+        
+        stats = current_request()
+        if stats is not None:
+            stats.sql = []
+        sampler = StackSampler(settings.PROFILING_INTERVAL)
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            stacks = sampler.stop()
+            duration = time.perf_counter() - start
+            _session_lock.release()
+            
+            route = getattr(scope.get("route"), "path", None)
+            profile = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route,
+                "status": status_code,
+                "duration_ms": round(duration * 1000, 2),
+                "samples": sampler.samples,
+                "interval_ms": settings.PROFILING_INTERVAL * 1000,
+                "sql_count": len(stats.sql) if stats is not None else 0,
+                "created_at": started_at.isoformat(),
+            }
+            await _store_profile(profile, dict(stacks), stats.sql if stats is not None else [])
+    
+    def _wanted(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"x-debug-profile":
+                return verify_profile_token(value.decode("latin-1"))
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+
+async def _store_profile(summary: dict, stacks: dict, sql: List[dict]) -> None:
+    try:
+        redis = get_redis()
+        full = dict(summary, stacks=stacks, sql=sql)
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.setex(PROFILE_KEY.format(summary["id"]), PROFILE_TTL, json.dumps(full))
+            pipe.lpush(PROFILES_KEY, json.dumps(summary))
+            pipe.ltrim(PROFILES_KEY, 0, settings.PROFILING_BUFFER_SIZE - 1)
+            await pipe.execute()
+    except Exception as e:
+        # Profiling must never fail the request it observed
+        logger.warning(f"Failed to store profile {summary['id']}: {e}")
+
+
+async def list_profiles() -> List[dict]:
+    """Newest first"""
+    return [json.loads(item) for item in await get_redis().lrange(PROFILES_KEY, 0, -1)]
+
+
+async def get_profile(profile_id: str) -> Optional[dict]:
+    data = await get_redis().get(PROFILE_KEY.format(profile_id))
+    return json.loads(data) if data else None
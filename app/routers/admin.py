@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from pydantic import BaseModel, field_serializer
+from pydantic import BaseModel, Field, field_serializer
 from datetime import datetime
 
+from ..cache import cached_response, response_cache
 from ..database import get_db
-from ..dependencies import get_admin_user
-from ..models import User, UserRole, Group, GroupStudent, Course
-from ..services import user_service
+from ..dependencies import Principal, get_admin_user
+from ..models import User, UserRole, Group, GroupStudent, Course, TransactionType
+from ..services import user_service, auth_service, progress_service, usage_service
+from ..services.usage_service import user_kind
+from ..utils.spreadsheet import iter_upload_rows
+from ..utils.json_response import FastJSONResponse, response_columns, rows_to_dicts
 from sqlalchemy.sql import func
 
 
@@ -37,6 +41,10 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+# Columns loaded for user lists; rows are serialized without ORM objects
+USER_COLUMNS = response_columns(User, UserResponse)
+
+
 class CreateGroupRequest(BaseModel):
     name: str
     course_id: int
@@ -63,12 +71,22 @@ class AddStudentToGroupRequest(BaseModel):
     student_id: int
 
 
+class AddStudentsToGroupRequest(BaseModel):
+    student_ids: List[int] = Field(..., max_length=1000)
+
+
 class UpdateUserRequest(BaseModel):
     phone: Optional[str] = None
     name: Optional[str] = None
     role: Optional[UserRole] = None
 
 
+class CoinAdjustmentRequest(BaseModel):
+    amount: int = Field(..., gt=0)
+    transaction_type: TransactionType = TransactionType.BONUS
+    description: Optional[str] = None
+
+
 class UpdateGroupRequest(BaseModel):
     name: Optional[str] = None
     course_id: Optional[int] = None
@@ -78,7 +96,7 @@ class UpdateGroupRequest(BaseModel):
 @router.post("/users", response_model=UserResponse)
 async def create_user(
     request: CreateUserRequest,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Create a new user (student/teacher only)"""
@@ -100,12 +118,37 @@ async def create_user(
     return user
 
 
+@router.post("/users/import")
+async def import_students(
+    file: UploadFile = File(...),
+    current_user: Principal = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Bulk-create students from a .csv/.xlsx file with `phone` and `name` columns"""
+    report = user_service.import_students(
+        db=db,
+        learning_center_id=current_user.learning_center_id,
+        rows=iter_upload_rows(file)
+    )
+    
+    return report
+
+
+@router.get("/usage")
+async def get_usage(
+    current_user: Principal = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Students, teachers and groups used against the center's limits"""
+    return usage_service.get_usage(db, current_user.learning_center_id)
+
+
 @router.get("/users", response_model=List[UserResponse])
 async def list_users(
     role: UserRole = None,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """List users in learning center"""
@@ -114,16 +157,17 @@ async def list_users(
         learning_center_id=current_user.learning_center_id,
         role=role,
         skip=skip,
-        limit=limit
+        limit=limit,
+        columns=USER_COLUMNS
     )
     
-    return users
+    return FastJSONResponse(rows_to_dicts(users))
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Get specific user details"""
@@ -146,7 +190,7 @@ async def get_user(
 async def update_user(
     user_id: int,
     request: UpdateUserRequest,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Update user details"""
@@ -154,7 +198,7 @@ async def update_user(
         User.id == user_id,
         User.learning_center_id == current_user.learning_center_id,
         User.deleted_at.is_(None)
-    ).first()
+    ).with_for_update().first()
     
     if not user:
         raise HTTPException(
@@ -189,11 +233,19 @@ async def update_user(
         user.phone = request.phone
     if request.name:
         user.name = request.name
-    if request.role:
+    if request.role and request.role != user.role:
+        # Moves the user's slot between the student and teacher counters
+        usage_service.move_user(
+            db,
+            before=(user.learning_center_id, user.role, user.is_active),
+            after=(user.learning_center_id, request.role, user.is_active)
+        )
         user.role = request.role
+        auth_service.revoke_user_tokens(user)
     
     db.commit()
     db.refresh(user)
+    await auth_service.forget_user_claims(user.id)
     
     return user
 
@@ -201,7 +253,7 @@ async def update_user(
 @router.delete("/users/{user_id}")
 async def deactivate_user(
     user_id: int,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Deactivate a user (soft delete)"""
@@ -209,7 +261,7 @@ async def deactivate_user(
         User.id == user_id,
         User.learning_center_id == current_user.learning_center_id,
         User.deleted_at.is_(None)
-    ).first()
+    ).with_for_update().first()
     
     if not user:
         raise HTTPException(
@@ -218,19 +270,74 @@ async def deactivate_user(
         )
     
     # Soft delete: mark as inactive and set deleted_at timestamp
+    kind = user_kind(user.role, user.is_active)
+    if kind:
+        usage_service.release(db, user.learning_center_id, kind)
     user.is_active = False
     user.deleted_at = func.now()
+    auth_service.revoke_user_tokens(user)
     db.commit()
+    await auth_service.forget_user_claims(user.id)
     
     return {"message": "Foydalanuvchi muvaffaqiyatli o'chirildi"}
 
 
+@router.post("/users/{user_id}/coins")
+async def adjust_coins(
+    user_id: int,
+    request: CoinAdjustmentRequest,
+    idempotency_key: Optional[str] = Header(None, max_length=64),
+    current_user: Principal = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Grant a bonus or apply a penalty to a student's coin balance"""
+    if request.transaction_type == TransactionType.LESSON_SCORE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Faqat bonus yoki jarima qo'shish mumkin"
+        )
+    
+    student = db.query(User.id).filter(
+        User.id == user_id,
+        User.learning_center_id == current_user.learning_center_id,
+        User.role == UserRole.STUDENT,
+        User.deleted_at.is_(None)
+    ).first()
+    
+    if not student:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="O'quvchi topilmadi"
+        )
+    
+    amount = request.amount
+    if request.transaction_type == TransactionType.PENALTY:
+        amount = -amount
+    
+    transaction, created = user_service.apply_coin_transaction(
+        db,
+        student_id=user_id,
+        amount=amount,
+        transaction_type=request.transaction_type,
+        description=request.description,
+        idempotency_key=idempotency_key
+    )
+    
+    return {
+        "transaction_id": transaction.id,
+        "amount": transaction.amount,
+        "transaction_type": transaction.transaction_type,
+        "created": created,
+        "balance": db.query(User.coins).filter(User.id == user_id).scalar(),
+    }
+
+
 # Group Management
 
 @router.post("/groups", response_model=GroupResponse)
 async def create_group(
     request: CreateGroupRequest,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Create a new group"""
@@ -263,6 +370,9 @@ async def create_group(
             detail="Kurs topilmadi"
         )
     
+    # Take a group slot; raises 400 when group_limit is reached
+    usage_service.reserve(db, current_user.learning_center_id, "groups")
+    
     group = Group(
         name=request.name,
         learning_center_id=current_user.learning_center_id,
@@ -274,6 +384,8 @@ async def create_group(
     db.commit()
     db.refresh(group)
     
+    await response_cache.bump("groups", current_user.learning_center_id)
+    
     # Add student count
     group.student_count = 0
     
@@ -281,10 +393,11 @@ async def create_group(
 
 
 @router.get("/groups", response_model=List[GroupResponse])
+@cached_response("groups")
 async def list_groups(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """List all groups in learning center"""
@@ -304,9 +417,10 @@ async def list_groups(
 
 
 @router.get("/groups/{group_id}", response_model=GroupResponse)
+@cached_response("groups")
 async def get_group(
     group_id: int,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Get specific group details"""
@@ -335,7 +449,7 @@ async def get_group(
 async def update_group(
     group_id: int,
     request: UpdateGroupRequest,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Update group details"""
@@ -387,10 +501,15 @@ async def update_group(
         group.name = request.name
     if request.teacher_id:
         group.teacher_id = request.teacher_id
+    course_changed = bool(request.course_id) and request.course_id != group.course_id
     if request.course_id:
         group.course_id = request.course_id
     
+    if course_changed:
+        db.flush()
+        progress_service.refresh_group_stats(db, group.id)
     db.commit()
+    await response_cache.bump("groups", current_user.learning_center_id)
     db.refresh(group)
     
     # Add student count
@@ -406,7 +525,7 @@ async def update_group(
 async def add_student_to_group(
     group_id: int,
     request: AddStudentToGroupRequest,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Add student to group"""
@@ -416,15 +535,40 @@ async def add_student_to_group(
         group_id=group_id,
         current_user=current_user
     )
+    progress_service.refresh_group_stats(db, group_id)
+    db.commit()
+    await response_cache.bump("groups", current_user.learning_center_id)
     
     return {"message": "Talaba guruhga muvaffaqiyatli qo'shildi"}
 
 
+@router.post("/groups/{group_id}/students/bulk")
+async def add_students_to_group(
+    group_id: int,
+    request: AddStudentsToGroupRequest,
+    current_user: Principal = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Add many students to group; existing members are skipped"""
+    result = user_service.add_students_to_group(
+        db=db,
+        student_ids=request.student_ids,
+        group_id=group_id,
+        current_user=current_user
+    )
+    if result["added"]:
+        progress_service.refresh_group_stats(db, group_id)
+        db.commit()
+        await response_cache.bump("groups", current_user.learning_center_id)
+    
+    return result
+
+
 @router.delete("/groups/{group_id}/students/{student_id}")
 async def remove_student_from_group(
     group_id: int,
     student_id: int,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Remove student from group"""
@@ -454,7 +598,10 @@ async def remove_student_from_group(
         )
     
     db.delete(group_student)
+    db.flush()
+    progress_service.refresh_group_stats(db, group_id)
     db.commit()
+    await response_cache.bump("groups", current_user.learning_center_id)
     
     return {"message": "Talaba guruhdan muvaffaqiyatli olib tashlandi"}
 
@@ -462,7 +609,7 @@ async def remove_student_from_group(
 @router.delete("/groups/{group_id}")
 async def delete_group(
     group_id: int,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Delete group (soft delete)"""
@@ -470,7 +617,7 @@ async def delete_group(
         Group.id == group_id,
         Group.learning_center_id == current_user.learning_center_id,
         Group.deleted_at.is_(None)
-    ).first()
+    ).with_for_update().first()
     
     if not group:
         raise HTTPException(
@@ -478,7 +625,9 @@ async def delete_group(
             detail="Guruh topilmadi"
         )
     
+    usage_service.release(db, group.learning_center_id, "groups")
     group.deleted_at = func.now()
     db.commit()
+    await response_cache.bump("groups", current_user.learning_center_id)
     
     return {"message": "Guruh muvaffaqiyatli o'chirildi"}
\ No newline at end of file
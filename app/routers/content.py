@@ -4,9 +4,11 @@ from typing import List, Optional, Union
 from pydantic import BaseModel, field_serializer
 from datetime import datetime
 
+from ..cache import cached_response
 from ..database import get_db
-from ..dependencies import get_admin_user, get_teacher_user, get_student_user, get_current_user
-from ..models import User, Course, Lesson, Word, WordDifficulty
+from ..dependencies import Principal, get_admin_user, get_teacher_user, get_student_user, get_current_principal
+from ..models import Course, Lesson, Word, WordDifficulty
+from ..utils.json_response import FastJSONResponse, response_columns, rows_to_dicts
 
 
 router = APIRouter()
@@ -67,12 +69,17 @@ class WordResponse(BaseModel):
         from_attributes = True
 
 
+# Columns loaded for word lists; rows are serialized without ORM objects
+WORD_COLUMNS = response_columns(Word, WordResponse)
+
+
 # Read-only content access for Admin, Teacher, Student
 
 
 @router.get("/courses", response_model=List[CourseResponse])
+@cached_response("content")
 async def list_courses(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List all courses in learning center (accessible by Admin, Teacher, Student)"""
@@ -107,9 +114,10 @@ async def list_courses(
 
 
 @router.get("/courses/{course_id}/lessons", response_model=List[LessonResponse])
+@cached_response("content")
 async def list_lessons(
     course_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List lessons in a course (accessible by Admin, Teacher, Student)"""
@@ -154,9 +162,10 @@ async def list_lessons(
 
 
 @router.get("/lessons/{lesson_id}/words", response_model=List[WordResponse])
+@cached_response("content")
 async def list_words(
     lesson_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List words in a lesson (accessible by Admin, Teacher, Student)"""
@@ -169,9 +178,9 @@ async def list_words(
     if not lesson:
         raise HTTPException(status_code=404, detail="Dars topilmadi")
     
-    words = db.query(Word).filter(
+    words = db.query(*WORD_COLUMNS).filter(
         Word.lesson_id == lesson_id,
         Word.deleted_at.is_(None)
     ).order_by(Word.order).all()
     
-    return words
+    return FastJSONResponse(rows_to_dicts(words))
@@ -1,31 +1,50 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from pydantic import BaseModel, Field
 
+from ..cache import cached_response
 from ..database import get_db
-from ..dependencies import get_student_user
-from ..models import User, LessonProgress, Leaderboard
+from ..dependencies import Principal, get_student_user
+from ..models import Leaderboard
+from ..services import progress_service
 
 
 router = APIRouter()
 
 
+class WordAttempt(BaseModel):
+    word_id: int
+    is_correct: bool
+
+
+class WordAttemptsRequest(BaseModel):
+    attempts: List[WordAttempt] = Field(..., max_length=1000)
+
+
 @router.get("/courses")
+@cached_response("content")
 async def get_available_courses(
-    current_user: User = Depends(get_student_user),
+    current_user: Principal = Depends(get_student_user),
     db: Session = Depends(get_db)
 ):
     """Get courses available to student"""
     # Get courses from student's learning center
     from ..models import Course
     
-    courses = db.query(Course).filter(
+    courses = db.query(
+        Course.id,
+        Course.title,
+        Course.learning_center_id,
+        Course.is_active,
+        Course.created_at
+    ).filter(
         Course.learning_center_id == current_user.learning_center_id,
         Course.is_active == True,
         Course.deleted_at.is_(None)
     ).all()
     
-    # Convert to dict and cache for 30 minutes
+    # Convert to dict
     courses_dict = [
         {
             "id": c.id,
@@ -40,30 +59,61 @@ async def get_available_courses(
     return courses_dict
 
 
+@router.get("/stats")
+async def get_my_stats(
+    current_user: Principal = Depends(get_student_user),
+    db: Session = Depends(get_db)
+):
+    """Get student's summary statistics"""
+    return progress_service.get_student_stats(db, current_user.id)
+
+
+@router.get("/activity")
+async def get_my_activity(
+    days: int = Query(365, ge=1, le=365),
+    current_user: Principal = Depends(get_student_user),
+    db: Session = Depends(get_db)
+):
+    """Get student's daily activity heatmap and streaks"""
+    return progress_service.get_activity(db, current_user.id, days=days)
+
+
 @router.get("/progress")
 async def get_my_progress(
-    current_user: User = Depends(get_student_user),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: Principal = Depends(get_student_user),
     db: Session = Depends(get_db)
 ):
     """Get student's learning progress"""
-    progress = db.query(LessonProgress).filter(
-        LessonProgress.student_id == current_user.id
-    ).all()
+    stats = progress_service.get_student_stats(db, current_user.id)
     
     return {
-        "total_coins": current_user.coins,
-        "lesson_progress": progress
+        "total_coins": stats["total_coins"],
+        "total": stats["lessons_completed"],
+        "skip": skip,
+        "limit": limit,
+        "lesson_progress": progress_service.get_lesson_progress_page(
+            db, current_user.id, skip=skip, limit=limit
+        )
     }
 
 
 @router.get("/leaderboard")
+@cached_response("leaderboard", ttl=60)
 async def get_leaderboard(
-    current_user: User = Depends(get_student_user),
+    current_user: Principal = Depends(get_student_user),
     db: Session = Depends(get_db)
 ):
     """Get learning center leaderboard"""
     # Get leaderboard from database
-    leaderboard = db.query(Leaderboard).filter(
+    leaderboard = db.query(
+        Leaderboard.id,
+        Leaderboard.student_id,
+        Leaderboard.total_coins,
+        Leaderboard.rank,
+        Leaderboard.updated_at
+    ).filter(
         Leaderboard.learning_center_id == current_user.learning_center_id
     ).order_by(Leaderboard.rank).limit(10).all()
     
@@ -86,39 +136,35 @@ async def get_leaderboard(
 async def complete_lesson(
     lesson_id: int,
     score: int,
-    current_user: User = Depends(get_student_user),
+    idempotency_key: Optional[str] = Header(None, max_length=64),
+    current_user: Principal = Depends(get_student_user),
     db: Session = Depends(get_db)
 ):
     """Complete a lesson and award coins"""
-    # Update lesson progress
-    progress = db.query(LessonProgress).filter(
-        LessonProgress.student_id == current_user.id,
-        LessonProgress.lesson_id == lesson_id
-    ).first()
-    
-    if not progress:
-        progress = LessonProgress(
-            student_id=current_user.id,
-            lesson_id=lesson_id,
-            best_score=score,
-            lesson_attempts=1
-        )
-        db.add(progress)
-    else:
-        progress.lesson_attempts += 1
-        if score > progress.best_score:
-            # Award coins for improvement
-            improvement = score - progress.best_score
-            progress.best_score = score
-            
-            from ..services import user_service
-            user_service.award_coins(
-                db=db,
-                student_id=current_user.id,
-                lesson_id=lesson_id,
-                score=improvement
-            )
-    
-    db.commit()
+    # Clients retrying the same completion resend the same Idempotency-Key
+    progress_service.record_lesson_completion(
+        db=db,
+        student_id=current_user.id,
+        lesson_id=lesson_id,
+        score=score,
+        idempotency_key=idempotency_key
+    )
     
     return {"message": "Dars yakunlandi", "score": score}
+
+
+@router.post("/words/attempts")
+async def record_word_attempts(
+    request: WordAttemptsRequest,
+    current_user: Principal = Depends(get_student_user),
+    db: Session = Depends(get_db)
+):
+    """Record a batch of word answers"""
+    recorded = progress_service.record_word_attempts(
+        db=db,
+        student_id=current_user.id,
+        learning_center_id=current_user.learning_center_id,
+        attempts=[attempt.dict() for attempt in request.attempts]
+    )
+    
+    return {"message": "Javoblar saqlandi", "recorded": recorded}
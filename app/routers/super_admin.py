@@ -1,17 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi.responses import Response, PlainTextResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, field_serializer
 from typing import List, Optional
 from datetime import datetime
 import os
-import requests
+import time
+import httpx
 import logging
 
 from ..database import get_db
-from ..dependencies import get_super_admin_user
+from ..dependencies import Principal, get_super_admin_user
 from ..models import LearningCenter, Course, Lesson, Word, WordDifficulty, User, UserRole
-from ..services import storage_service, user_service
+from ..services import storage_service, user_service, auth_service, content_service, progress_service, usage_service
+from ..services.usage_service import user_kind
+from ..utils.spreadsheet import iter_upload_rows
+from ..utils.http_clients import get_http_client
+from ..utils.json_response import FastJSONResponse, response_columns, rows_to_dicts
+from ..metrics import observe_external
+from .. import profiling
+from ..slow_queries import slow_query_log
+from ..cache import response_cache
 
 
 router = APIRouter()
@@ -150,6 +159,7 @@ async def update_learning_center(
     
     db.commit()
     db.refresh(center)
+    await auth_service.forget_center_claims(center.id)
     
     
     return center
@@ -175,6 +185,7 @@ async def toggle_payment_status(
     
     center.is_paid = not center.is_paid
     db.commit()
+    await auth_service.forget_center_claims(center.id)
     
     
     return {
@@ -206,10 +217,39 @@ async def deactivate_learning_center(
     center.is_active = False
     center.deleted_at = func.now()
     db.commit()
+    await auth_service.forget_center_claims(center.id)
     
     return {"message": "O'quv markazi muvaffaqiyatli o'chirildi"}
 
 
+@router.get("/learning-centers/{center_id}/usage")
+async def get_learning_center_usage(
+    center_id: int,
+    current_user = Depends(get_super_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Students, teachers and groups used against the center's limits (Super Admin only)"""
+    usage = usage_service.get_usage(db, center_id)
+    
+    if usage is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="O'quv markazi topilmadi"
+        )
+    
+    return usage
+
+
+@router.post("/usage/recount")
+async def recount_usage(
+    learning_center_id: Optional[int] = None,
+    current_user = Depends(get_super_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Recompute usage counters from users and groups and report drift (Super Admin only)"""
+    return usage_service.recount(db, learning_center_id=learning_center_id)
+
+
 # User Management Schemas
 class CreateUserRequest(BaseModel):
     phone: str
@@ -243,6 +283,10 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+# Columns loaded for user lists; rows are serialized without ORM objects
+USER_COLUMNS = response_columns(User, UserResponse)
+
+
 # User Management Endpoints (Super Admin Only)
 
 @router.post("/users", response_model=UserResponse)
@@ -297,7 +341,7 @@ async def list_all_users(
     db: Session = Depends(get_db)
 ):
     """List all users across all learning centers (Super Admin only)"""
-    query = db.query(User).filter(User.deleted_at.is_(None))
+    query = db.query(*USER_COLUMNS).filter(User.deleted_at.is_(None))
     
     if learning_center_id:
         query = query.filter(User.learning_center_id == learning_center_id)
@@ -306,7 +350,7 @@ async def list_all_users(
         query = query.filter(User.role == role)
     
     users = query.offset(skip).limit(limit).all()
-    return users
+    return FastJSONResponse(rows_to_dicts(users))
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
@@ -341,7 +385,7 @@ async def update_user(
     user = db.query(User).filter(
         User.id == user_id,
         User.deleted_at.is_(None)
-    ).first()
+    ).with_for_update().first()
     
     if not user:
         raise HTTPException(
@@ -376,12 +420,32 @@ async def update_user(
                 detail="Bu telefon raqami ushbu o'quv markazida allaqachon mavjud"
             )
     
+    # Role or tenant changes invalidate the claims signed into existing tokens
+    updates = request.dict(exclude_unset=True)
+    if any(
+        field in updates and updates[field] != getattr(user, field)
+        for field in ("role", "learning_center_id")
+    ):
+        auth_service.revoke_user_tokens(user)
+    
+    # Role or tenant changes move the user's slot; the target center's limit applies
+    usage_service.move_user(
+        db,
+        before=(user.learning_center_id, user.role, user.is_active),
+        after=(
+            updates.get("learning_center_id") or user.learning_center_id,
+            updates.get("role") or user.role,
+            user.is_active
+        )
+    )
+    
     # Update fields if provided
-    for field, value in request.dict(exclude_unset=True).items():
+    for field, value in updates.items():
         setattr(user, field, value)
     
     db.commit()
     db.refresh(user)
+    await auth_service.forget_user_claims(user.id)
     
     return user
 
@@ -396,7 +460,7 @@ async def delete_user(
     user = db.query(User).filter(
         User.id == user_id,
         User.deleted_at.is_(None)
-    ).first()
+    ).with_for_update().first()
     
     if not user:
         raise HTTPException(
@@ -406,9 +470,14 @@ async def delete_user(
     
     # Soft delete: mark as inactive and set deleted_at timestamp
     from sqlalchemy.sql import func
+    kind = user_kind(user.role, user.is_active)
+    if kind:
+        usage_service.release(db, user.learning_center_id, kind)
     user.is_active = False
     user.deleted_at = func.now()
+    auth_service.revoke_user_tokens(user)
     db.commit()
+    await auth_service.forget_user_claims(user.id)
     
     return {"message": "Foydalanuvchi muvaffaqiyatli o'chirildi"}
 
@@ -422,7 +491,7 @@ class CreateCourseRequest(BaseModel):
 class CreateLessonRequest(BaseModel):
     title: str
     content: Optional[str] = None
-    order: int
+    order: Optional[int] = None  # Appended after the last lesson when omitted
 
 
 class CreateWordRequest(BaseModel):
@@ -431,7 +500,7 @@ class CreateWordRequest(BaseModel):
     definition: Optional[str] = None
     sentence: Optional[str] = None
     difficulty: WordDifficulty
-    order: int
+    order: Optional[int] = None  # Appended after the last word when omitted
 
 
 class UpdateCourseRequest(BaseModel):
@@ -454,6 +523,35 @@ class UpdateWordRequest(BaseModel):
     order: Optional[int] = None
 
 
+class ReorderRequest(BaseModel):
+    ids: List[int]
+
+
+class MoveRequest(BaseModel):
+    after_id: Optional[int] = None  # Move to the front when omitted
+
+
+class ImportWordItem(BaseModel):
+    id: Optional[int] = None
+    word: str
+    translation: str
+    definition: Optional[str] = None
+    sentence: Optional[str] = None
+    difficulty: WordDifficulty
+
+
+class ImportLessonItem(BaseModel):
+    id: Optional[int] = None
+    title: str
+    content: Optional[str] = None
+    words: List[ImportWordItem] = []
+
+
+class ImportCourseRequest(BaseModel):
+    lessons: List[ImportLessonItem]
+    prune: bool = False
+
+
 class GenerateAudioRequest(BaseModel):
     text: str
     voice: Optional[str] = None
@@ -513,6 +611,10 @@ class WordResponse(BaseModel):
         from_attributes = True
 
 
+# Columns loaded for word lists; rows are serialized without ORM objects
+WORD_COLUMNS = response_columns(Word, WordResponse)
+
+
 # Content Management Endpoints (Super Admin Only)
 
 @router.post("/content/courses", response_model=CourseResponse)
@@ -542,7 +644,7 @@ async def create_course(
     db.commit()
     db.refresh(course)
     
-    # Invalidate course cache
+    await response_cache.bump("content", course.learning_center_id)
     
     return course
 
@@ -608,6 +710,9 @@ async def update_course(
             detail="Kurs topilmadi"
         )
     
+    # A course moved to another center changes both centers' lists
+    previous_center_id = course.learning_center_id
+    
     # Update fields if provided
     if request.title:
         course.title = request.title
@@ -624,6 +729,7 @@ async def update_course(
         course.learning_center_id = request.learning_center_id
     
     db.commit()
+    await response_cache.bump("content", previous_center_id, course.learning_center_id)
     db.refresh(course)
     
     return course
@@ -652,6 +758,7 @@ async def delete_course(
     course.is_active = False
     course.deleted_at = func.now()
     db.commit()
+    await response_cache.bump("content", course.learning_center_id)
     
     return {"message": "Kurs muvaffaqiyatli o'chirildi"}
 
@@ -679,17 +786,83 @@ async def create_lesson(
     lesson = Lesson(
         title=request.title,
         content=request.content,
-        order=request.order,
+        order=request.order if request.order is not None else content_service.next_order(db, Lesson, course_id),
         course_id=course_id
     )
     
     db.add(lesson)
     db.commit()
+    await response_cache.bump("content", course.learning_center_id)
     db.refresh(lesson)
     
+    # Add word count
+    lesson.word_count = 0
+    
     return lesson
 
 
+@router.post("/content/courses/{course_id}/import")
+async def import_course_content(
+    course_id: int,
+    request: ImportCourseRequest,
+    current_user = Depends(get_super_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Upsert a course's lessons and words in one transaction (Super Admin only)"""
+    course = _get_course_or_404(db, course_id)
+    
+    result = content_service.import_course_tree(
+        db=db,
+        course_id=course_id,
+        lessons=[lesson.dict() for lesson in request.lessons],
+        prune=request.prune
+    )
+    
+    await response_cache.bump("content", course.learning_center_id)
+    
+    return result
+
+
+@router.post("/content/courses/{course_id}/import-file")
+async def import_course_content_file(
+    course_id: int,
+    file: UploadFile = File(...),
+    prune: bool = False,
+    current_user = Depends(get_super_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Upsert a course's lessons and words from a .xlsx/.csv sheet (Super Admin only)"""
+    course = _get_course_or_404(db, course_id)
+    
+    lessons = content_service.lessons_from_rows(iter_upload_rows(file))
+    
+    result = content_service.import_course_tree(
+        db=db,
+        course_id=course_id,
+        lessons=lessons,
+        prune=prune
+    )
+    
+    await response_cache.bump("content", course.learning_center_id)
+    
+    return result
+
+
+def _get_course_or_404(db: Session, course_id: int) -> Course:
+    course = db.query(Course).filter(
+        Course.id == course_id,
+        Course.deleted_at.is_(None)
+    ).first()
+    
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Kurs topilmadi"
+        )
+    
+    return course
+
+
 @router.get("/content/lessons", response_model=List[LessonResponse])
 async def list_all_lessons(
     course_id: Optional[int] = None,
@@ -762,6 +935,7 @@ async def update_lesson(
         lesson.order = request.order
     
     db.commit()
+    await response_cache.bump("content", content_service.learning_center_id_for(db, lesson_id=lesson_id))
     db.refresh(lesson)
     
     return lesson
@@ -788,10 +962,54 @@ async def delete_lesson(
     from sqlalchemy.sql import func
     lesson.deleted_at = func.now()
     db.commit()
+    await response_cache.bump("content", content_service.learning_center_id_for(db, lesson_id=lesson_id))
     
     return {"message": "Dars muvaffaqiyatli o'chirildi"}
 
 
+@router.put("/content/courses/{course_id}/lessons/order")
+async def reorder_lessons(
+    course_id: int,
+    request: ReorderRequest,
+    current_user = Depends(get_super_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Set the order of all lessons in a course (Super Admin only)"""
+    course = _get_course_or_404(db, course_id)
+    
+    updated = content_service.reorder(db, Lesson, course_id, request.ids)
+    
+    await response_cache.bump("content", course.learning_center_id)
+    
+    return {"message": "Darslar tartibi yangilandi", "updated": updated}
+
+
+@router.post("/content/lessons/{lesson_id}/move")
+async def move_lesson(
+    lesson_id: int,
+    request: MoveRequest,
+    current_user = Depends(get_super_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Move a lesson after another lesson in its course (Super Admin only)"""
+    lesson = db.query(Lesson).filter(
+        Lesson.id == lesson_id,
+        Lesson.deleted_at.is_(None)
+    ).first()
+    
+    if not lesson:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dars topilmadi"
+        )
+    
+    updated = content_service.move(db, lesson, request.after_id)
+    
+    await response_cache.bump("content", content_service.learning_center_id_for(db, lesson_id=lesson_id))
+    
+    return {"message": "Dars ko'chirildi", "updated": updated}
+
+
 @router.post("/content/lessons/{lesson_id}/words", response_model=WordResponse)
 async def create_word(
     lesson_id: int,
@@ -815,17 +1033,70 @@ async def create_word(
         definition=request.definition,
         sentence=request.sentence,
         difficulty=request.difficulty,
-        order=request.order,
+        order=request.order if request.order is not None else content_service.next_order(db, Word, lesson_id),
         lesson_id=lesson_id
     )
     
     db.add(word)
     db.commit()
+    await response_cache.bump("content", content_service.learning_center_id_for(db, lesson_id=lesson_id))
     db.refresh(word)
     
     return word
 
 
+@router.put("/content/lessons/{lesson_id}/words/order")
+async def reorder_words(
+    lesson_id: int,
+    request: ReorderRequest,
+    current_user = Depends(get_super_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Set the order of all words in a lesson (Super Admin only)"""
+    lesson = db.query(Lesson).filter(
+        Lesson.id == lesson_id,
+        Lesson.deleted_at.is_(None)
+    ).first()
+    
+    if not lesson:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dars topilmadi"
+        )
+    
+    updated = content_service.reorder(db, Word, lesson_id, request.ids)
+    
+    await response_cache.bump("content", content_service.learning_center_id_for(db, lesson_id=lesson_id))
+    
+    return {"message": "So'zlar tartibi yangilandi", "updated": updated}
+
+
+@router.post("/content/words/{word_id}/move")
+async def move_word(
+    word_id: int,
+    request: MoveRequest,
+    current_user = Depends(get_super_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Move a word after another word in its lesson (Super Admin only)"""
+    word = db.query(Word).filter(
+        Word.id == word_id,
+        Word.deleted_at.is_(None)
+    ).first()
+    
+    if not word:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="So'z topilmadi"
+        )
+    
+    updated = content_service.move(db, word, request.after_id)
+    
+    await response_cache.bump("content", content_service.learning_center_id_for(db, word_id=word_id))
+    
+    return {"message": "So'z ko'chirildi", "updated": updated}
+
+
 @router.get("/content/words", response_model=List[WordResponse])
 async def list_all_words(
     lesson_id: Optional[int] = None,
@@ -835,13 +1106,13 @@ async def list_all_words(
     db: Session = Depends(get_db)
 ):
     """List all words (Super Admin only)"""
-    query = db.query(Word).filter(Word.deleted_at.is_(None))
+    query = db.query(*WORD_COLUMNS).filter(Word.deleted_at.is_(None))
     
     if lesson_id:
         query = query.filter(Word.lesson_id == lesson_id)
     
     words = query.order_by(Word.order).offset(skip).limit(limit).all()
-    return words
+    return FastJSONResponse(rows_to_dicts(words))
 
 
 @router.put("/content/words/{word_id}", response_model=WordResponse)
@@ -865,6 +1136,7 @@ async def update_word(
         setattr(word, field, value)
     
     db.commit()
+    await response_cache.bump("content", content_service.learning_center_id_for(db, word_id=word_id))
     db.refresh(word)
     
     return word
@@ -888,6 +1160,7 @@ async def delete_word(
     from sqlalchemy.sql import func
     word.deleted_at = func.now()
     db.commit()
+    await response_cache.bump("content", content_service.learning_center_id_for(db, word_id=word_id))
     
     return {"message": "So'z muvaffaqiyatli o'chirildi"}
 
@@ -914,6 +1187,7 @@ async def upload_word_audio(
     # Update word with audio path
     word.audio = audio_path
     db.commit()
+    await response_cache.bump("content", content_service.learning_center_id_for(db, word_id=word_id))
     
     return {"message": "Audio muvaffaqiyatli yuklandi", "path": audio_path}
 
@@ -940,10 +1214,107 @@ async def upload_word_image(
     # Update word with image path
     word.image = image_path
     db.commit()
+    await response_cache.bump("content", content_service.learning_center_id_for(db, word_id=word_id))
     
     return {"message": "Rasm muvaffaqiyatli yuklandi", "path": image_path}
 
 
+@router.get("/analytics/hardest-words")
+async def get_hardest_words(
+    lesson_id: Optional[int] = None,
+    course_id: Optional[int] = None,
+    learning_center_id: Optional[int] = None,
+    days: Optional[int] = Query(None, ge=1, le=30),
+    min_attempts: int = 10,
+    limit: int = Query(20, ge=1, le=200),
+    current_user = Depends(get_super_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Rank words by error rate per lesson, course or center (Super Admin only)"""
+    return progress_service.hardest_words(
+        db=db,
+        lesson_id=lesson_id,
+        course_id=course_id,
+        learning_center_id=learning_center_id,
+        days=days,
+        min_attempts=min_attempts,
+        limit=limit
+    )
+
+
+@router.get("/coins/reconciliation")
+async def reconcile_coins(
+    learning_center_id: Optional[int] = None,
+    current_user = Depends(get_super_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Report students whose coin balance drifted from the ledger (Super Admin only)"""
+    return user_service.reconcile_coins(db, learning_center_id=learning_center_id)
+
+
+@router.post("/profiles/token")
+async def create_profile_token(
+    minutes: int = Query(15, ge=1, le=24 * 60),
+    current_user = Depends(get_super_admin_user)
+):
+    """Signed X-Debug-Profile header value; requests sending it are profiled (Super Admin only)"""
+    expires_at = int(time.time()) + minutes * 60
+    return {
+        "header": profiling.PROFILE_HEADER,
+        "value": profiling.sign_profile_token(expires_at),
+        "expires_at": datetime.utcfromtimestamp(expires_at).isoformat(),
+    }
+
+
+@router.get("/profiles")
+async def list_profiles(current_user = Depends(get_super_admin_user)):
+    """Recently captured request profiles, newest first (Super Admin only)"""
+    return await profiling.list_profiles()
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, current_user = Depends(get_super_admin_user)):
+    """Profile summary with the SQL statements it executed (Super Admin only)"""
+    profile = await profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profil topilmadi"
+        )
+    profile.pop("stacks")
+    return profile
+
+
+@router.get("/profiles/{profile_id}/collapsed")
+async def download_profile(profile_id: str, current_user = Depends(get_super_admin_user)):
+    """Stack samples in collapsed format, for speedscope or flamegraph.pl (Super Admin only)"""
+    profile = await profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profil topilmadi"
+        )
+    return PlainTextResponse(
+        profiling.collapsed_stacks(profile["stacks"]),
+        headers={"Content-Disposition": f"attachment; filename=profile-{profile_id}.collapsed.txt"}
+    )
+
+
+@router.get("/slow-queries")
+async def list_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    current_user: Principal = Depends(get_super_admin_user)
+):
+    """Slow statements grouped by fingerprint, most total time first (Super Admin only)"""
+    return await slow_query_log.top(limit)
+
+
+@router.delete("/slow-queries")
+async def reset_slow_queries(current_user: Principal = Depends(get_super_admin_user)):
+    """Clear the slow query report, e.g. after deploying a fix (Super Admin only)"""
+    return {"deleted": await slow_query_log.reset()}
+
+
 @router.post("/generate-audio")
 async def generate_audio(
     request: GenerateAudioRequest,
@@ -966,7 +1337,7 @@ async def generate_audio(
             )
         
         # Build URL with voice parameter
-        url = 'https://api.narakeet.com/text-to-speech/m4a'
+        url = '/text-to-speech/m4a'
         if request.voice:
             url += f'?voice={request.voice}'
             
@@ -978,14 +1349,16 @@ async def generate_audio(
                 'Content-Type': 'text/plain',
                 'x-api-key': api_key,
             },
-            'data': request.text.encode('utf8')
+            'content': request.text.encode('utf8')
         }
         
-        response = requests.post(url, **options)
-        logger.info(f"Narakeet response status: {response.status_code}")
-        logger.info(f"Narakeet response headers: {dict(response.headers)}")
-        
-        response.raise_for_status()
+        # Shared async client: a blocking call here would stall the event loop
+        with observe_external("narakeet", "text_to_speech"):
+            response = await get_http_client("narakeet").post(url, **options)
+            logger.info(f"Narakeet response status: {response.status_code}")
+            logger.info(f"Narakeet response headers: {dict(response.headers)}")
+            
+            response.raise_for_status()
         
         logger.info(f"Audio generated successfully, size: {len(response.content)} bytes")
         
@@ -997,12 +1370,12 @@ async def generate_audio(
             }
         )
         
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPStatusError as e:
         logger.error(f"Narakeet HTTP error: {e}")
         logger.error(f"Response status: {e.response.status_code}")
         logger.error(f"Response text: {e.response.text}")
         
-        error_message = f'HTTP error: {e.response.status_code} - {e.response.reason}'
+        error_message = f'HTTP error: {e.response.status_code} - {e.response.reason_phrase}'
         error_details = e.response.text if hasattr(e.response, 'text') else str(e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
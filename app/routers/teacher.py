@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
 
 from ..database import get_db
-from ..dependencies import get_teacher_user
-from ..models import User, Group
+from ..dependencies import Principal, get_teacher_user
+from ..models import Group, GroupStudent
+from ..services import progress_service
+from ..utils.json_response import rows_to_dicts
 
 
 router = APIRouter()
@@ -12,37 +13,59 @@ router = APIRouter()
 
 @router.get("/my-groups")
 async def get_my_groups(
-    current_user: User = Depends(get_teacher_user),
+    current_user: Principal = Depends(get_teacher_user),
     db: Session = Depends(get_db)
 ):
     """Get groups assigned to teacher"""
-    groups = db.query(Group).filter(
+    groups = db.query(*Group.__table__.columns).filter(
         Group.teacher_id == current_user.id,
         Group.deleted_at.is_(None)
     ).all()
     
-    return groups
+    return rows_to_dicts(groups)
 
 
 @router.get("/groups/{group_id}/students")
 async def get_group_students(
     group_id: int,
-    current_user: User = Depends(get_teacher_user),
+    current_user: Principal = Depends(get_teacher_user),
     db: Session = Depends(get_db)
 ):
     """Get students in a group with their progress"""
     # Verify teacher owns this group
     group = db.query(Group).filter(
         Group.id == group_id,
-        Group.teacher_id == current_user.id
+        Group.teacher_id == current_user.id,
+        Group.deleted_at.is_(None)
     ).first()
     
     if not group:
         raise HTTPException(status_code=404, detail="Guruh topilmadi")
     
-    # Get students with progress
-    # Implementation would include joins with progress tables
-    
-    return {"message": "Talabalar va ularning muvaffaqiyatlari"}
+    # Summaries come from the progress aggregates, matrix cells from lesson_progress
+    return progress_service.get_group_progress(db, group)
 
 
+@router.get("/groups/{group_id}/students/{student_id}/activity")
+async def get_student_activity(
+    group_id: int,
+    student_id: int,
+    days: int = Query(365, ge=1, le=365),
+    current_user: Principal = Depends(get_teacher_user),
+    db: Session = Depends(get_db)
+):
+    """Get a group member's daily activity heatmap and streaks"""
+    # Verify teacher owns this group and the student is a member
+    membership = db.query(GroupStudent.id).join(
+        Group, Group.id == GroupStudent.group_id
+    ).filter(
+        GroupStudent.group_id == group_id,
+        GroupStudent.student_id == student_id,
+        Group.teacher_id == current_user.id,
+        Group.deleted_at.is_(None)
+    ).first()
+    
+    if not membership:
+        raise HTTPException(status_code=404, detail="O'quvchi guruhda topilmadi")
+    
+    return progress_service.get_activity(db, student_id, days=days)
@@ -2,10 +2,16 @@ from .auth_service import auth_service
 from .sms_service import sms_service
 from .storage_service import storage_service
 from .user_service import user_service
+from .content_service import content_service
+from .progress_service import progress_service
+from .usage_service import usage_service
 
 __all__ = [
     "auth_service",
-    "sms_service", 
+    "sms_service",
     "storage_service",
     "user_service",
-]
\ No newline at end of file
+    "content_service",
+    "progress_service",
+    "usage_service",
+]
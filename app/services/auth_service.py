@@ -5,16 +5,21 @@ from datetime import datetime, timedelta
 from typing import Optional, Tuple
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+import redis.asyncio as redis
 
 from ..config import settings
 from ..database import get_redis
-from ..models import User, OtpRequest
+from ..models import User, UserRole, LearningCenter, OtpRequest
 from .sms_service import sms_service
 
 
 class AuthService:
-    def __init__(self):
-        self.redis = get_redis()
+    # How long token versions and center payment flags are trusted from Redis
+    CLAIMS_CACHE_TTL = 300
+
+    @property
+    def redis(self):
+        return get_redis()
 
 
     async def send_verification_code(self, phone: str, learning_center_id: int, client_ip: str, db: Session) -> bool:
@@ -131,8 +136,8 @@ class AuthService:
         await self.redis.delete(key)
         
         # Generate tokens
-        access_token = self._create_access_token(user.id)
-        refresh_token = self._create_refresh_token(user.id)
+        access_token = self._create_user_access_token(user)
+        refresh_token = self._create_refresh_token(user.id, user.token_version)
         
         return user, access_token, refresh_token
     
@@ -146,6 +151,7 @@ class AuthService:
             )
             user_id: int = int(payload.get("sub"))
             token_type: str = payload.get("type")
+            token_version: int = payload.get("ver", 0)
             
             if token_type != "refresh":
                 raise HTTPException(
@@ -160,7 +166,13 @@ class AuthService:
                     detail="User not found"
                 )
             
-            return self._create_access_token(user.id)
+            if token_version != user.token_version:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Token has been revoked"
+                )
+            
+            return self._create_user_access_token(user)
             
         except jwt.PyJWTError:
             raise HTTPException(
@@ -168,11 +180,90 @@ class AuthService:
                 detail="Invalid refresh token"
             )
     
+    async def check_token_claims(
+        self,
+        user_id: int,
+        learning_center_id: int,
+        token_version: int,
+        db: Session
+    ) -> None:
+        """Check that signed claims are still current, querying the database only on a cache miss"""
+        version_key = f"auth:token_version:{user_id}"
+        paid_key = f"auth:center_paid:{learning_center_id}"
+        
+        try:
+            cached_version, cached_paid = await self.redis.mget(version_key, paid_key)
+        except redis.RedisError:
+            cached_version, cached_paid = None, None
+        
+        to_cache = {}
+        if cached_version is None:
+            user = db.query(User.token_version).filter(
+                User.id == user_id,
+                User.is_active == True
+            ).first()
+            # -1 never matches a signed version, so inactive users are rejected
+            cached_version = str(user.token_version) if user else "-1"
+            to_cache[version_key] = cached_version
+        
+        if cached_paid is None:
+            center = db.query(LearningCenter.is_paid).filter(
+                LearningCenter.id == learning_center_id
+            ).first()
+            cached_paid = "1" if center and center.is_paid else "0"
+            to_cache[paid_key] = cached_paid
+        
+        if to_cache:
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for key, value in to_cache.items():
+                        pipe.setex(key, self.CLAIMS_CACHE_TTL, value)
+                    await pipe.execute()
+            except redis.RedisError:
+                pass
+        
+        if int(cached_version) != token_version:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
+        if cached_paid != "1":
+            raise HTTPException(
+                status_code=status.HTTP_402_PAYMENT_REQUIRED,
+                detail="Learning center subscription expired"
+            )
+    
+    def revoke_user_tokens(self, user: User) -> None:
+        """Invalidate all tokens issued to user (takes effect on commit)"""
+        user.token_version = (user.token_version or 0) + 1
+    
+    async def forget_user_claims(self, user_id: int) -> None:
+        """Drop cached token version after the user row was committed"""
+        try:
+            await self.redis.delete(f"auth:token_version:{user_id}")
+        except redis.RedisError:
+            pass
+    
+    async def forget_center_claims(self, learning_center_id: int) -> None:
+        """Drop cached payment flag after the learning center row was committed"""
+        try:
+            await self.redis.delete(f"auth:center_paid:{learning_center_id}")
+        except redis.RedisError:
+            pass
+    
     def _generate_verification_code(self) -> str:
         """Generate 6-digit verification code"""
         return ''.join(random.choices(string.digits, k=6))
     
-    def _create_access_token(self, user_id: int) -> str:
+    def _create_access_token(
+        self,
+        user_id: int,
+        role: Optional[str] = None,
+        learning_center_id: Optional[int] = None,
+        token_version: int = 0
+    ) -> str:
         """Create JWT access token"""
         expire = datetime.utcnow() + timedelta(days=settings.ACCESS_TOKEN_EXPIRE_DAYS)
         payload = {
@@ -180,14 +271,32 @@ class AuthService:
             "type": "access",
             "exp": expire
         }
+        if role is not None:
+            # Role and tenant claims let dependencies authorize without loading the user
+            payload.update({
+                "role": role,
+                "lc": learning_center_id,
+                "ver": token_version
+            })
         return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     
-    def _create_refresh_token(self, user_id: int) -> str:
+    def _create_user_access_token(self, user: User) -> str:
+        """Create JWT access token carrying the user's role and tenant claims"""
+        role = user.role.value if isinstance(user.role, UserRole) else user.role
+        return self._create_access_token(
+            user.id,
+            role=role,
+            learning_center_id=user.learning_center_id,
+            token_version=user.token_version or 0
+        )
+    
+    def _create_refresh_token(self, user_id: int, token_version: int = 0) -> str:
         """Create JWT refresh token"""
         expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
         payload = {
             "sub": str(user_id),  # Convert to string for JWT compliance
             "type": "refresh", 
+            "ver": token_version,
             "exp": expire
         }
         return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
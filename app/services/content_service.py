@@ -0,0 +1,430 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import insert, update
+from sqlalchemy.sql import func
+from fastapi import HTTPException, status
+
+from ..models import Course, Lesson, Word, WordDifficulty
+
+
+LESSON_FIELDS = ("title", "content")
+WORD_FIELDS = ("word", "translation", "definition", "sentence", "difficulty")
+
+# Spacing between consecutive order keys; leaves room to move an item
+# between two neighbours by updating only that item
+ORDER_GAP = 1024
+
+
+class ContentService:
+
+    def import_course_tree(
+        self,
+        db: Session,
+        course_id: int,
+        lessons: List[dict],
+        prune: bool = False
+    ) -> dict:
+        """Upsert a whole course (lessons with their words) in one transaction
+        
+        Lessons are matched by id, then by title; words are matched by id, then
+        by word text within their lesson. Only rows whose fields or position
+        changed are written, using multi-row INSERTs and executemany UPDATEs.
+        With ``prune`` set, existing lessons and words missing from the payload
+        are soft-deleted.
+        """
+        # Reject repeats before matching: they would resolve to the same row
+        # and be written twice
+        self._raise_on_duplicates(self._payload_duplicates(lessons))
+        
+        stats = {
+            "lessons_created": 0, "lessons_updated": 0, "lessons_deleted": 0,
+            "words_created": 0, "words_updated": 0, "words_deleted": 0,
+        }
+        
+        existing_lessons = db.query(Lesson).filter(
+            Lesson.course_id == course_id,
+            Lesson.deleted_at.is_(None)
+        ).all()
+        lessons_by_id = {lesson.id: lesson for lesson in existing_lessons}
+        lessons_by_title = {lesson.title: lesson for lesson in existing_lessons}
+        
+        existing_words = db.query(Word).filter(
+            Word.lesson_id.in_(list(lessons_by_id)),
+            Word.deleted_at.is_(None)
+        ).all() if lessons_by_id else []
+        words_by_id = {word.id: word for word in existing_words}
+        words_by_key = {(word.lesson_id, word.word): word for word in existing_words}
+        
+        # Match payload lessons against existing rows
+        lesson_updates = []
+        new_lessons = []
+        matched_lessons: Dict[int, Lesson] = {}
+        lesson_positions: Dict[int, int] = {}
+        duplicates = []
+        for position, item in enumerate(lessons, start=1):
+            if item.get("id") is not None:
+                lesson = lessons_by_id.get(item["id"])
+                if lesson is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Dars {item['id']} ushbu kursga tegishli emas"
+                    )
+            else:
+                lesson = lessons_by_title.get(item["title"])
+            
+            values = {field: item.get(field) for field in LESSON_FIELDS}
+            values["order"] = position * ORDER_GAP
+            
+            if lesson is None:
+                new_lessons.append((position, dict(values, course_id=course_id)))
+                continue
+            
+            # One item by id and another by title can still reach the same row
+            if lesson.id in lesson_positions:
+                duplicates.append({
+                    "lesson": position,
+                    "duplicate_of": lesson_positions[lesson.id],
+                    "id": lesson.id,
+                })
+                continue
+            lesson_positions[lesson.id] = position
+            
+            matched_lessons[position] = lesson
+            changes = self._changed_fields(lesson, values)
+            if changes:
+                lesson_updates.append(dict(changes, id=lesson.id))
+        
+        self._raise_on_duplicates(duplicates)
+        
+        # Insert new lessons first so their words have a lesson_id
+        if new_lessons:
+            inserted_ids = db.execute(
+                insert(Lesson).returning(Lesson.id, sort_by_parameter_order=True),
+                [values for _, values in new_lessons]
+            ).scalars().all()
+            lesson_ids = {
+                position: lesson_id
+                for (position, _), lesson_id in zip(new_lessons, inserted_ids)
+            }
+            stats["lessons_created"] = len(new_lessons)
+        else:
+            lesson_ids = {}
+        lesson_ids.update({position: lesson.id for position, lesson in matched_lessons.items()})
+        
+        if lesson_updates:
+            db.execute(update(Lesson), lesson_updates)
+            stats["lessons_updated"] = len(lesson_updates)
+        
+        # Match payload words against existing rows
+        word_updates = []
+        new_words = []
+        word_positions: Dict[int, Tuple[int, int]] = {}
+        for position, item in enumerate(lessons, start=1):
+            lesson_id = lesson_ids[position]
+            for word_position, word_item in enumerate(item.get("words") or [], start=1):
+                if word_item.get("id") is not None:
+                    word = words_by_id.get(word_item["id"])
+                    if word is None:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"So'z {word_item['id']} ushbu kursga tegishli emas"
+                        )
+                else:
+                    word = words_by_key.get((lesson_id, word_item["word"]))
+                
+                values = {field: word_item.get(field) for field in WORD_FIELDS}
+                values["order"] = word_position * ORDER_GAP
+                values["lesson_id"] = lesson_id
+                
+                if word is None:
+                    new_words.append(values)
+                    continue
+                
+                if word.id in word_positions:
+                    first_lesson, first_word = word_positions[word.id]
+                    duplicates.append({
+                        "lesson": position,
+                        "word": word_position,
+                        "duplicate_of": {"lesson": first_lesson, "word": first_word},
+                        "id": word.id,
+                    })
+                    continue
+                word_positions[word.id] = (position, word_position)
+                
+                changes = self._changed_fields(word, values)
+                if changes:
+                    word_updates.append(dict(changes, id=word.id))
+        
+        self._raise_on_duplicates(duplicates)
+        
+        if new_words:
+            db.execute(insert(Word), new_words)
+            stats["words_created"] = len(new_words)
+        
+        if word_updates:
+            db.execute(update(Word), word_updates)
+            stats["words_updated"] = len(word_updates)
+        
+        if prune:
+            kept_lesson_ids = {lesson.id for lesson in matched_lessons.values()}
+            stale_lesson_ids = [i for i in lessons_by_id if i not in kept_lesson_ids]
+            stale_word_ids = [i for i in words_by_id if i not in word_positions]
+            
+            if stale_lesson_ids:
+                stats["lessons_deleted"] = db.query(Lesson).filter(
+                    Lesson.id.in_(stale_lesson_ids)
+                ).update({Lesson.deleted_at: func.now()}, synchronize_session=False)
+            
+            if stale_word_ids:
+                stats["words_deleted"] = db.query(Word).filter(
+                    Word.id.in_(stale_word_ids)
+                ).update({Word.deleted_at: func.now()}, synchronize_session=False)
+        
+        db.commit()
+        
+        return stats
+    
+    def learning_center_id_for(
+        self,
+        db: Session,
+        course_id: Optional[int] = None,
+        lesson_id: Optional[int] = None,
+        word_id: Optional[int] = None
+    ) -> Optional[int]:
+        """Center that owns a course, lesson or word (for cache invalidation)"""
+        query = db.query(Course.learning_center_id)
+        if course_id is not None:
+            query = query.filter(Course.id == course_id)
+        elif lesson_id is not None:
+            query = query.join(Lesson, Lesson.course_id == Course.id).filter(Lesson.id == lesson_id)
+        else:
+            query = query.join(Lesson, Lesson.course_id == Course.id).join(
+                Word, Word.lesson_id == Lesson.id
+            ).filter(Word.id == word_id)
+        return query.scalar()
+    
+    def next_order(self, db: Session, model, parent_id: int) -> int:
+        """Order key that appends a new lesson/word after its last sibling"""
+        parent_column = self._parent_column(model)
+        last_order = db.query(func.max(model.order)).filter(
+            parent_column == parent_id,
+            model.deleted_at.is_(None)
+        ).scalar()
+        return (last_order or 0) + ORDER_GAP
+    
+    def reorder(self, db: Session, model, parent_id: int, ordered_ids: List[int]) -> int:
+        """Apply a full ordered id list for a course's lessons or a lesson's words
+        
+        Keys are re-spaced by ORDER_GAP and only rows whose key changed are
+        updated, in one executemany UPDATE. Returns the number of rows updated.
+        """
+        parent_column = self._parent_column(model)
+        current = dict(db.query(model.id, model.order).filter(
+            parent_column == parent_id,
+            model.deleted_at.is_(None)
+        ).all())
+        
+        if len(ordered_ids) != len(set(ordered_ids)) or set(ordered_ids) != set(current):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Tartib ro'yxati barcha elementlarni bir martadan o'z ichiga olishi kerak"
+            )
+        
+        updates = [
+            {"id": item_id, "order": position * ORDER_GAP}
+            for position, item_id in enumerate(ordered_ids, start=1)
+            if current[item_id] != position * ORDER_GAP
+        ]
+        if updates:
+            db.execute(update(model), updates)
+        db.commit()
+        
+        return len(updates)
+    
+    def move(self, db: Session, item, after_id: Optional[int] = None) -> int:
+        """Move a lesson/word right after ``after_id`` (or to the front when None)
+        
+        The item gets the midpoint between its new neighbours, so normally only
+        this one row is written. When two neighbours have no free key between
+        them the siblings are re-spaced. Returns the number of rows updated.
+        """
+        model = type(item)
+        parent_column = self._parent_column(model)
+        parent_id = getattr(item, parent_column.key)
+        siblings = db.query(model.id, model.order).filter(
+            parent_column == parent_id,
+            model.deleted_at.is_(None),
+            model.id != item.id
+        )
+        
+        if after_id is None:
+            previous_order = None
+        else:
+            previous = siblings.filter(model.id == after_id).first()
+            if previous is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Element {after_id} topilmadi"
+                )
+            previous_order = previous.order
+        
+        following = siblings
+        if previous_order is not None:
+            following = following.filter(model.order > previous_order)
+        following = following.order_by(model.order).first()
+        
+        if previous_order is None and following is None:
+            return 0
+        if previous_order is None:
+            new_order = following.order - ORDER_GAP
+        elif following is None:
+            new_order = previous_order + ORDER_GAP
+        elif following.order - previous_order >= 2:
+            new_order = (previous_order + following.order) // 2
+        else:
+            # No room left between neighbours: re-space the whole list
+            ordered_ids = [row.id for row in siblings.order_by(model.order, model.id)]
+            position = ordered_ids.index(after_id) + 1
+            ordered_ids.insert(position, item.id)
+            return self.reorder(db, model, parent_id, ordered_ids)
+        
+        item.order = new_order
+        db.commit()
+        
+        return 1
+    
+    def _parent_column(self, model):
+        return Lesson.course_id if model is Lesson else Word.lesson_id
+    
+    def lessons_from_rows(self, rows: Iterable[Tuple[int, Dict[str, str]]]) -> List[dict]:
+        """Group flat spreadsheet rows into the course tree accepted by import_course_tree
+        
+        Expected columns: lesson, lesson_content, word, translation, definition,
+        sentence, difficulty. Lessons keep the order of their first row.
+        """
+        lessons: Dict[str, dict] = {}
+        word_rows: Dict[Tuple[str, str], int] = {}
+        duplicates = []
+        for row_number, row in rows:
+            title = row.get("lesson", "")
+            if not title:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"{row_number}-qator: dars nomi ko'rsatilmagan"
+                )
+            
+            lesson = lessons.setdefault(title, {"title": title, "content": None, "words": []})
+            if row.get("lesson_content"):
+                lesson["content"] = row["lesson_content"]
+            
+            if not row.get("word"):
+                continue
+            
+            if not row.get("translation"):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"{row_number}-qator: tarjima ko'rsatilmagan"
+                )
+            
+            try:
+                difficulty = WordDifficulty((row.get("difficulty") or "easy").lower())
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"{row_number}-qator: noto'g'ri qiyinlik darajasi"
+                )
+            
+            # Rows of one lesson are grouped by title; a word may appear once per lesson
+            key = (title, row["word"])
+            if key in word_rows:
+                duplicates.append({
+                    "row": row_number,
+                    "duplicate_of": word_rows[key],
+                    "lesson": title,
+                    "word": row["word"],
+                })
+                continue
+            word_rows[key] = row_number
+            
+            lesson["words"].append({
+                "word": row["word"],
+                "translation": row["translation"],
+                "definition": row.get("definition") or None,
+                "sentence": row.get("sentence") or None,
+                "difficulty": difficulty,
+            })
+        
+        self._raise_on_duplicates(duplicates)
+        
+        return list(lessons.values())
+    
+    def _payload_duplicates(self, lessons: List[dict]) -> List[dict]:
+        """Lessons repeated by id or title, and words repeated by id or text within a lesson
+        
+        Positions are 1-based, as in the payload's lesson and word lists.
+        """
+        duplicates = []
+        seen_lessons: Dict[Tuple[str, object], int] = {}
+        seen_word_ids: Dict[int, Tuple[int, int]] = {}
+        for position, item in enumerate(lessons, start=1):
+            for field in ("id", "title"):
+                value = item.get(field)
+                if value is None:
+                    continue
+                if (field, value) in seen_lessons:
+                    duplicates.append({
+                        "lesson": position,
+                        "duplicate_of": seen_lessons[(field, value)],
+                        field: value,
+                    })
+                else:
+                    seen_lessons[(field, value)] = position
+            
+            seen_words: Dict[str, int] = {}
+            for word_position, word_item in enumerate(item.get("words") or [], start=1):
+                word_id = word_item.get("id")
+                if word_id is not None:
+                    if word_id in seen_word_ids:
+                        first_lesson, first_word = seen_word_ids[word_id]
+                        duplicates.append({
+                            "lesson": position,
+                            "word": word_position,
+                            "duplicate_of": {"lesson": first_lesson, "word": first_word},
+                            "id": word_id,
+                        })
+                    else:
+                        seen_word_ids[word_id] = (position, word_position)
+                
+                text = word_item["word"]
+                if text in seen_words:
+                    duplicates.append({
+                        "lesson": position,
+                        "word": word_position,
+                        "duplicate_of": {"lesson": position, "word": seen_words[text]},
+                        "text": text,
+                    })
+                else:
+                    seen_words[text] = word_position
+        
+        return duplicates
+    
+    def _raise_on_duplicates(self, duplicates: List[dict]) -> None:
+        if duplicates:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "message": "Importda takrorlangan darslar yoki so'zlar bor",
+                    "duplicates": duplicates,
+                }
+            )
+    
+    def _changed_fields(self, obj, values: dict) -> dict:
+        return {
+            field: value
+            for field, value in values.items()
+            if getattr(obj, field) != value
+        }
+
+
+# Singleton instance
+content_service = ContentService()
@@ -0,0 +1,909 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, insert, select
+from fastapi import HTTPException, status
+
+from ..models import User, Course, Lesson, Word, Group, GroupStudent, LessonProgress, WordHistory
+from ..models import CoinTransaction, CoinIdempotencyKey, TransactionType
+from ..models import GroupLessonStats, StudentCourseStats, WordStats, WordDailyStats, StudentStats
+from ..utils.sql import dialect_insert
+from .user_service import user_service
+
+
+# Slots in the per-student activity ring: one year plus today
+ACTIVITY_DAYS = 366
+ACTIVITY_MAX = 255
+
+# Longest rolling window of hardest_words; older daily counters are pruned
+HARDEST_WORDS_MAX_DAYS = 30
+
+
+class ProgressService:
+
+    def record_lesson_completion(
+        self,
+        db: Session,
+        student_id: int,
+        lesson_id: int,
+        score: int,
+        idempotency_key: Optional[str] = None
+    ) -> LessonProgress:
+        """Record a lesson completion and update the progress aggregates
+        
+        Coins are awarded for improvements over the previous best score. The
+        per-(student, course) and per-(group, lesson) aggregates are updated with
+        atomic upserts in the same transaction. A completion whose
+        ``idempotency_key`` is already in the coin ledger is not applied again.
+        """
+        lesson = db.query(Lesson.id, Lesson.course_id).filter(
+            Lesson.id == lesson_id,
+            Lesson.deleted_at.is_(None)
+        ).first()
+        
+        if not lesson:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Lesson not found"
+            )
+        
+        progress = db.query(LessonProgress).filter(
+            LessonProgress.student_id == student_id,
+            LessonProgress.lesson_id == lesson_id
+        ).first()
+        
+        if idempotency_key and self._is_applied(db, student_id, idempotency_key):
+            return progress
+        
+        now = datetime.utcnow()
+        improvement = 0
+        first_completion = progress is None
+        
+        if first_completion:
+            progress = LessonProgress(
+                student_id=student_id,
+                lesson_id=lesson_id,
+                best_score=score,
+                lesson_attempts=1,
+                completed_at=now
+            )
+            db.add(progress)
+            score_delta = score
+        else:
+            progress.lesson_attempts += 1
+            score_delta = max(score - progress.best_score, 0)
+            if score_delta:
+                # Award coins for improvement
+                improvement = score_delta
+                progress.best_score = score
+        
+        self._update_aggregates(
+            db,
+            student_id=student_id,
+            lesson_id=lesson_id,
+            course_id=lesson.course_id,
+            completed=1 if first_completion else 0,
+            score_delta=score_delta,
+            at=now
+        )
+        self._bump_student_stats(
+            db,
+            student_id=student_id,
+            at=now,
+            lessons_completed=1 if first_completion else 0,
+            lesson_attempts=1,
+            score_delta=score_delta,
+            coins=improvement
+        )
+        
+        # Keyed completions always get a ledger entry (possibly of 0 coins) so
+        # that a retry is recognised even when nothing was awarded
+        if improvement or idempotency_key:
+            _, created = user_service.apply_coin_transaction(
+                db,
+                student_id=student_id,
+                amount=improvement,
+                transaction_type=TransactionType.LESSON_SCORE,
+                lesson_id=lesson_id,
+                description=f"Lesson score: {improvement} points",
+                idempotency_key=idempotency_key,
+                commit=False
+            )
+            if not created:
+                # A concurrent retry won the ledger insert; discard this attempt
+                db.rollback()
+                return db.query(LessonProgress).filter(
+                    LessonProgress.student_id == student_id,
+                    LessonProgress.lesson_id == lesson_id
+                ).first()
+        
+        db.commit()
+        
+        return progress
+    
+    def record_word_attempts(
+        self,
+        db: Session,
+        student_id: int,
+        learning_center_id: int,
+        attempts: List[dict]
+    ) -> int:
+        """Store a batch of word attempts and bump the per-word counters
+        
+        Attempts for words outside the student's learning center are rejected.
+        History rows go in with one multi-row INSERT; lifetime and daily
+        counters are incremented with one upsert each.
+        """
+        word_ids = {attempt["word_id"] for attempt in attempts}
+        valid_ids = {
+            word_id for (word_id,) in db.query(Word.id).join(
+                Lesson, Lesson.id == Word.lesson_id
+            ).join(
+                Course, Course.id == Lesson.course_id
+            ).filter(
+                Word.id.in_(word_ids),
+                Word.deleted_at.is_(None),
+                Course.learning_center_id == learning_center_id
+            )
+        }
+        
+        unknown_ids = word_ids - valid_ids
+        if unknown_ids:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Words not found: {sorted(unknown_ids)}"
+            )
+        
+        now = datetime.utcnow()
+        history = []
+        totals = defaultdict(lambda: [0, 0])
+        daily = defaultdict(lambda: [0, 0])
+        for attempt in attempts:
+            attempted_at = now
+            correct = 1 if attempt["is_correct"] else 0
+            history.append({
+                "student_id": student_id,
+                "word_id": attempt["word_id"],
+                "is_correct": bool(correct),
+                "attempted_at": attempted_at,
+            })
+            totals[attempt["word_id"]][0] += 1
+            totals[attempt["word_id"]][1] += correct
+            daily[(attempt["word_id"], attempted_at.date())][0] += 1
+            daily[(attempt["word_id"], attempted_at.date())][1] += correct
+        
+        if not history:
+            return 0
+        
+        db.execute(insert(WordHistory), history)
+        
+        stmt = dialect_insert(db, WordStats).values([
+            {
+                "word_id": word_id,
+                "attempts": counts[0],
+                "correct": counts[1],
+                "last_attempt_at": now,
+            }
+            for word_id, counts in totals.items()
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["word_id"],
+            set_={
+                "attempts": WordStats.attempts + stmt.excluded.attempts,
+                "correct": WordStats.correct + stmt.excluded.correct,
+                "last_attempt_at": stmt.excluded.last_attempt_at,
+            }
+        ))
+        
+        stmt = dialect_insert(db, WordDailyStats).values([
+            {"word_id": word_id, "day": day, "attempts": counts[0], "correct": counts[1]}
+            for (word_id, day), counts in daily.items()
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["word_id", "day"],
+            set_={
+                "attempts": WordDailyStats.attempts + stmt.excluded.attempts,
+                "correct": WordDailyStats.correct + stmt.excluded.correct,
+            }
+        ))
+        
+        self._bump_student_stats(
+            db,
+            student_id=student_id,
+            at=now,
+            words_attempted=len(history),
+            words_correct=sum(counts[1] for counts in totals.values())
+        )
+        
+        db.commit()
+        
+        return len(history)
+    
+    def get_student_stats(self, db: Session, student_id: int) -> dict:
+        """Summary for the student dashboard, read from a single student_stats row
+        
+        Students without a row yet get the same figures computed from the
+        progress, history and ledger tables.
+        """
+        row = db.query(User.coins, StudentStats).outerjoin(
+            StudentStats, StudentStats.student_id == User.id
+        ).filter(User.id == student_id).first()
+        
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Student not found"
+            )
+        
+        total_coins, stats = row
+        if stats is None:
+            # Not backfilled yet (see app.jobs.rebuild_progress_stats): count live
+            computed = self._compute_student_stats(db, only_student_id=student_id)
+            stats = StudentStats(**computed[0]) if computed else StudentStats(student_id=student_id)
+        
+        today = datetime.utcnow().date()
+        lessons_completed = stats.lessons_completed or 0
+        words_attempted = stats.words_attempted or 0
+        
+        # Counters are only touched on activity, so stale windows read as zero
+        streak_alive = (
+            stats.last_active_date is not None
+            and stats.last_active_date >= today - timedelta(days=1)
+        )
+        
+        return {
+            "total_coins": total_coins,
+            "coins_earned": stats.coins_earned or 0,
+            "coins_this_week": (
+                stats.coins_this_week if stats.week_start == self._week_start(today) else 0
+            ),
+            "lessons_completed": lessons_completed,
+            "lesson_attempts": stats.lesson_attempts or 0,
+            "average_score": round(stats.score_sum / lessons_completed) if lessons_completed else 0,
+            "words_attempted": words_attempted,
+            "words_correct": stats.words_correct or 0,
+            "accuracy": round(stats.words_correct / words_attempted, 4) if words_attempted else 0,
+            "current_streak": stats.current_streak if streak_alive else 0,
+            "longest_streak": stats.longest_streak or 0,
+            "last_active_date": stats.last_active_date.isoformat() if stats.last_active_date else None,
+        }
+    
+    def get_activity(self, db: Session, student_id: int, days: int = 365) -> dict:
+        """Daily activity counts for the last ``days`` days (oldest first) plus streaks"""
+        row = db.query(
+            StudentStats.activity,
+            StudentStats.last_active_date,
+            StudentStats.current_streak,
+            StudentStats.longest_streak
+        ).filter(StudentStats.student_id == student_id).first()
+        if row is None:
+            computed = self._compute_student_stats(db, only_student_id=student_id)
+            row = StudentStats(**computed[0]) if computed else None
+        
+        today = datetime.utcnow().date()
+        start = today - timedelta(days=days - 1)
+        activity = row.activity if row else None
+        last_active_date = row.last_active_date if row else None
+        
+        counts = [
+            self._activity_count(activity, last_active_date, start + timedelta(days=offset))
+            for offset in range(days)
+        ]
+        
+        streak_alive = last_active_date is not None and last_active_date >= today - timedelta(days=1)
+        
+        return {
+            "start_date": start.isoformat(),
+            "end_date": today.isoformat(),
+            "counts": counts,
+            "active_days": sum(1 for count in counts if count),
+            "current_streak": row.current_streak if row and streak_alive else 0,
+            "longest_streak": row.longest_streak if row else 0,
+        }
+    
+    def get_lesson_progress_page(
+        self,
+        db: Session,
+        student_id: int,
+        skip: int = 0,
+        limit: int = 50
+    ) -> List[dict]:
+        """One page of a student's lesson progress, most recently updated first"""
+        rows = db.query(
+            LessonProgress.lesson_id,
+            Lesson.title,
+            Lesson.course_id,
+            LessonProgress.best_score,
+            LessonProgress.lesson_attempts,
+            LessonProgress.completed_at,
+            LessonProgress.updated_at
+        ).join(
+            Lesson, Lesson.id == LessonProgress.lesson_id
+        ).filter(
+            LessonProgress.student_id == student_id
+        ).order_by(
+            LessonProgress.updated_at.desc(), LessonProgress.id.desc()
+        ).offset(skip).limit(limit).all()
+        
+        return [
+            {
+                "lesson_id": row.lesson_id,
+                "lesson_title": row.title,
+                "course_id": row.course_id,
+                "best_score": row.best_score,
+                "attempts": row.lesson_attempts,
+                "completed_at": self._format_datetime(row.completed_at),
+                "updated_at": self._format_datetime(row.updated_at),
+            }
+            for row in rows
+        ]
+    
+    def hardest_words(
+        self,
+        db: Session,
+        lesson_id: Optional[int] = None,
+        course_id: Optional[int] = None,
+        learning_center_id: Optional[int] = None,
+        days: Optional[int] = None,
+        min_attempts: int = 10,
+        limit: int = 20
+    ) -> List[dict]:
+        """Rank words by error rate from the counters, never touching word_history
+        
+        ``days`` selects a rolling window (summed from word_daily_stats);
+        without it the lifetime counters are used.
+        """
+        if days:
+            since = datetime.utcnow().date() - timedelta(days=days - 1)
+            counters = select(
+                WordDailyStats.word_id.label("word_id"),
+                func.sum(WordDailyStats.attempts).label("attempts"),
+                func.sum(WordDailyStats.correct).label("correct")
+            ).where(
+                WordDailyStats.day >= since
+            ).group_by(WordDailyStats.word_id).subquery()
+        else:
+            counters = select(
+                WordStats.word_id.label("word_id"),
+                WordStats.attempts.label("attempts"),
+                WordStats.correct.label("correct")
+            ).subquery()
+        
+        error_rate = 1.0 - counters.c.correct * 1.0 / counters.c.attempts
+        
+        query = db.query(
+            Word.id,
+            Word.word,
+            Word.translation,
+            Word.difficulty,
+            Word.lesson_id,
+            Lesson.course_id,
+            counters.c.attempts,
+            counters.c.correct,
+            error_rate.label("error_rate")
+        ).join(
+            counters, counters.c.word_id == Word.id
+        ).join(
+            Lesson, Lesson.id == Word.lesson_id
+        ).filter(
+            Word.deleted_at.is_(None),
+            counters.c.attempts >= min_attempts
+        )
+        
+        if lesson_id:
+            query = query.filter(Word.lesson_id == lesson_id)
+        if course_id:
+            query = query.filter(Lesson.course_id == course_id)
+        if learning_center_id:
+            query = query.join(Course, Course.id == Lesson.course_id).filter(
+                Course.learning_center_id == learning_center_id
+            )
+        
+        rows = query.order_by(error_rate.desc(), counters.c.attempts.desc()).limit(limit).all()
+        
+        return [
+            {
+                "word_id": row.id,
+                "word": row.word,
+                "translation": row.translation,
+                "difficulty": row.difficulty,
+                "lesson_id": row.lesson_id,
+                "course_id": row.course_id,
+                "attempts": row.attempts,
+                "correct": row.correct,
+                "error_rate": round(row.error_rate, 4),
+            }
+            for row in rows
+        ]
+    
+    def prune_word_daily_stats(self, db: Session, keep_days: int = HARDEST_WORDS_MAX_DAYS) -> int:
+        """Delete daily word counters older than the longest rolling window; the caller commits"""
+        cutoff = datetime.utcnow().date() - timedelta(days=keep_days)
+        return db.query(WordDailyStats).filter(
+            WordDailyStats.day < cutoff
+        ).delete(synchronize_session=False)
+    
+    def get_group_progress(self, db: Session, group: Group) -> dict:
+        """Student x lesson progress matrix for a group
+        
+        Per-lesson and per-student summaries come from the aggregates; the
+        matrix cells are the students' lesson_progress rows for this course.
+        """
+        lessons = db.query(
+            Lesson.id,
+            Lesson.title,
+            Lesson.order,
+            GroupLessonStats.students_completed,
+            GroupLessonStats.total_attempts,
+            GroupLessonStats.score_sum
+        ).outerjoin(
+            GroupLessonStats,
+            and_(
+                GroupLessonStats.lesson_id == Lesson.id,
+                GroupLessonStats.group_id == group.id
+            )
+        ).filter(
+            Lesson.course_id == group.course_id,
+            Lesson.deleted_at.is_(None)
+        ).order_by(Lesson.order).all()
+        
+        lesson_ids = [lesson.id for lesson in lessons]
+        
+        # One row per (student, touched lesson); students without progress get one row of NULLs
+        rows = db.query(
+            User.id,
+            User.name,
+            User.phone,
+            User.coins,
+            StudentCourseStats.lessons_completed,
+            StudentCourseStats.total_attempts,
+            StudentCourseStats.score_sum,
+            StudentCourseStats.last_activity_at,
+            LessonProgress.lesson_id,
+            LessonProgress.best_score,
+            LessonProgress.lesson_attempts,
+            LessonProgress.completed_at
+        ).select_from(GroupStudent).join(
+            User, User.id == GroupStudent.student_id
+        ).outerjoin(
+            StudentCourseStats,
+            and_(
+                StudentCourseStats.student_id == User.id,
+                StudentCourseStats.course_id == group.course_id
+            )
+        ).outerjoin(
+            LessonProgress,
+            and_(
+                LessonProgress.student_id == User.id,
+                LessonProgress.lesson_id.in_(lesson_ids)
+            )
+        ).filter(
+            GroupStudent.group_id == group.id,
+            User.is_active == True,
+            User.deleted_at.is_(None)
+        ).order_by(User.name, User.id).all()
+        
+        students = {}
+        for row in rows:
+            student = students.get(row.id)
+            if student is None:
+                completed = row.lessons_completed or 0
+                student = students[row.id] = {
+                    "id": row.id,
+                    "name": row.name,
+                    "phone": row.phone,
+                    "coins": row.coins,
+                    "progress": {
+                        "completed_lessons": completed,
+                        "total_lessons": len(lessons),
+                        "average_score": round(row.score_sum / completed) if completed else 0,
+                        "total_attempts": row.total_attempts or 0,
+                        "last_activity": self._format_datetime(row.last_activity_at),
+                    },
+                    "lessons": [],
+                }
+            if row.lesson_id is not None:
+                student["lessons"].append({
+                    "lesson_id": row.lesson_id,
+                    "best_score": row.best_score,
+                    "attempts": row.lesson_attempts,
+                    "completed_at": self._format_datetime(row.completed_at),
+                })
+        
+        return {
+            "group": {
+                "id": group.id,
+                "name": group.name,
+                "course_id": group.course_id,
+                "student_count": len(students),
+            },
+            "lessons": [
+                {
+                    "id": lesson.id,
+                    "title": lesson.title,
+                    "order": lesson.order,
+                    "students_completed": lesson.students_completed or 0,
+                    "total_attempts": lesson.total_attempts or 0,
+                    "average_score": (
+                        round(lesson.score_sum / lesson.students_completed)
+                        if lesson.students_completed else 0
+                    ),
+                }
+                for lesson in lessons
+            ],
+            "students": list(students.values()),
+        }
+    
+    def rebuild_aggregates(self, db: Session) -> None:
+        """Recompute every progress aggregate from the progress and history tables
+        
+        Backfill after deploying the aggregate tables and repair afterwards
+        (``python -m app.jobs.rebuild_progress_stats``); the caller commits.
+        """
+        db.query(StudentCourseStats).delete(synchronize_session=False)
+        
+        db.execute(insert(StudentCourseStats).from_select(
+            ["student_id", "course_id", "lessons_completed", "total_attempts",
+             "score_sum", "last_activity_at"],
+            select(
+                LessonProgress.student_id,
+                Lesson.course_id,
+                func.count(LessonProgress.id),
+                func.sum(LessonProgress.lesson_attempts),
+                func.sum(LessonProgress.best_score),
+                func.max(LessonProgress.updated_at)
+            ).join(Lesson, Lesson.id == LessonProgress.lesson_id).group_by(
+                LessonProgress.student_id, Lesson.course_id
+            )
+        ))
+        
+        self._rebuild_student_stats(db)
+        self.refresh_group_stats(db)
+    
+    def refresh_group_stats(self, db: Session, group_id: Optional[int] = None) -> None:
+        """Recompute group_lesson_stats for one group (or all) from lesson_progress
+        
+        Called after membership or course changes, which the incremental
+        updates on completion cannot account for, in the caller's transaction.
+        """
+        stale = db.query(GroupLessonStats)
+        if group_id is not None:
+            stale = stale.filter(GroupLessonStats.group_id == group_id)
+        stale.delete(synchronize_session=False)
+        
+        source = select(
+            Group.id,
+            LessonProgress.lesson_id,
+            func.count(LessonProgress.id),
+            func.sum(LessonProgress.lesson_attempts),
+            func.sum(LessonProgress.best_score)
+        ).join(
+            GroupStudent, GroupStudent.group_id == Group.id
+        ).join(
+            LessonProgress, LessonProgress.student_id == GroupStudent.student_id
+        ).join(
+            Lesson,
+            and_(Lesson.id == LessonProgress.lesson_id, Lesson.course_id == Group.course_id)
+        ).where(
+            Group.deleted_at.is_(None)
+        ).group_by(Group.id, LessonProgress.lesson_id)
+        
+        if group_id is not None:
+            source = source.where(Group.id == group_id)
+        
+        db.execute(insert(GroupLessonStats).from_select(
+            ["group_id", "lesson_id", "students_completed", "total_attempts", "score_sum"],
+            source
+        ))
+    
+    def _update_aggregates(
+        self,
+        db: Session,
+        student_id: int,
+        lesson_id: int,
+        course_id: int,
+        completed: int,
+        score_delta: int,
+        at: datetime
+    ) -> None:
+        stmt = dialect_insert(db, StudentCourseStats).values(
+            student_id=student_id,
+            course_id=course_id,
+            lessons_completed=completed,
+            total_attempts=1,
+            score_sum=score_delta,
+            last_activity_at=at
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["student_id", "course_id"],
+            set_={
+                "lessons_completed": StudentCourseStats.lessons_completed + stmt.excluded.lessons_completed,
+                "total_attempts": StudentCourseStats.total_attempts + 1,
+                "score_sum": StudentCourseStats.score_sum + stmt.excluded.score_sum,
+                "last_activity_at": stmt.excluded.last_activity_at,
+            }
+        ))
+        
+        group_ids: List[int] = [
+            group_id for (group_id,) in db.query(Group.id).join(
+                GroupStudent, GroupStudent.group_id == Group.id
+            ).filter(
+                GroupStudent.student_id == student_id,
+                Group.course_id == course_id,
+                Group.deleted_at.is_(None)
+            )
+        ]
+        if not group_ids:
+            return
+        
+        stmt = dialect_insert(db, GroupLessonStats).values([
+            {
+                "group_id": group_id,
+                "lesson_id": lesson_id,
+                "students_completed": completed,
+                "total_attempts": 1,
+                "score_sum": score_delta,
+            }
+            for group_id in group_ids
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["group_id", "lesson_id"],
+            set_={
+                "students_completed": GroupLessonStats.students_completed + stmt.excluded.students_completed,
+                "total_attempts": GroupLessonStats.total_attempts + 1,
+                "score_sum": GroupLessonStats.score_sum + stmt.excluded.score_sum,
+                "updated_at": func.now(),
+            }
+        ))
+    
+    def _rebuild_student_stats(self, db: Session) -> None:
+        db.query(StudentStats).delete(synchronize_session=False)
+        
+        rows = self._compute_student_stats(db)
+        if rows:
+            db.execute(insert(StudentStats), rows)
+    
+    def _compute_student_stats(self, db: Session, only_student_id: Optional[int] = None) -> List[dict]:
+        """student_stats rows computed from the progress, history and ledger tables
+        
+        For every student with activity, or only ``only_student_id``. Activity
+        and streaks are recovered from the last year of history only.
+        """
+        def scoped(query, column):
+            return query if only_student_id is None else query.filter(column == only_student_id)
+        
+        stats = defaultdict(dict)
+        for row in scoped(db.query(
+            LessonProgress.student_id,
+            func.count(LessonProgress.id).label("lessons_completed"),
+            func.sum(LessonProgress.lesson_attempts).label("lesson_attempts"),
+            func.sum(LessonProgress.best_score).label("score_sum"),
+            func.max(LessonProgress.updated_at).label("last_active")
+        ), LessonProgress.student_id).group_by(LessonProgress.student_id):
+            stats[row.student_id].update(
+                lessons_completed=row.lessons_completed,
+                lesson_attempts=row.lesson_attempts or 0,
+                score_sum=row.score_sum or 0,
+                last_active=row.last_active
+            )
+        
+        for row in scoped(db.query(
+            WordHistory.student_id,
+            func.count().label("words_attempted"),
+            func.sum(case((WordHistory.is_correct == True, 1), else_=0)).label("words_correct"),
+            func.max(WordHistory.attempted_at).label("last_active")
+        ), WordHistory.student_id).group_by(WordHistory.student_id):
+            entry = stats[row.student_id]
+            entry.update(words_attempted=row.words_attempted, words_correct=row.words_correct or 0)
+            if row.last_active and (entry.get("last_active") is None or row.last_active > entry["last_active"]):
+                entry["last_active"] = row.last_active
+        
+        week_start = self._week_start(datetime.utcnow().date())
+        for row in scoped(db.query(
+            CoinTransaction.student_id,
+            func.sum(CoinTransaction.amount).label("coins_earned"),
+            func.sum(case(
+                (CoinTransaction.created_at >= week_start, CoinTransaction.amount),
+                else_=0
+            )).label("coins_this_week")
+        ).filter(
+            # Manual bonuses and penalties are not earnings
+            CoinTransaction.transaction_type == TransactionType.LESSON_SCORE
+        ), CoinTransaction.student_id).group_by(CoinTransaction.student_id):
+            stats[row.student_id].update(
+                coins_earned=row.coins_earned or 0,
+                coins_this_week=row.coins_this_week or 0
+            )
+        
+        today = datetime.utcnow().date()
+        since = today - timedelta(days=ACTIVITY_DAYS - 1)
+        daily = defaultdict(lambda: defaultdict(int))
+        for column, student_column in (
+            (WordHistory.attempted_at, WordHistory.student_id),
+            (LessonProgress.updated_at, LessonProgress.student_id),
+            (CoinTransaction.created_at, CoinTransaction.student_id),
+        ):
+            for student_id, day, events in scoped(db.query(
+                student_column,
+                func.date(column),
+                func.count()
+            ), student_column).filter(column >= since).group_by(student_column, func.date(column)):
+                if isinstance(day, str):
+                    # SQLite returns DATE() as text
+                    day = date.fromisoformat(day)
+                daily[student_id][day] += events
+        
+        for student_id, days in daily.items():
+            ring = previous = None
+            for day in sorted(days):
+                ring = self._add_activity(ring, previous, day, days[day])
+                previous = day
+            
+            current_streak = 0
+            while days.get(previous - timedelta(days=current_streak)):
+                current_streak += 1
+            
+            longest_streak = streak = 0
+            for offset in range(ACTIVITY_DAYS):
+                streak = streak + 1 if days.get(since + timedelta(days=offset)) else 0
+                longest_streak = max(longest_streak, streak)
+            
+            stats[student_id].update(
+                activity=ring,
+                activity_head=previous,
+                current_streak=current_streak,
+                longest_streak=longest_streak
+            )
+        
+        return [
+            {
+                "student_id": student_id,
+                "lessons_completed": entry.get("lessons_completed", 0),
+                "lesson_attempts": entry.get("lesson_attempts", 0),
+                "score_sum": entry.get("score_sum", 0),
+                "words_attempted": entry.get("words_attempted", 0),
+                "words_correct": entry.get("words_correct", 0),
+                "coins_earned": entry.get("coins_earned", 0),
+                "coins_this_week": entry.get("coins_this_week", 0),
+                "week_start": week_start,
+                "current_streak": entry.get("current_streak", 0),
+                "longest_streak": entry.get("longest_streak", 0),
+                # The ring is only valid relative to the day it was last written
+                "last_active_date": entry.get("activity_head") or (
+                    entry["last_active"].date() if entry.get("last_active") else None
+                ),
+                "activity": entry.get("activity"),
+            }
+            for student_id, entry in stats.items()
+        ]
+    
+    def _bump_student_stats(
+        self,
+        db: Session,
+        student_id: int,
+        at: datetime,
+        lessons_completed: int = 0,
+        lesson_attempts: int = 0,
+        score_delta: int = 0,
+        words_attempted: int = 0,
+        words_correct: int = 0,
+        coins: int = 0
+    ) -> None:
+        """Apply one activity event to the student's summary row in a single upsert
+        
+        Streak and weekly-coin rollover are evaluated in SQL against the stored
+        row, so concurrent events for the same student cannot lose updates.
+        """
+        today = at.date()
+        week_start = self._week_start(today)
+        
+        # The activity ring is rewritten in Python, so hold the row while doing it
+        current = db.query(
+            StudentStats.activity,
+            StudentStats.last_active_date
+        ).filter(
+            StudentStats.student_id == student_id
+        ).with_for_update().first()
+        
+        activity = self._add_activity(
+            current.activity if current else None,
+            current.last_active_date if current else None,
+            today,
+            max(lesson_attempts + words_attempted, 1)
+        )
+        
+        stmt = dialect_insert(db, StudentStats).values(
+            student_id=student_id,
+            lessons_completed=lessons_completed,
+            lesson_attempts=lesson_attempts,
+            score_sum=score_delta,
+            words_attempted=words_attempted,
+            words_correct=words_correct,
+            coins_earned=coins,
+            coins_this_week=coins,
+            week_start=week_start,
+            current_streak=1,
+            longest_streak=1,
+            last_active_date=today,
+            activity=activity
+        )
+        
+        current_streak = case(
+            (StudentStats.last_active_date == today, StudentStats.current_streak),
+            (StudentStats.last_active_date == today - timedelta(days=1), StudentStats.current_streak + 1),
+            else_=1
+        )
+        
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["student_id"],
+            set_={
+                "lessons_completed": StudentStats.lessons_completed + stmt.excluded.lessons_completed,
+                "lesson_attempts": StudentStats.lesson_attempts + stmt.excluded.lesson_attempts,
+                "score_sum": StudentStats.score_sum + stmt.excluded.score_sum,
+                "words_attempted": StudentStats.words_attempted + stmt.excluded.words_attempted,
+                "words_correct": StudentStats.words_correct + stmt.excluded.words_correct,
+                "coins_earned": StudentStats.coins_earned + stmt.excluded.coins_earned,
+                "coins_this_week": case(
+                    (StudentStats.week_start == week_start, StudentStats.coins_this_week + coins),
+                    else_=coins
+                ),
+                "week_start": week_start,
+                "current_streak": current_streak,
+                "longest_streak": case(
+                    (current_streak > StudentStats.longest_streak, current_streak),
+                    else_=StudentStats.longest_streak
+                ),
+                "last_active_date": today,
+                "activity": stmt.excluded.activity,
+                "updated_at": func.now(),
+            }
+        ))
+    
+    def _add_activity(
+        self,
+        activity: Optional[bytes],
+        last_active_date: Optional[date],
+        day: date,
+        events: int
+    ) -> bytes:
+        """Return the ring with ``events`` added to ``day``'s saturating counter"""
+        if activity is None or last_active_date is None or (day - last_active_date).days >= ACTIVITY_DAYS:
+            ring = bytearray(ACTIVITY_DAYS)
+        else:
+            ring = bytearray(activity)
+            # Slots for the idle days since the last write still hold last year's counts
+            for offset in range(1, (day - last_active_date).days + 1):
+                ring[(last_active_date + timedelta(days=offset)).toordinal() % ACTIVITY_DAYS] = 0
+        
+        slot = day.toordinal() % ACTIVITY_DAYS
+        ring[slot] = min(ring[slot] + events, ACTIVITY_MAX)
+        return bytes(ring)
+    
+    def _activity_count(
+        self,
+        activity: Optional[bytes],
+        last_active_date: Optional[date],
+        day: date
+    ) -> int:
+        if activity is None or last_active_date is None:
+            return 0
+        if day > last_active_date or (last_active_date - day).days >= ACTIVITY_DAYS:
+            return 0
+        return activity[day.toordinal() % ACTIVITY_DAYS]
+    
+    def _is_applied(self, db: Session, student_id: int, idempotency_key: str) -> bool:
+        return db.query(CoinIdempotencyKey.id).filter(
+            CoinIdempotencyKey.student_id == student_id,
+            CoinIdempotencyKey.idempotency_key == idempotency_key
+        ).first() is not None
+    
+    def _week_start(self, day: date) -> date:
+        return day - timedelta(days=day.weekday())
+    
+    def _format_datetime(self, value):
+        return value.isoformat() + 'Z' if value else None
+
+
+# Singleton instance
+progress_service = ProgressService()
@@ -1,9 +1,10 @@
-import httpx
 from typing import Optional
 import logging
 
 from ..config import settings
 from ..database import get_redis
+from ..metrics import observe_external
+from ..utils.http_clients import get_http_client
 
 
 logger = logging.getLogger(__name__)
@@ -12,8 +13,9 @@ logger = logging.getLogger(__name__)
 class SMSService:
     TOKEN_KEY = "eskiz_token"
     
-    def __init__(self):
-        self.redis = get_redis()
+    @property
+    def redis(self):
+        return get_redis()
     
     async def send_verification_code(self, phone: str, code: str) -> bool:
         """Send verification code via SMS"""
@@ -31,9 +33,9 @@ class SMSService:
         token = await self._get_eskiz_token()
         logger.info(f"Using token for SMS: {token[:20]}...{token[-10:]} (length: {len(token)})")
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.ESKIZ_URL}/message/sms/send",
+        with observe_external("eskiz", "send_sms"):
+            response = await get_http_client("eskiz").post(
+                "/message/sms/send",
                 json={
                     "mobile_phone": phone,
                     "message": message,
@@ -57,9 +59,9 @@ class SMSService:
         logger.info("No cached token found, getting fresh token from Eskiz API")
         
         # Get new token
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.ESKIZ_URL}/auth/login",
+        with observe_external("eskiz", "login"):
+            response = await get_http_client("eskiz").post(
+                "/auth/login",
                 json={
                     "email": settings.ESKIZ_EMAIL,
                     "password": settings.ESKIZ_PASSWORD,
@@ -68,21 +70,21 @@ class SMSService:
             
             if response.status_code != 200:
                 raise Exception(f"Failed to authenticate with Eskiz: {response.status_code}")
-            
-            data = response.json()
-            token = data.get("data", {}).get("token")
-            
-            if not token:
-                logger.error(f"No token in Eskiz response: {data}")
-                raise Exception("No token received from Eskiz API")
-            
-            logger.info(f"Got fresh token: {token[:20]}...{token[-10:]} (length: {len(token)})")
-            
-            # Store token for 29 days
-            await self.redis.setex(self.TOKEN_KEY, 60 * 60 * 24 * 29, token)
-            logger.info("Token cached successfully in Redis")
-            
-            return token
+        
+        data = response.json()
+        token = data.get("data", {}).get("token")
+        
+        if not token:
+            logger.error(f"No token in Eskiz response: {data}")
+            raise Exception("No token received from Eskiz API")
+        
+        logger.info(f"Got fresh token: {token[:20]}...{token[-10:]} (length: {len(token)})")
+        
+        # Store token for 29 days
+        await self.redis.setex(self.TOKEN_KEY, 60 * 60 * 24 * 29, token)
+        logger.info("Token cached successfully in Redis")
+        
+        return token
 
 
 # Singleton instance
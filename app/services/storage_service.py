@@ -9,20 +9,14 @@ from ..config import settings
 
 
 class StorageService:
+    DIRECTORIES = ("logos", "audio", "images", "documents")
+    
     def __init__(self):
         self.storage_path = Path(settings.STORAGE_PATH)
-        self._ensure_directories()
     
-    def _ensure_directories(self):
-        """Create necessary directories"""
-        directories = [
-            "logos",
-            "audio",
-            "images",
-            "documents"
-        ]
-        
-        for directory in directories:
+    def ensure_directories(self):
+        """Create necessary directories (called once from the app lifespan)"""
+        for directory in self.DIRECTORIES:
             path = self.storage_path / directory
             path.mkdir(parents=True, exist_ok=True)
     
@@ -55,6 +49,7 @@ class StorageService:
         
         # Create full path
         directory_path = self.storage_path / subdirectory
+        directory_path.mkdir(parents=True, exist_ok=True)
         file_path = directory_path / filename
         
         try:
@@ -0,0 +1,158 @@
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from ..models import LearningCenter, User, UserRole, Group
+
+
+# Counter column, limit column and error message per kind of usage
+COUNTERS = {
+    "students": (LearningCenter.student_count, LearningCenter.student_limit,
+                 "Student limit reached for this learning center"),
+    "teachers": (LearningCenter.teacher_count, LearningCenter.teacher_limit,
+                 "Teacher limit reached for this learning center"),
+    "groups": (LearningCenter.group_count, LearningCenter.group_limit,
+               "Group limit reached for this learning center"),
+}
+
+USER_KINDS = {
+    UserRole.STUDENT: "students",
+    UserRole.TEACHER: "teachers",
+}
+
+
+def user_kind(role: UserRole, is_active: bool) -> Optional[str]:
+    """Counter a user occupies: active students and teachers count, admins never do"""
+    return USER_KINDS.get(role) if is_active else None
+
+
+class UsageService:
+    """Per-center usage counters that enforce student/teacher/group limits
+    
+    Counters live on learning_centers and are only changed by conditional
+    UPDATEs in the caller's transaction: a reservation increments the
+    counter only while it stays within the limit, so two concurrent creates
+    cannot both take the last slot. On Postgres the updated center row stays
+    locked until the caller commits or rolls back.
+    """
+    
+    def reserve(self, db: Session, learning_center_id: int, kind: str, amount: int = 1) -> None:
+        """Take ``amount`` slots or raise 400 when the limit would be exceeded"""
+        counter, limit, message = COUNTERS[kind]
+        updated = db.execute(
+            update(LearningCenter).where(
+                LearningCenter.id == learning_center_id,
+                counter + amount <= limit
+            ).values({counter: counter + amount})
+        ).rowcount
+        
+        if not updated:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=message
+            )
+    
+    def release(self, db: Session, learning_center_id: int, kind: str, amount: int = 1) -> None:
+        """Give back ``amount`` slots (never below zero)"""
+        counter, _, _ = COUNTERS[kind]
+        db.execute(
+            update(LearningCenter).where(
+                LearningCenter.id == learning_center_id,
+                counter >= amount
+            ).values({counter: counter - amount})
+        )
+    
+    def move_user(
+        self,
+        db: Session,
+        before: tuple,
+        after: tuple
+    ) -> None:
+        """Move a user's slot when role, center or active flag changes
+        
+        ``before`` and ``after`` are (learning_center_id, role, is_active).
+        The new slot is reserved before the old one is released, so a change
+        into a full center or role is rejected without touching either.
+        """
+        old_center, old_role, old_active = before
+        new_center, new_role, new_active = after
+        old_kind = user_kind(old_role, old_active)
+        new_kind = user_kind(new_role, new_active)
+        if (old_center, old_kind) == (new_center, new_kind):
+            return
+        
+        if new_kind:
+            self.reserve(db, new_center, new_kind)
+        if old_kind:
+            self.release(db, old_center, old_kind)
+    
+    def get_usage(self, db: Session, learning_center_id: int) -> Optional[dict]:
+        """Used, limit and remaining slots per kind from the counters"""
+        center = db.query(LearningCenter).filter(
+            LearningCenter.id == learning_center_id
+        ).first()
+        if center is None:
+            return None
+        
+        usage = {"learning_center_id": center.id}
+        for kind, (counter, limit, _) in COUNTERS.items():
+            used = getattr(center, counter.key)
+            maximum = getattr(center, limit.key)
+            usage[kind] = {"used": used, "limit": maximum, "remaining": max(maximum - used, 0)}
+        return usage
+    
+    def recount(self, db: Session, learning_center_id: Optional[int] = None) -> dict:
+        """Recompute the counters from users and groups and report any drift
+        
+        Each center row is locked while it is recounted, so creates running
+        at the same time wait instead of being lost.
+        """
+        query = db.query(LearningCenter.id).order_by(LearningCenter.id)
+        if learning_center_id is not None:
+            query = query.filter(LearningCenter.id == learning_center_id)
+        center_ids = [center_id for (center_id,) in query]
+        
+        drifted = []
+        for center_id in center_ids:
+            center = db.query(LearningCenter).filter(
+                LearningCenter.id == center_id
+            ).with_for_update().populate_existing().one()
+            
+            actual = self._actual_counts(db, center_id)
+            stored = {kind: getattr(center, counter.key) for kind, (counter, _, _) in COUNTERS.items()}
+            if actual != stored:
+                drifted.append({"learning_center_id": center_id, "stored": stored, "actual": actual})
+                for kind, (counter, _, _) in COUNTERS.items():
+                    setattr(center, counter.key, actual[kind])
+            db.commit()
+        
+        return {
+            "centers_checked": len(center_ids),
+            "centers_drifted": len(drifted),
+            "drifted": drifted,
+        }
+    
+    def _actual_counts(self, db: Session, learning_center_id: int) -> dict:
+        users = dict(db.execute(
+            select(User.role, func.count(User.id)).where(
+                User.learning_center_id == learning_center_id,
+                User.role.in_(list(USER_KINDS)),
+                User.is_active == True
+            ).group_by(User.role)
+        ).all())
+        groups = db.query(func.count(Group.id)).filter(
+            Group.learning_center_id == learning_center_id,
+            Group.deleted_at.is_(None)
+        ).scalar()
+        
+        return {
+            "students": users.get(UserRole.STUDENT, 0),
+            "teachers": users.get(UserRole.TEACHER, 0),
+            "groups": groups,
+        }
+
+
+# Singleton instance
+usage_service = UsageService()
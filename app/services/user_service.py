@@ -1,13 +1,22 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, insert, select, update
 from fastapi import HTTPException, status
 
 from ..models import User, LearningCenter, UserRole, Group, GroupStudent
 from ..models import LessonProgress, CoinTransaction, TransactionType
+from ..models import CoinIdempotencyKey, ArchivedCoinTotal
+from ..dependencies import Principal
+from ..utils.sql import dialect_insert
+from .usage_service import usage_service, user_kind
 
 
 class UserService:
+    # Rows validated and inserted per round trip by import_students
+    IMPORT_CHUNK_SIZE = 1000
+    # Student balance rows fetched per round trip by reconcile_coins
+    RECONCILE_FETCH_SIZE = 5000
     
     def create_user(
         self,
@@ -42,32 +51,10 @@ class UserService:
                 detail="Phone number already registered in this learning center"
             )
         
-        # Check limits based on role
-        if role == UserRole.STUDENT:
-            student_count = db.query(User).filter(
-                User.learning_center_id == learning_center_id,
-                User.role == UserRole.STUDENT,
-                User.is_active == True
-            ).count()
-            
-            if student_count >= learning_center.student_limit:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Student limit reached for this learning center"
-                )
-        
-        elif role == UserRole.TEACHER:
-            teacher_count = db.query(User).filter(
-                User.learning_center_id == learning_center_id,
-                User.role == UserRole.TEACHER,
-                User.is_active == True
-            ).count()
-            
-            if teacher_count >= learning_center.teacher_limit:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Teacher limit reached for this learning center"
-                )
+        # Take a student/teacher slot; the counter update commits with the user
+        kind = user_kind(role, True)
+        if kind:
+            usage_service.reserve(db, learning_center_id, kind)
         
         # Create user
         user = User(
@@ -83,16 +70,138 @@ class UserService:
         
         return user
     
+    def import_students(
+        self,
+        db: Session,
+        learning_center_id: int,
+        rows: Iterable[Tuple[int, Dict[str, str]]]
+    ) -> dict:
+        """Bulk-create students from (row_number, {"phone", "name"}) rows
+        
+        Rows are validated in chunks: duplicates are checked with one query per
+        chunk, the student limit is read once, and valid rows are inserted with
+        a single multi-row INSERT per chunk. Everything commits together.
+        """
+        # Lock the center row so concurrent imports cannot both pass the limit
+        learning_center = db.query(LearningCenter).filter(
+            LearningCenter.id == learning_center_id,
+            LearningCenter.is_active == True
+        ).with_for_update().first()
+        
+        if not learning_center:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Learning center not found"
+            )
+        
+        state = {
+            "capacity": learning_center.student_limit - learning_center.student_count,
+            "seen_phones": set(),
+            "created": 0,
+            "errors": [],
+        }
+        
+        total_rows = 0
+        chunk = []
+        for row_number, row in rows:
+            total_rows += 1
+            chunk.append((row_number, row))
+            if len(chunk) >= self.IMPORT_CHUNK_SIZE:
+                self._import_student_chunk(db, learning_center_id, chunk, state)
+                chunk = []
+        
+        if chunk:
+            self._import_student_chunk(db, learning_center_id, chunk, state)
+        
+        db.commit()
+        
+        return {
+            "total_rows": total_rows,
+            "created": state["created"],
+            "failed": len(state["errors"]),
+            "errors": sorted(state["errors"], key=lambda error: error["row"]),
+        }
+    
+    def _import_student_chunk(
+        self,
+        db: Session,
+        learning_center_id: int,
+        chunk: List[Tuple[int, Dict[str, str]]],
+        state: dict
+    ) -> None:
+        """Validate one chunk of import rows and insert the valid ones"""
+        errors: List[dict] = state["errors"]
+        seen_phones: Set[str] = state["seen_phones"]
+        
+        candidates = []
+        for row_number, row in chunk:
+            phone = row.get("phone", "").replace(" ", "")
+            name = row.get("name", "")
+            
+            if not phone:
+                errors.append({"row": row_number, "phone": phone, "error": "Phone is required"})
+            elif not name:
+                errors.append({"row": row_number, "phone": phone, "error": "Name is required"})
+            elif phone in seen_phones:
+                errors.append({"row": row_number, "phone": phone, "error": "Duplicate phone in file"})
+            else:
+                seen_phones.add(phone)
+                candidates.append((row_number, phone, name))
+        
+        if not candidates:
+            return
+        
+        existing_phones = {
+            phone for (phone,) in db.query(User.phone).filter(
+                User.learning_center_id == learning_center_id,
+                User.phone.in_([phone for _, phone, _ in candidates])
+            )
+        }
+        
+        values = []
+        for row_number, phone, name in candidates:
+            if phone in existing_phones:
+                errors.append({
+                    "row": row_number,
+                    "phone": phone,
+                    "error": "Phone number already registered in this learning center"
+                })
+            elif state["capacity"] <= 0:
+                errors.append({
+                    "row": row_number,
+                    "phone": phone,
+                    "error": "Student limit reached for this learning center"
+                })
+            else:
+                state["capacity"] -= 1
+                values.append({
+                    "phone": phone,
+                    "name": name,
+                    "role": UserRole.STUDENT,
+                    "learning_center_id": learning_center_id,
+                })
+        
+        if values:
+            # Cannot fail while the center row is locked; it keeps the counter in step
+            usage_service.reserve(db, learning_center_id, "students", len(values))
+            db.execute(insert(User), values)
+            state["created"] += len(values)
+    
     def get_users_by_learning_center(
         self,
         db: Session,
         learning_center_id: int,
         role: Optional[UserRole] = None,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[User]:
-        """Get users by learning center with optional role filter"""
-        query = db.query(User).filter(
+        limit: int = 100,
+        columns: Optional[list] = None
+    ) -> list:
+        """Get users by learning center with optional role filter
+        
+        With ``columns`` only those columns are loaded and rows are returned
+        instead of User objects.
+        """
+        query = db.query(*(columns or [User])).filter(
             User.learning_center_id == learning_center_id,
             User.is_active == True
         )
@@ -169,6 +278,65 @@ class UserService:
         
         return group_student
     
+    def add_students_to_group(
+        self,
+        db: Session,
+        student_ids: List[int],
+        group_id: int,
+        current_user: Principal
+    ) -> dict:
+        """Add many students to a group in one transaction
+        
+        Students are validated with a single query and memberships are inserted
+        with ON CONFLICT DO NOTHING, so existing members are skipped rather than
+        treated as errors.
+        """
+        group = db.query(Group).filter(
+            Group.id == group_id,
+            Group.learning_center_id == current_user.learning_center_id,
+            Group.deleted_at.is_(None)
+        ).first()
+        if not group:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Group not found"
+            )
+        
+        if current_user.role == UserRole.TEACHER and group.teacher_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to manage this group"
+            )
+        
+        requested_ids = list(dict.fromkeys(student_ids))
+        valid_ids = {
+            student_id for (student_id,) in db.query(User.id).filter(
+                User.id.in_(requested_ids),
+                User.role == UserRole.STUDENT,
+                User.learning_center_id == group.learning_center_id,
+                User.is_active == True,
+                User.deleted_at.is_(None)
+            )
+        }
+        
+        added_ids = set()
+        if valid_ids:
+            stmt = dialect_insert(db, GroupStudent).values([
+                {"group_id": group_id, "student_id": student_id}
+                for student_id in requested_ids if student_id in valid_ids
+            ]).on_conflict_do_nothing(
+                index_elements=["group_id", "student_id"]
+            ).returning(GroupStudent.student_id)
+            added_ids = set(db.execute(stmt).scalars())
+        
+        db.commit()
+        
+        return {
+            "added": [i for i in requested_ids if i in added_ids],
+            "skipped": [i for i in requested_ids if i in valid_ids and i not in added_ids],
+            "not_found": [i for i in requested_ids if i not in valid_ids],
+        }
+    
     def award_coins(
         self,
         db: Session,
@@ -176,10 +344,42 @@ class UserService:
         lesson_id: int,
         score: int,
         transaction_type: TransactionType = TransactionType.LESSON_SCORE,
-        description: Optional[str] = None
+        description: Optional[str] = None,
+        idempotency_key: Optional[str] = None
     ) -> CoinTransaction:
         """Award coins to student"""
-        student = db.query(User).filter(
+        transaction, _ = self.apply_coin_transaction(
+            db,
+            student_id=student_id,
+            amount=score,
+            transaction_type=transaction_type,
+            lesson_id=lesson_id,
+            description=description or f"Lesson score: {score} points",
+            idempotency_key=idempotency_key
+        )
+        return transaction
+    
+    def apply_coin_transaction(
+        self,
+        db: Session,
+        student_id: int,
+        amount: int,
+        transaction_type: TransactionType,
+        lesson_id: Optional[int] = None,
+        description: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        commit: bool = True
+    ) -> Tuple[CoinTransaction, bool]:
+        """Append a ledger entry and move the balance by ``amount`` atomically
+        
+        A repeated ``idempotency_key`` for the same student returns the original
+        entry with ``created=False`` and leaves the balance untouched. The
+        balance is changed with a single SQL-side UPDATE that refuses to go
+        below zero. The ledger writes run in a SAVEPOINT: a refused debit
+        undoes only them, and with ``commit=False`` the caller's other pending
+        work stays for the caller to commit or roll back.
+        """
+        student = db.query(User.id).filter(
             User.id == student_id,
             User.role == UserRole.STUDENT,
             User.is_active == True
@@ -191,24 +391,126 @@ class UserService:
                 detail="Student not found"
             )
         
-        # Create transaction
-        transaction = CoinTransaction(
-            student_id=student_id,
-            lesson_id=lesson_id,
-            amount=score,
-            transaction_type=transaction_type,
-            description=description or f"Lesson score: {score} points"
+        savepoint = db.begin_nested()
+        key_id = None
+        if idempotency_key:
+            # Claim the key first; a concurrent retry blocks here until we commit
+            key_id = db.execute(
+                dialect_insert(db, CoinIdempotencyKey).values(
+                    student_id=student_id,
+                    idempotency_key=idempotency_key
+                ).on_conflict_do_nothing(
+                    index_elements=["student_id", "idempotency_key"]
+                ).returning(CoinIdempotencyKey.id)
+            ).scalar()
+            
+            if key_id is None:
+                # Retry of an already applied request
+                transaction_id = db.query(CoinIdempotencyKey.transaction_id).filter(
+                    CoinIdempotencyKey.student_id == student_id,
+                    CoinIdempotencyKey.idempotency_key == idempotency_key
+                ).scalar()
+                savepoint.commit()
+                return db.get(CoinTransaction, transaction_id), False
+        
+        transaction_id = db.execute(
+            insert(CoinTransaction).values(
+                student_id=student_id,
+                lesson_id=lesson_id,
+                amount=amount,
+                transaction_type=transaction_type,
+                description=description
+            ).returning(CoinTransaction.id)
+        ).scalar()
+        
+        if key_id is not None:
+            db.execute(
+                update(CoinIdempotencyKey).where(
+                    CoinIdempotencyKey.id == key_id
+                ).values(transaction_id=transaction_id)
+            )
+        
+        updated = db.execute(
+            update(User).where(
+                User.id == student_id,
+                User.coins + amount >= 0
+            ).values(coins=User.coins + amount)
+        ).rowcount
+        
+        if not updated:
+            # Also releases the idempotency key, so a retry is not treated as applied
+            savepoint.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient coin balance"
+            )
+        
+        savepoint.commit()
+        if commit:
+            db.commit()
+        
+        return db.get(CoinTransaction, transaction_id), True
+    
+    def reconcile_coins(self, db: Session, learning_center_id: Optional[int] = None) -> dict:
+        """Compare every student's balance with the sum of their ledger in one pass
+        
+        Returns per-center totals and the students whose ``users.coins`` drifted
+        from ``SUM(coin_transactions.amount)`` plus any archived ledger totals.
+        """
+        ledger = select(
+            CoinTransaction.student_id,
+            func.sum(CoinTransaction.amount).label("ledger_coins")
+        ).group_by(CoinTransaction.student_id).subquery()
+        
+        query = db.query(
+            User.id,
+            User.learning_center_id,
+            User.coins,
+            (
+                func.coalesce(ledger.c.ledger_coins, 0)
+                + func.coalesce(ArchivedCoinTotal.amount, 0)
+            ).label("ledger_coins")
+        ).outerjoin(
+            ledger, ledger.c.student_id == User.id
+        ).outerjoin(
+            ArchivedCoinTotal, ArchivedCoinTotal.student_id == User.id
+        ).filter(
+            User.role == UserRole.STUDENT
         )
         
-        # Update student coins
-        student.coins += score
+        if learning_center_id is not None:
+            query = query.filter(User.learning_center_id == learning_center_id)
         
-        db.add(transaction)
-        db.commit()
-        db.refresh(transaction)
+        centers: Dict[int, dict] = {}
+        for row in query.order_by(User.learning_center_id, User.id).yield_per(self.RECONCILE_FETCH_SIZE):
+            center = centers.get(row.learning_center_id)
+            if center is None:
+                center = centers[row.learning_center_id] = {
+                    "learning_center_id": row.learning_center_id,
+                    "students_checked": 0,
+                    "students_drifted": 0,
+                    "total_drift": 0,
+                    "drifted": [],
+                }
+            
+            center["students_checked"] += 1
+            drift = (row.coins or 0) - row.ledger_coins
+            if drift:
+                center["students_drifted"] += 1
+                center["total_drift"] += drift
+                center["drifted"].append({
+                    "student_id": row.id,
+                    "balance": row.coins,
+                    "ledger": row.ledger_coins,
+                    "drift": drift,
+                })
         
-        return transaction
-
+        return {
+            "checked_at": datetime.utcnow().isoformat() + 'Z',
+            "students_checked": sum(c["students_checked"] for c in centers.values()),
+            "students_drifted": sum(c["students_drifted"] for c in centers.values()),
+            "centers": list(centers.values()),
+        }
 
 # Singleton instance
 user_service = UserService()
\ No newline at end of file
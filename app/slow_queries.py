@@ -0,0 +1,285 @@
+import hashlib
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import redis
+
+from .config import settings
+from .utils.request_context import current_request
+
+
+logger = logging.getLogger(__name__)
+
+# Aggregates are shared by all workers through Redis:
+#   slowq:index             zset  fingerprint -> total ms
+#   slowq:max               zset  fingerprint -> max ms (ZADD GT, so concurrent writers cannot lower it)
+#   slowq:query:<fp>        hash  sql, params, count, total/last ms, plan
+#   slowq:routes:<fp>       zset  route -> count
+INDEX_KEY = "slowq:index"
+MAX_KEY = "slowq:max"
+QUERY_KEY = "slowq:query:{}"
+ROUTES_KEY = "slowq:routes:{}"
+RETENTION = 7 * 24 * 3600
+
+# A fingerprint is explained again at most this often (per worker)
+EXPLAIN_INTERVAL = 600
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+
+# Samples waiting for the writer thread (per worker); more are dropped
+QUEUE_SIZE = 1000
+# Samples written per Redis round trip
+WRITE_BATCH = 100
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_IN_LIST = re.compile(r"\bIN \((?:\?, )*\?\)", re.IGNORECASE)
+_VALUES_ROWS = re.compile(r"(VALUES \([^)]*\))(?:, \([^)]*\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Replace literals and placeholders with ? and collapse lists, so one query shape is one entry"""
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _VALUES_ROWS.sub(r"\1, ...", sql)
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def _value_shape(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}({len(value)})"
+    if isinstance(value, (list, tuple, set)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def parameter_shape(parameters, executemany: bool):
+    """Types and sizes of the bound values; the values themselves are never stored"""
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "row": parameter_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {name: _value_shape(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_value_shape(value) for value in parameters]
+    return None
+
+
+def _explain(cursor, statement: str, parameters) -> Optional[str]:
+    """EXPLAIN (without ANALYZE, so nothing runs twice) inside a savepoint
+    
+    Uses a raw DBAPI cursor on the same connection, which keeps it out of
+    the SQLAlchemy events; the savepoint keeps a failing EXPLAIN from
+    aborting the request's transaction.
+    """
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            explain_cursor.execute("EXPLAIN (ANALYZE off) " + statement, parameters)
+            plan = "\n".join(row[0] for row in explain_cursor.fetchall())
+        except Exception:
+            explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            raise
+        finally:
+            explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    finally:
+        explain_cursor.close()
+
+
+class SlowQueryLog:
+    """Logs statements slower than SLOW_QUERY_MS and aggregates them by fingerprint
+    
+    record() is called from the engine's after_cursor_execute event on the
+    query's own thread. It only normalizes, logs and (rarely) EXPLAINs the
+    statement there, since EXPLAIN needs the same connection; the Redis
+    update is queued for a background writer thread. When Redis is slow or
+    down the bounded queue fills up and further samples are dropped instead
+    of holding up queries.
+    """
+    
+    def __init__(self):
+        self._redis = None
+        self._explained_at: Dict[str, float] = {}
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=QUEUE_SIZE)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self.dropped = 0
+    
+    @property
+    def redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_timeout=0.2,
+                socket_connect_timeout=0.2
+            )
+        return self._redis
+    
+    def record(self, conn, cursor, statement: str, parameters, executemany: bool, elapsed: float) -> None:
+        try:
+            self._record(conn, cursor, statement, parameters, executemany, elapsed)
+        except Exception as e:
+            # Instrumentation must never fail the query it observed
+            logger.warning(f"Failed to record slow query: {e}")
+    
+    def _record(self, conn, cursor, statement, parameters, executemany, elapsed) -> None:
+        elapsed_ms = round(elapsed * 1000, 2)
+        normalized = normalize_sql(statement)
+        fp = fingerprint(normalized)
+        stats = current_request()
+        route = f"{stats.method} {stats.route}" if stats is not None else "-"
+        shape = json.dumps(parameter_shape(parameters, executemany))
+        
+        logger.warning(f"Slow query {elapsed_ms} ms [{fp}] route={route} params={shape}: {normalized}")
+        
+        plan = None
+        if (
+            settings.SLOW_QUERY_EXPLAIN
+            and conn.dialect.name == "postgresql"
+            and not executemany
+            and normalized.upper().startswith(EXPLAINABLE)
+            and time.monotonic() - self._explained_at.get(fp, -EXPLAIN_INTERVAL) >= EXPLAIN_INTERVAL
+        ):
+            if len(self._explained_at) > 1000:
+                self._explained_at.clear()
+            self._explained_at[fp] = time.monotonic()
+            try:
+                plan = _explain(cursor, statement, parameters)
+            except Exception as e:
+                logger.warning(f"EXPLAIN failed for slow query [{fp}]: {e}")
+        
+        self._start_writer()
+        try:
+            self._queue.put_nowait({
+                "fp": fp,
+                "sql": normalized,
+                "params": shape,
+                "route": route,
+                "elapsed_ms": elapsed_ms,
+                "seen_at": datetime.utcnow().isoformat(),
+                "plan": plan,
+            })
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % QUEUE_SIZE == 1:
+                logger.warning(f"Slow query queue is full, {self.dropped} samples dropped so far")
+    
+    def _start_writer(self) -> None:
+        # Started on first use, so it runs in the worker process, not in a parent
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="slow-query-writer", daemon=True)
+                self._writer.start()
+    
+    def _write_loop(self) -> None:
+        while True:
+            samples = [self._queue.get()]
+            while len(samples) < WRITE_BATCH:
+                try:
+                    samples.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(samples)
+            except Exception as e:
+                logger.warning(f"Failed to store {len(samples)} slow query samples: {e}")
+    
+    def _write(self, samples: List[dict]) -> None:
+        """One pipelined round trip for a batch of samples"""
+        pipe = self.redis.pipeline(transaction=False)
+        for sample in samples:
+            query_key = QUERY_KEY.format(sample["fp"])
+            routes_key = ROUTES_KEY.format(sample["fp"])
+            pipe.zincrby(INDEX_KEY, sample["elapsed_ms"], sample["fp"])
+            pipe.hsetnx(query_key, "sql", sample["sql"])
+            pipe.hset(query_key, mapping={
+                "params": sample["params"],
+                "last_ms": sample["elapsed_ms"],
+                "last_seen": sample["seen_at"],
+            })
+            if sample["plan"] is not None:
+                pipe.hset(query_key, mapping={"plan": sample["plan"], "explained_at": sample["seen_at"]})
+            pipe.hincrby(query_key, "count", 1)
+            pipe.hincrbyfloat(query_key, "total_ms", sample["elapsed_ms"])
+            pipe.zadd(MAX_KEY, {sample["fp"]: sample["elapsed_ms"]}, gt=True)
+            pipe.zincrby(routes_key, 1, sample["route"])
+            pipe.expire(query_key, RETENTION)
+            pipe.expire(routes_key, RETENTION)
+        pipe.expire(INDEX_KEY, RETENTION)
+        pipe.expire(MAX_KEY, RETENTION)
+        pipe.execute()
+    
+    async def top(self, limit: int = 20) -> List[dict]:
+        """Fingerprints with the most total time spent in slow executions"""
+        # Deferred: app.database imports this module through app.metrics
+        from .database import get_redis
+        
+        redis_client = get_redis()
+        entries = await redis_client.zrevrange(INDEX_KEY, 0, limit - 1, withscores=True)
+        if not entries:
+            return []
+        
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for fp, _ in entries:
+                pipe.hgetall(QUERY_KEY.format(fp))
+                pipe.zrevrange(ROUTES_KEY.format(fp), 0, 4, withscores=True)
+                pipe.zscore(MAX_KEY, fp)
+            results = await pipe.execute()
+        
+        report = []
+        for index, (fp, total_ms) in enumerate(entries):
+            query, routes, max_ms = results[3 * index:3 * index + 3]
+            if not query:
+                continue
+            count = int(query.get("count", 0))
+            report.append({
+                "fingerprint": fp,
+                "sql": query.get("sql"),
+                "params": json.loads(query["params"]) if query.get("params") else None,
+                "count": count,
+                "total_ms": round(total_ms, 2),
+                "avg_ms": round(total_ms / count, 2) if count else None,
+                "max_ms": max_ms or 0.0,
+                "last_seen": query.get("last_seen"),
+                "routes": [{"route": route, "count": int(hits)} for route, hits in routes],
+                "plan": query.get("plan"),
+                "explained_at": query.get("explained_at"),
+            })
+        return report
+    
+    async def reset(self) -> int:
+        """Forget all aggregates; returns how many fingerprints were dropped"""
+        from .database import get_redis
+        
+        redis_client = get_redis()
+        fingerprints = await redis_client.zrange(INDEX_KEY, 0, -1)
+        keys = [INDEX_KEY, MAX_KEY]
+        for fp in fingerprints:
+            keys += [QUERY_KEY.format(fp), ROUTES_KEY.format(fp)]
+        await redis_client.delete(*keys)
+        self._explained_at.clear()
+        return len(fingerprints)
+
+
+# Singleton instance
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,42 @@
+import httpx
+
+from ..config import settings
+
+
+# Shared outbound clients, one per upstream, so keep-alive connections are
+# reused across requests instead of a new client (and TLS handshake) per call
+_clients = {}
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    if name == "eskiz":
+        return httpx.AsyncClient(
+            base_url=settings.ESKIZ_URL,
+            timeout=settings.ESKIZ_TIMEOUT
+        )
+    if name == "narakeet":
+        return httpx.AsyncClient(
+            base_url=settings.NARAKEET_URL,
+            timeout=settings.NARAKEET_TIMEOUT
+        )
+    raise KeyError(name)
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """Shared client for an upstream ("eskiz" or "narakeet"), created on first use"""
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = _build_client(name)
+    return client
+
+
+def init_http_clients() -> None:
+    for name in ("eskiz", "narakeet"):
+        get_http_client(name)
+
+
+async def close_http_clients() -> None:
+    """Close every shared client (runs after the server has drained requests)"""
+    while _clients:
+        _, client = _clients.popitem()
+        await client.aclose()
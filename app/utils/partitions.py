@@ -0,0 +1,151 @@
+import gzip
+import logging
+import os
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import DDL, Table, event, text
+from sqlalchemy.orm import Session
+
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table name -> partition column, filled by partition_by_month()
+PARTITIONED_TABLES: Dict[str, str] = {}
+
+
+def partition_by_month(table: Table, column: str) -> None:
+    """Register a table declared with ``postgresql_partition_by="RANGE (column)"``
+    
+    A DEFAULT partition is created together with the table so inserts never
+    fail; monthly partitions are added ahead of time by ensure_partitions().
+    """
+    PARTITIONED_TABLES[table.name] = column
+    event.listen(
+        table,
+        "after_create",
+        DDL(f"CREATE TABLE IF NOT EXISTS {table.name}_default PARTITION OF {table.name} DEFAULT")
+        .execute_if(dialect="postgresql")
+    )
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year}{month.month:02d}"
+
+
+def ensure_partitions(db: Session, months_ahead: int = 3) -> List[str]:
+    """Create monthly partitions from the current month up to ``months_ahead``
+    
+    Rows that already landed in the DEFAULT partition for a new month are
+    moved into it before it is attached. Returns the partitions created.
+    """
+    _require_postgres(db)
+    
+    created = []
+    first = _month_start(date.today())
+    for table, column in PARTITIONED_TABLES.items():
+        for offset in range(months_ahead + 1):
+            start = _add_months(first, offset)
+            name = partition_name(table, start)
+            if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+                continue
+            
+            bounds = {"start": start, "end": _add_months(start, 1)}
+            db.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+            db.execute(text(
+                f"WITH moved AS (DELETE FROM {table}_default "
+                f"WHERE {column} >= :start AND {column} < :end RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ), bounds)
+            db.execute(text(
+                f"ALTER TABLE {table} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+            ))
+            db.commit()
+            created.append(name)
+    
+    return created
+
+
+def list_partitions(db: Session, table: str) -> List[str]:
+    """Monthly partitions of ``table``, oldest first (the DEFAULT one is excluded)"""
+    _require_postgres(db)
+    
+    rows = db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table"
+    ), {"table": table}).scalars()
+    
+    prefix = f"{table}_p"
+    return sorted(name for name in rows if name.startswith(prefix) and name[len(prefix):].isdigit())
+
+
+def partition_month(table: str, name: str) -> date:
+    suffix = name[len(table) + 2:]
+    return date(int(suffix[:4]), int(suffix[4:6]), 1)
+
+
+def export_and_drop_partition(
+    db: Session,
+    table: str,
+    name: str,
+    archive_dir: str,
+    before_drop: Optional[Callable[[Session, str], None]] = None
+) -> dict:
+    """Write a partition to ``archive_dir/<table>/<name>.csv.gz``, then detach and drop it
+    
+    Everything happens in one transaction: the partition is locked against
+    writes and exported while still attached, and ``before_drop``, the
+    DETACH and the DROP only run once the file is complete. If any step
+    fails the transaction rolls back and the partition stays attached, so a
+    rerun picks it up again. The file is written under a temporary name and
+    renamed once complete.
+    """
+    _require_postgres(db)
+    
+    target_dir = os.path.join(archive_dir, table)
+    os.makedirs(target_dir, exist_ok=True)
+    path = os.path.join(target_dir, f"{name}.csv.gz")
+    
+    try:
+        # Reads continue; a late write to an old month waits until the drop
+        db.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+        rows = db.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+        
+        # COPY streams straight from the server without materialising rows in Python
+        cursor = db.connection().connection.cursor()
+        try:
+            with gzip.open(path + ".tmp", "wb") as archive:
+                cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER true)", archive)
+        finally:
+            cursor.close()
+        os.replace(path + ".tmp", path)
+        
+        if before_drop is not None:
+            before_drop(db, name)
+        db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        db.execute(text(f"DROP TABLE {name}"))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    logger.info("Archived %s (%d rows) to %s", name, rows, path)
+    return {"table": table, "partition": name, "rows": rows, "path": path}
+
+
+def _require_postgres(db: Session) -> None:
+    dialect = db.get_bind().dialect.name
+    if dialect != "postgresql":
+        raise RuntimeError(f"Table partitioning requires Postgres, not {dialect}")
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
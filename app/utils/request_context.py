@@ -0,0 +1,43 @@
+from contextvars import ContextVar
+from typing import List, Optional
+
+
+# Statements kept per request when SQL capture is on (profiled requests)
+SQL_CAPTURE_LIMIT = 500
+
+
+class RequestStats:
+    """Per-request counters filled in by instrumentation (DB events, Redis, ...)"""
+    __slots__ = ("method", "_scope", "db_queries", "db_seconds", "sql")
+    
+    def __init__(self, scope: dict):
+        self.method = scope["method"]
+        self._scope = scope
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        # Set to a list to record the statements executed
+        self.sql: Optional[List[dict]] = None
+    
+    @property
+    def route(self) -> str:
+        """Matched route template; the router stores it in the scope once it has matched"""
+        return getattr(self._scope.get("route"), "path", None) or "unmatched"
+
+
+# The same object is visible from the threadpool that runs sync endpoints,
+# because Starlette copies the context into the worker thread
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def start_request(scope: dict):
+    stats = RequestStats(scope)
+    return stats, _current.set(stats)
+
+
+def end_request(token) -> None:
+    _current.reset(token)
+
+
+def current_request() -> Optional[RequestStats]:
+    """Stats of the request being served, or None outside a request (jobs, startup)"""
+    return _current.get()
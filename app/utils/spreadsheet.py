@@ -0,0 +1,97 @@
+import csv
+import io
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+from fastapi import UploadFile, HTTPException, status
+
+
+def iter_upload_rows(file: UploadFile) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Stream (row_number, row) pairs from an uploaded .csv or .xlsx file
+    
+    Header names are lower-cased and stripped; row numbers match what the user
+    sees in the spreadsheet (header is row 1).
+    """
+    extension = Path(file.filename or "").suffix.lower()
+    
+    if extension == ".csv":
+        yield from _iter_csv_rows(file)
+    elif extension in (".xlsx", ".xlsm"):
+        yield from _iter_xlsx_rows(file)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Faqat .csv yoki .xlsx fayllar qabul qilinadi"
+        )
+
+
+def _invalid_file() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Faylni o'qib bo'lmadi: UTF-8 .csv yoki .xlsx fayl yuklang"
+    )
+
+
+def _normalize_header(value) -> str:
+    return str(value or "").strip().lower()
+
+
+def _normalize_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # Excel stores phone numbers typed as numbers as floats
+        value = int(value)
+    return str(value).strip()
+
+
+def _iter_csv_rows(file: UploadFile) -> Iterator[Tuple[int, Dict[str, str]]]:
+    # utf-8-sig drops the BOM Excel writes at the start of "CSV UTF-8" files
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    
+    try:
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [_normalize_header(h) for h in header]
+        
+        for row_number, values in enumerate(reader, start=2):
+            if not any(v.strip() for v in values):
+                continue
+            yield row_number, {
+                column: _normalize_cell(value)
+                for column, value in zip(columns, values)
+            }
+    except (UnicodeDecodeError, csv.Error):
+        # Decoding is lazy, so a non-UTF-8 file can fail on any row
+        raise _invalid_file()
+
+
+def _iter_xlsx_rows(file: UploadFile) -> Iterator[Tuple[int, Dict[str, str]]]:
+    # Imported lazily: openpyxl is only needed by the import endpoints
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+    
+    try:
+        workbook = load_workbook(file.file, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError):
+        raise _invalid_file()
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [_normalize_header(h) for h in header]
+        
+        for row_number, values in enumerate(rows, start=2):
+            if not any(v is not None and str(v).strip() for v in values):
+                continue
+            yield row_number, {
+                column: _normalize_cell(value)
+                for column, value in zip(columns, values)
+            }
+    finally:
+        workbook.close()
@@ -0,0 +1,15 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_insert(db: Session, model):
+    """Return an INSERT construct supporting ON CONFLICT for the session's database
+
+    Postgres is the production target; SQLite is accepted for local development.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"ON CONFLICT inserts are not supported on {dialect}")
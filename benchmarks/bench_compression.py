@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Compression benchmark for word list bodies: size and per-request cost of
+gzip (and br when the Brotli package is installed) compressed on every
+request vs. compressed once and served from the response cache.
+
+    python benchmarks/bench_compression.py [rows ...]
+"""
+import sys
+from datetime import datetime
+
+import common  # noqa: F401  (environment defaults)
+
+REPEAT = 50
+
+
+def word_list_body(rows: int) -> bytes:
+    """A list_words body with realistic definitions and sentences"""
+    from app.utils.json_response import dumps
+    
+    now = datetime.utcnow()
+    return dumps([
+        {"id": i, "word": f"word {i}", "translation": f"so'z {i}",
+         "definition": f"A short definition of word number {i} used in lessons",
+         "sentence": f"This is an example sentence that uses word {i} in context.",
+         "difficulty": "medium", "audio": f"audio/{i}.mp3", "image": None,
+         "lesson_id": 1, "order": i * 1024, "created_at": now}
+        for i in range(rows)
+    ])
+
+
+def main(sizes):
+    import time
+    from app.cache import LocalLRU
+    from app.compression import ENCODINGS, compress
+    
+    local = LocalLRU(16)
+    print(f"{'rows':>6} {'encoding':>9} {'bytes':>10} {'ratio':>6} {'per request':>12} {'cached':>9}")
+    for rows in sizes:
+        body = word_list_body(rows)
+        print(f"{rows:>6} {'identity':>9} {len(body):>10,}")
+        for encoding in ENCODINGS:
+            start = time.perf_counter()
+            for _ in range(REPEAT):
+                compressed = compress(body, encoding)
+            per_request = (time.perf_counter() - start) / REPEAT
+            
+            key = f"{rows}"
+            local.set(key, body, 60)
+            local.variant(key, encoding, lambda body: compress(body, encoding))
+            start = time.perf_counter()
+            for _ in range(REPEAT):
+                local.variant(key, encoding, lambda body: compress(body, encoding))
+            cached = (time.perf_counter() - start) / REPEAT
+            
+            print(
+                f"{rows:>6} {encoding:>9} {len(compressed):>10,} {len(body) / len(compressed):>5.1f}x "
+                f"{per_request * 1000:>9.2f} ms {cached * 1_000_000:>6.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000])
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Course import benchmark: one commit per lesson/word vs. import_course_tree.
+
+    python benchmarks/bench_content_import.py [lessons] [words_per_lesson]
+"""
+import sys
+
+from common import reset_database, create_learning_center, timed
+
+
+def build_tree(lessons: int, words_per_lesson: int, suffix: str = ""):
+    return [
+        {
+            "title": f"Lesson {i}",
+            "content": f"Lesson {i} content{suffix}",
+            "words": [
+                {
+                    "word": f"word-{i}-{j}",
+                    "translation": f"tarjima-{i}-{j}{suffix}",
+                    "definition": None,
+                    "sentence": None,
+                    "difficulty": "easy",
+                }
+                for j in range(words_per_lesson)
+            ],
+        }
+        for i in range(lessons)
+    ]
+
+
+def main(lessons: int = 40, words_per_lesson: int = 30):
+    reset_database()
+    
+    from app.database import SessionLocal
+    from app.models import Course, Lesson, Word, WordDifficulty
+    from app.services import content_service
+    
+    total_words = lessons * words_per_lesson
+    db = SessionLocal()
+    try:
+        center = create_learning_center(db)
+        per_row_course = Course(title="Per-row course", learning_center_id=center.id)
+        bulk_course = Course(title="Bulk course", learning_center_id=center.id)
+        db.add_all([per_row_course, bulk_course])
+        db.commit()
+        
+        with timed(f"per-row create, {total_words} words", total_words):
+            for lesson_position, item in enumerate(build_tree(lessons, words_per_lesson), start=1):
+                lesson = Lesson(
+                    title=item["title"],
+                    content=item["content"],
+                    order=lesson_position,
+                    course_id=per_row_course.id
+                )
+                db.add(lesson)
+                db.commit()
+                for word_position, word_item in enumerate(item["words"], start=1):
+                    db.query(Lesson).filter(Lesson.id == lesson.id).first()
+                    db.add(Word(
+                        lesson_id=lesson.id,
+                        order=word_position,
+                        **dict(word_item, difficulty=WordDifficulty.EASY)
+                    ))
+                    db.commit()
+        
+        with timed(f"import_course_tree, {total_words} new words", total_words):
+            stats = content_service.import_course_tree(
+                db, bulk_course.id, build_tree(lessons, words_per_lesson)
+            )
+        print(stats)
+        
+        with timed(f"import_course_tree, {total_words} unchanged", total_words):
+            stats = content_service.import_course_tree(
+                db, bulk_course.id, build_tree(lessons, words_per_lesson)
+            )
+        print(stats)
+        
+        with timed(f"import_course_tree, {total_words} updated", total_words):
+            stats = content_service.import_course_tree(
+                db, bulk_course.id, build_tree(lessons, words_per_lesson, suffix=" v2")
+            )
+        print(stats)
+        
+        reordered = list(reversed(build_tree(lessons, words_per_lesson, suffix=" v2")))
+        with timed(f"import_course_tree, {lessons} lessons reordered", total_words):
+            stats = content_service.import_course_tree(db, bulk_course.id, reordered)
+        print(stats)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*args)
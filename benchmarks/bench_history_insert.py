@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Insert throughput of the append-only history tables with the current index
+set vs. the previous one (extra single-column indexes whose columns are
+already covered by a composite index prefix).
+
+    python benchmarks/bench_history_insert.py [rows]
+
+On SQLite the tables are plain, so the result only reflects the dropped
+indexes and says nothing about partitioning. With a Postgres DATABASE_URL
+both runs insert into partitioned tables; the cost of partition routing
+itself has not been measured.
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+
+from common import reset_database, create_learning_center, timed
+
+
+BATCH = 1_000
+
+# Indexes dropped from the models, recreated to measure the old layout
+LEGACY_INDEXES = [
+    "CREATE INDEX ix_word_history_student ON word_history (student_id)",
+    "CREATE INDEX ix_word_history_id ON word_history (id)",
+    "CREATE INDEX ix_otp_requests_user_id ON otp_requests (user_id)",
+    "CREATE INDEX ix_otp_requests_ip_address ON otp_requests (ip_address)",
+    "CREATE INDEX ix_otp_requests_created_at ON otp_requests (created_at)",
+    "CREATE INDEX ix_otp_requests_id ON otp_requests (id)",
+]
+
+
+def seed(db, center):
+    from app.models import User, UserRole, Course, Lesson, Word, WordDifficulty
+    
+    students = [
+        User(phone=f"+99891{i:07d}", name=f"Student {i}", role=UserRole.STUDENT,
+             learning_center_id=center.id)
+        for i in range(200)
+    ]
+    db.add_all(students)
+    course = Course(title="Course", learning_center_id=center.id)
+    db.add(course)
+    db.flush()
+    lesson = Lesson(title="Lesson", order=1, course_id=course.id)
+    db.add(lesson)
+    db.flush()
+    words = [
+        Word(word=f"word{i}", translation="t", difficulty=WordDifficulty.EASY,
+             lesson_id=lesson.id, order=i)
+        for i in range(500)
+    ]
+    db.add_all(words)
+    db.commit()
+    return [s.id for s in students], [w.id for w in words]
+
+
+def insert_rows(db, rows, student_ids, word_ids):
+    from sqlalchemy import insert
+    from app.models import WordHistory, OtpRequest
+    
+    start = datetime.utcnow() - timedelta(days=60)
+    for offset in range(0, rows, BATCH):
+        db.execute(insert(WordHistory), [
+            {
+                "student_id": random.choice(student_ids),
+                "word_id": random.choice(word_ids),
+                "is_correct": random.random() < 0.7,
+                "attempted_at": start + timedelta(seconds=offset + i),
+            }
+            for i in range(BATCH)
+        ])
+        db.execute(insert(OtpRequest), [
+            {
+                "user_id": random.choice(student_ids),
+                "phone": "+998900000000",
+                "learning_center_id": 1,
+                "ip_address": f"10.0.{i % 256}.{offset % 256}",
+                "created_at": start + timedelta(seconds=offset + i),
+            }
+            for i in range(BATCH // 10)
+        ])
+        db.commit()
+
+
+def main(rows: int = 200_000):
+    from sqlalchemy import text
+    
+    for legacy in (True, False):
+        random.seed(11)
+        reset_database()
+        
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            center = create_learning_center(db)
+            student_ids, word_ids = seed(db, center)
+            if legacy:
+                for ddl in LEGACY_INDEXES:
+                    db.execute(text(ddl))
+                db.commit()
+            
+            label = "previous indexes" if legacy else "current indexes"
+            total = rows + rows // 10
+            with timed(f"word_history + otp_requests, {label}", total):
+                insert_rows(db, rows, student_ids, word_ids)
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+List serialization benchmark: the previous ORM objects -> response_model ->
+JSON path vs. column projection -> dicts -> orjson (FastJSONResponse), for
+content.list_words, super_admin.list_all_words and admin.list_users.
+
+For each endpoint it checks that both paths produce the same JSON and prints
+serialization-only and query + serialization throughput per list size.
+
+    python benchmarks/bench_json_serialization.py [rows ...]
+"""
+import json
+import sys
+
+from common import reset_database, create_learning_center, timed
+
+REPEAT = 20
+
+
+def seed(db, center, rows: int):
+    from app.models import Course, Lesson, Word, User, UserRole, WordDifficulty
+    
+    course = Course(title="Course", learning_center_id=center.id)
+    db.add(course)
+    db.flush()
+    lesson = Lesson(title="Lesson", order=1, course_id=course.id)
+    db.add(lesson)
+    db.flush()
+    db.execute(Word.__table__.insert(), [
+        {"word": f"word {i}", "translation": f"so'z {i}", "definition": "A definition " * 4,
+         "sentence": "An example sentence using the word.", "difficulty": WordDifficulty.MEDIUM.name,
+         "audio": f"audio/{i}.mp3", "image": None, "lesson_id": lesson.id, "order": i}
+        for i in range(rows)
+    ])
+    db.execute(User.__table__.insert(), [
+        {"phone": f"+99890{i:07d}", "name": f"Student {i}", "role": UserRole.STUDENT.name,
+         "learning_center_id": center.id, "is_active": True, "coins": i, "token_version": 0}
+        for i in range(rows)
+    ])
+    db.commit()
+    return lesson.id
+
+
+def fastapi_body(response_model, content) -> bytes:
+    """What FastAPI does with a returned value: validate, serialize, json.dumps"""
+    from fastapi._compat import ModelField
+    from fastapi.responses import JSONResponse
+    from pydantic.fields import FieldInfo
+    
+    field = ModelField(name="Response", field_info=FieldInfo(annotation=response_model), mode="serialization")
+    value, errors = field.validate(content, {}, loc=("response",))
+    assert not errors, errors
+    return JSONResponse(field.serialize(value, mode="json")).body
+
+
+def endpoints(db, center_id: int, lesson_id: int, rows: int):
+    """(name, response_model, ORM query, projected query) per endpoint"""
+    from typing import List
+    from app.models import Word
+    from app.routers import admin, content, super_admin
+    from app.services import user_service
+    
+    def words(columns):
+        return lambda: db.query(*columns).filter(
+            Word.lesson_id == lesson_id, Word.deleted_at.is_(None)
+        ).order_by(Word.order).limit(rows).all()
+    
+    def users(columns=None):
+        return lambda: user_service.get_users_by_learning_center(
+            db=db, learning_center_id=center_id, limit=rows, columns=columns
+        )
+    
+    return [
+        ("content.list_words", List[content.WordResponse], words([Word]), words(content.WORD_COLUMNS)),
+        ("super_admin.list_all_words", List[super_admin.WordResponse], words([Word]), words(super_admin.WORD_COLUMNS)),
+        ("admin.list_users", List[admin.UserResponse], users(), users(admin.USER_COLUMNS)),
+    ]
+
+
+def main(sizes):
+    from app.database import SessionLocal
+    from app.utils.json_response import FastJSONResponse, rows_to_dicts
+    
+    reset_database()
+    db = SessionLocal()
+    try:
+        center = create_learning_center(db)
+        lesson_id = seed(db, center, max(sizes))
+        
+        for rows in sizes:
+            print(f"\n== {rows} rows (x{REPEAT}) ==")
+            for name, response_model, orm_query, projected_query in endpoints(db, center.id, lesson_id, rows):
+                db.expunge_all()
+                objects = orm_query()
+                projected = projected_query()
+                before = fastapi_body(response_model, objects)
+                after = FastJSONResponse(rows_to_dicts(projected)).body
+                assert json.loads(before) == json.loads(after), f"{name}: bodies differ"
+                
+                print(f"\n{name}:")
+                with timed("  serialize: response_model", rows * REPEAT):
+                    for _ in range(REPEAT):
+                        fastapi_body(response_model, objects)
+                with timed("  serialize: dicts + orjson", rows * REPEAT):
+                    for _ in range(REPEAT):
+                        FastJSONResponse(rows_to_dicts(projected))
+                with timed("  query + serialize: ORM + response_model", rows * REPEAT):
+                    for _ in range(REPEAT):
+                        db.expunge_all()
+                        fastapi_body(response_model, orm_query())
+                with timed("  query + serialize: projection + orjson", rows * REPEAT):
+                    for _ in range(REPEAT):
+                        FastJSONResponse(rows_to_dicts(projected_query()))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000])
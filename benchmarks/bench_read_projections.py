@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Read path benchmark: full ORM entities vs. column-projected rows.
+
+For word lists, a student's lesson progress page, user lists and the
+database-backed auth lookup it reports, per simulated request, the memory
+allocated (tracemalloc peak) and the time spent, at growing result sizes.
+
+    python benchmarks/bench_read_projections.py [rows ...]
+"""
+import sys
+import time
+import tracemalloc
+
+from common import reset_database, create_learning_center
+
+REPEAT = 10
+
+
+def seed(db, center, rows: int):
+    from app.models import Course, Lesson, Word, User, UserRole, WordDifficulty, LessonProgress
+    
+    course = Course(title="Course", learning_center_id=center.id)
+    db.add(course)
+    db.flush()
+    db.execute(Lesson.__table__.insert(), [
+        {"title": f"Lesson {i}", "content": "Lesson text " * 20, "order": i, "course_id": course.id}
+        for i in range(rows)
+    ])
+    lesson_ids = [row.id for row in db.execute(Lesson.__table__.select())]
+    db.execute(Word.__table__.insert(), [
+        {"word": f"word {i}", "translation": f"so'z {i}", "definition": "A definition " * 4,
+         "sentence": "An example sentence using the word.", "difficulty": WordDifficulty.MEDIUM.name,
+         "audio": f"audio/{i}.mp3", "image": None, "lesson_id": lesson_ids[0], "order": i}
+        for i in range(rows)
+    ])
+    db.execute(User.__table__.insert(), [
+        {"phone": f"+99890{i:07d}", "name": f"Student {i}", "role": UserRole.STUDENT.name,
+         "learning_center_id": center.id, "is_active": True, "coins": i, "token_version": 0}
+        for i in range(rows)
+    ])
+    student_id = db.execute(User.__table__.select().limit(1)).first().id
+    db.execute(LessonProgress.__table__.insert(), [
+        {"student_id": student_id, "lesson_id": lesson_id, "best_score": 80, "lesson_attempts": 2}
+        for lesson_id in lesson_ids
+    ])
+    db.commit()
+    return lesson_ids[0], student_id
+
+
+def cases(db, center_id: int, lesson_id: int, student_id: int, rows: int):
+    """(name, full entities, projection) per read path"""
+    from app.models import Lesson, LearningCenter, LessonProgress, User, Word
+    from app.routers import admin, content
+    from app.services import progress_service, user_service
+    from app.utils.json_response import rows_to_dicts
+    
+    def words(columns):
+        return db.query(*columns).filter(
+            Word.lesson_id == lesson_id, Word.deleted_at.is_(None)
+        ).order_by(Word.order).limit(rows).all()
+    
+    def progress_entities():
+        return db.query(LessonProgress, Lesson).join(
+            Lesson, Lesson.id == LessonProgress.lesson_id
+        ).filter(LessonProgress.student_id == student_id).order_by(
+            LessonProgress.updated_at.desc(), LessonProgress.id.desc()
+        ).limit(rows).all()
+    
+    def repeat(lookup):
+        # Fresh session state per lookup, like one lookup per request
+        for _ in range(100):
+            db.expunge_all()
+            lookup()
+    
+    def auth_entities():
+        user = db.query(User).filter(User.id == student_id, User.is_active == True).first()
+        return user, db.query(LearningCenter).filter(LearningCenter.id == user.learning_center_id).first()
+    
+    def auth_projection():
+        return db.query(
+            User.id, User.role, User.learning_center_id, User.token_version, LearningCenter.is_paid
+        ).outerjoin(
+            LearningCenter, LearningCenter.id == User.learning_center_id
+        ).filter(User.id == student_id, User.is_active == True).first()
+    
+    return [
+        ("content.list_words", lambda: words([Word]),
+         lambda: rows_to_dicts(words(content.WORD_COLUMNS))),
+        ("student.get_my_progress", progress_entities,
+         lambda: progress_service.get_lesson_progress_page(db, student_id, limit=rows)),
+        ("admin.list_users",
+         lambda: user_service.get_users_by_learning_center(db, center_id, limit=rows),
+         lambda: rows_to_dicts(user_service.get_users_by_learning_center(
+             db, center_id, limit=rows, columns=admin.USER_COLUMNS
+         ))),
+        ("get_current_user (x100)", lambda: repeat(auth_entities), lambda: repeat(auth_projection)),
+    ]
+
+
+def measure(db, run):
+    """Peak traced memory (KiB) and mean time (ms) of one call; the session starts empty"""
+    db.expunge_all()
+    run()
+    db.expunge_all()
+    
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        db.expunge_all()
+        run()
+    elapsed = (time.perf_counter() - start) / REPEAT
+    db.expunge_all()
+    return peak / 1024, elapsed * 1000
+
+
+def main(sizes):
+    from app.database import SessionLocal
+    
+    reset_database()
+    db = SessionLocal()
+    try:
+        center = create_learning_center(db)
+        lesson_id, student_id = seed(db, center, max(sizes))
+        
+        print(f"{'read path':<28} {'rows':>6} {'entities':>22} {'projection':>22}")
+        for rows in sizes:
+            for name, entities, projection in cases(db, center.id, lesson_id, student_id, rows):
+                before = measure(db, entities)
+                after = measure(db, projection)
+                print(
+                    f"{name:<28} {rows:>6} "
+                    f"{before[0]:>9,.0f} KiB {before[1]:>7.1f} ms "
+                    f"{after[0]:>9,.0f} KiB {after[1]:>7.1f} ms"
+                )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000])
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Soft-delete index benchmark: the previous plain indexes vs. the partial
+"live row" indexes of migration 0009, on tables where most rows are deleted
+or deactivated.
+
+For each index set it prints the plan (EXPLAIN QUERY PLAN on SQLite,
+EXPLAIN on Postgres) and the latency of the hot list/count queries.
+
+    python benchmarks/bench_soft_delete_indexes.py [centers] [deleted_ratio]
+"""
+import random
+import sys
+from datetime import datetime
+
+from common import reset_database, create_learning_center, timed
+
+LESSONS_PER_COURSE = 30
+WORDS_PER_LESSON = 40
+STUDENTS_PER_CENTER = 600
+GROUPS_PER_CENTER = 40
+REPEAT = 500
+
+# name, table, columns (what the models declared before 0009)
+OLD_INDEXES = [
+    ("ix_word_lesson", "words", ["lesson_id"]),
+    ("ix_word_lesson_order", "words", ["lesson_id", "order"]),
+    ("ix_lesson_course", "lessons", ["course_id"]),
+    ("ix_course_learning_center", "courses", ["learning_center_id"]),
+    ("ix_group_learning_center", "groups", ["learning_center_id"]),
+    ("ix_group_teacher", "groups", ["teacher_id"]),
+    ("ix_user_learning_center", "users", ["learning_center_id"]),
+]
+NEW_INDEXES = [
+    "ix_word_lesson_order_live",
+    "ix_lesson_course_order_live",
+    "ix_course_center_live",
+    "ix_group_center_live",
+    "ix_group_teacher_live",
+    "ix_user_center_role_active",
+    "ix_user_center_role_live",
+]
+
+
+def seed(engine, centers: int, deleted_ratio: float):
+    """Bulk insert through Core; returns ids to query for"""
+    from app.database import SessionLocal
+    from app.models import Course, Lesson, Word, User, Group, UserRole, WordDifficulty
+    
+    now = datetime.utcnow()
+    
+    def deleted():
+        return now if random.random() < deleted_ratio else None
+    
+    db = SessionLocal()
+    try:
+        center_ids = [
+            create_learning_center(db, name=f"Center {i}", phone=f"+99890{i:07d}").id
+            for i in range(centers)
+        ]
+    finally:
+        db.close()
+    
+    with engine.begin() as conn:
+        # Every center keeps a few courses and replaced many more over time
+        conn.execute(Course.__table__.insert(), [
+            {"title": f"Course {c}-{i}", "learning_center_id": center_id,
+             "is_active": True, "deleted_at": None if i < 3 else deleted() or now}
+            for c, center_id in enumerate(center_ids)
+            for i in range(12)
+        ])
+        course_ids = [row.id for row in conn.execute(
+            Course.__table__.select().where(Course.__table__.c.deleted_at.is_(None))
+        )]
+        
+        conn.execute(Lesson.__table__.insert(), [
+            {"title": f"Lesson {i}", "order": i, "course_id": course_id, "deleted_at": deleted()}
+            for course_id in course_ids
+            for i in range(LESSONS_PER_COURSE)
+        ])
+        lesson_ids = [row.id for row in conn.execute(Lesson.__table__.select())]
+        
+        words = Word.__table__.insert()
+        batch = []
+        for lesson_id in lesson_ids:
+            for i in range(WORDS_PER_LESSON):
+                batch.append({"word": f"w{i}", "translation": f"t{i}", "difficulty": WordDifficulty.EASY.name,
+                              "lesson_id": lesson_id, "order": i, "deleted_at": deleted()})
+            if len(batch) >= 20_000:
+                conn.execute(words, batch)
+                batch = []
+        if batch:
+            conn.execute(words, batch)
+        
+        conn.execute(User.__table__.insert(), [
+            {"phone": f"+998{c:03d}{i:06d}", "name": f"User {i}", "learning_center_id": center_id,
+             "role": (UserRole.TEACHER if i % 30 == 0 else UserRole.STUDENT).name,
+             "is_active": random.random() >= deleted_ratio, "deleted_at": deleted(),
+             "coins": 0, "token_version": 0}
+            for c, center_id in enumerate(center_ids)
+            for i in range(STUDENTS_PER_CENTER)
+        ])
+        teachers = {}
+        for row in conn.execute(
+            User.__table__.select().where(User.__table__.c.role == UserRole.TEACHER.name)
+        ):
+            teachers.setdefault(row.learning_center_id, []).append(row.id)
+        
+        conn.execute(Group.__table__.insert(), [
+            {"name": f"Group {i}", "learning_center_id": center_id, "course_id": course_ids[0],
+             "teacher_id": teachers[center_id][i % len(teachers[center_id])], "deleted_at": deleted()}
+            for center_id in center_ids
+            for i in range(GROUPS_PER_CENTER)
+        ])
+    
+    center_id = center_ids[len(center_ids) // 2]
+    return {
+        "center_id": center_id,
+        "course_id": course_ids[len(course_ids) // 2],
+        "lesson_id": lesson_ids[len(lesson_ids) // 2],
+        "teacher_id": teachers[center_id][0],
+    }
+
+
+def queries(ids):
+    """The statements behind the content lists, user limits and group lists"""
+    from sqlalchemy import func, select
+    from app.models import Course, Lesson, Word, User, Group, UserRole
+    
+    return {
+        "words of a lesson": select(Word.id, Word.word, Word.order).where(
+            Word.lesson_id == ids["lesson_id"], Word.deleted_at.is_(None)
+        ).order_by(Word.order),
+        "lessons of a course with word count": select(
+            Lesson.id, Lesson.title, func.count(Word.id)
+        ).outerjoin(Word, (Word.lesson_id == Lesson.id) & (Word.deleted_at.is_(None))).where(
+            Lesson.course_id == ids["course_id"], Lesson.deleted_at.is_(None)
+        ).group_by(Lesson.id).order_by(Lesson.order),
+        "courses of a center": select(Course.id, Course.title).where(
+            Course.learning_center_id == ids["center_id"],
+            Course.is_active == True,
+            Course.deleted_at.is_(None)
+        ),
+        "active students of a center (limit)": select(func.count(User.id)).where(
+            User.learning_center_id == ids["center_id"],
+            User.role == UserRole.STUDENT,
+            User.is_active == True
+        ),
+        "groups of a center": select(Group.id, Group.name).where(
+            Group.learning_center_id == ids["center_id"], Group.deleted_at.is_(None)
+        ),
+        "groups of a teacher": select(Group.id, Group.name).where(
+            Group.teacher_id == ids["teacher_id"], Group.deleted_at.is_(None)
+        ),
+    }
+
+
+def use_old_indexes(engine):
+    from sqlalchemy import Index, text
+    from app.database import Base
+    
+    with engine.begin() as conn:
+        for name in NEW_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for name, table, columns in OLD_INDEXES:
+            table = Base.metadata.tables[table]
+            Index(name, *(table.c[column] for column in columns)).create(conn)
+        conn.execute(text("ANALYZE"))
+
+
+def use_new_indexes(engine):
+    from sqlalchemy import text
+    from app.database import Base
+    
+    with engine.begin() as conn:
+        for name, _, _ in OLD_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in NEW_INDEXES:
+                    index.create(conn)
+        conn.execute(text("ANALYZE"))
+
+
+def report(engine, label, statements):
+    from sqlalchemy import text
+    
+    explain = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+    print(f"\n== {label} ==")
+    with engine.connect() as conn:
+        for name, statement in statements.items():
+            sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = conn.execute(text(f"{explain} {sql}")).all()
+            print(f"\n{name}:")
+            for row in plan:
+                print("    " + str(row[-1] if engine.dialect.name == "sqlite" else row[0]))
+        print()
+        for name, statement in statements.items():
+            conn.execute(statement).all()
+            with timed(f"{name} (x{REPEAT})"):
+                for _ in range(REPEAT):
+                    conn.execute(statement).all()
+
+
+def main(centers: int = 30, deleted_ratio: float = 0.8):
+    random.seed(7)
+    engine = reset_database()
+    
+    with timed(f"seed {centers} centers, {deleted_ratio:.0%} deleted"):
+        ids = seed(engine, centers, deleted_ratio)
+    statements = queries(ids)
+    
+    use_old_indexes(engine)
+    report(engine, "plain indexes (before 0009)", statements)
+    
+    use_new_indexes(engine)
+    report(engine, "partial live-row indexes (0009)", statements)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 30, float(args[1]) if len(args) > 1 else 0.8)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Worker startup cost: time to import app.main in a fresh interpreter, time to
+run the lifespan startup, and latency of the first and second request.
+
+    python benchmarks/bench_startup.py [runs]
+
+Every run uses a new Python process, as a new uvicorn worker would.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import common  # noqa: F401  (sets the default environment)
+
+
+CHILD = r"""
+import json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+client = TestClient(app.main.app)
+client.__enter__()
+started = time.perf_counter()
+
+client.get("/health")
+first = time.perf_counter()
+client.get("/health")
+second = time.perf_counter()
+client.__exit__(None, None, None)
+
+print(json.dumps({
+    "import app.main": imported - start,
+    "lifespan startup": started - imported,
+    "first request": first - started,
+    "second request": second - first,
+    "modules loaded": len(__import__("sys").modules),
+}))
+"""
+
+
+def run_once(root: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        cwd=root,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    
+    results = [run_once(root) for _ in range(runs)]
+    
+    print(f"median of {runs} fresh processes")
+    for key in results[0]:
+        values = [result[key] for result in results]
+        if key == "modules loaded":
+            print(f"{key:<48} {statistics.median(values):10.0f}")
+        else:
+            print(f"{key:<48} {statistics.median(values) * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Student import benchmark: per-user create_user calls vs. the bulk import path.
+
+    python benchmarks/bench_student_import.py [rows]
+"""
+import sys
+
+from common import reset_database, create_learning_center, timed
+
+
+def main(rows: int = 10_000):
+    reset_database()
+    
+    from app.database import SessionLocal
+    from app.models import UserRole
+    from app.services import user_service
+    
+    db = SessionLocal()
+    try:
+        center = create_learning_center(db)
+        one_by_one = min(rows, 1_000)
+        
+        with timed(f"user_service.create_user x {one_by_one}", one_by_one):
+            for i in range(one_by_one):
+                user_service.create_user(
+                    db=db,
+                    phone=f"+99890{i:07d}",
+                    name=f"Student {i}",
+                    role=UserRole.STUDENT,
+                    learning_center_id=center.id
+                )
+        
+        import_rows = (
+            (row_number, {"phone": f"+99891{i:07d}", "name": f"Student {i}"})
+            for row_number, i in enumerate(range(rows), start=2)
+        )
+        with timed(f"user_service.import_students x {rows}", rows):
+            report = user_service.import_students(
+                db=db,
+                learning_center_id=center.id,
+                rows=import_rows
+            )
+        print(f"created={report['created']} failed={report['failed']}")
+        
+        # Re-importing the same file exercises the set-based duplicate check
+        import_rows = (
+            (row_number, {"phone": f"+99891{i:07d}", "name": f"Student {i}"})
+            for row_number, i in enumerate(range(rows), start=2)
+        )
+        with timed(f"re-import {rows} duplicates", rows):
+            report = user_service.import_students(
+                db=db,
+                learning_center_id=center.id,
+                rows=import_rows
+            )
+        print(f"created={report['created']} failed={report['failed']}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
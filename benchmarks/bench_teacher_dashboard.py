@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Teacher dashboard benchmark. The per-student and per-lesson summaries are
+timed both ways: aggregated live from lesson_progress and read from the
+precomputed aggregates. The student x lesson matrix is read from
+lesson_progress either way, so the full get_group_progress call is timed
+separately.
+
+    python benchmarks/bench_teacher_dashboard.py
+"""
+import random
+
+from common import reset_database, create_learning_center, timed
+
+LESSONS = 40
+GROUP_SIZES = (30, 100, 300)
+REPEAT = 20
+
+
+def seed(db, center, group_size, lessons):
+    from app.models import User, UserRole, Group, GroupStudent, LessonProgress
+    from app.services import progress_service
+    
+    teacher = User(phone=f"t{group_size}", name="Teacher", role=UserRole.TEACHER,
+                   learning_center_id=center.id)
+    db.add(teacher)
+    db.flush()
+    group = Group(name=f"Group {group_size}", learning_center_id=center.id,
+                  course_id=lessons[0].course_id, teacher_id=teacher.id)
+    db.add(group)
+    db.flush()
+    
+    students = [
+        User(phone=f"{group_size}-{i}", name=f"Student {i}", role=UserRole.STUDENT,
+             learning_center_id=center.id)
+        for i in range(group_size)
+    ]
+    db.add_all(students)
+    db.flush()
+    db.add_all([GroupStudent(group_id=group.id, student_id=s.id) for s in students])
+    db.add_all([
+        LessonProgress(student_id=s.id, lesson_id=lesson.id,
+                       best_score=random.randint(40, 100),
+                       lesson_attempts=random.randint(1, 5))
+        for s in students
+        for lesson in lessons
+        if random.random() < 0.7
+    ])
+    db.commit()
+    progress_service.rebuild_aggregates(db)
+    db.commit()
+    return group
+
+
+def live_summaries(db, group):
+    """The summaries the endpoint would compute without the aggregate tables"""
+    from sqlalchemy import func
+    from app.models import User, Lesson, GroupStudent, LessonProgress
+    
+    per_student = db.query(
+        User.id, User.name, User.coins,
+        func.count(LessonProgress.id),
+        func.sum(LessonProgress.lesson_attempts),
+        func.avg(LessonProgress.best_score)
+    ).join(GroupStudent, GroupStudent.student_id == User.id).outerjoin(
+        LessonProgress, LessonProgress.student_id == User.id
+    ).outerjoin(Lesson, Lesson.id == LessonProgress.lesson_id).filter(
+        GroupStudent.group_id == group.id,
+        (Lesson.course_id == group.course_id) | (Lesson.id.is_(None))
+    ).group_by(User.id).all()
+    
+    per_lesson = db.query(
+        Lesson.id,
+        func.count(LessonProgress.id),
+        func.sum(LessonProgress.lesson_attempts),
+        func.avg(LessonProgress.best_score)
+    ).outerjoin(LessonProgress, LessonProgress.lesson_id == Lesson.id).outerjoin(
+        GroupStudent,
+        (GroupStudent.student_id == LessonProgress.student_id) & (GroupStudent.group_id == group.id)
+    ).filter(Lesson.course_id == group.course_id).group_by(Lesson.id).all()
+    
+    return per_student, per_lesson
+
+
+def aggregate_summaries(db, group):
+    """The same summaries read from group_lesson_stats and student_course_stats"""
+    from app.models import GroupStudent, GroupLessonStats, StudentCourseStats
+    
+    per_student = db.query(StudentCourseStats).join(
+        GroupStudent, GroupStudent.student_id == StudentCourseStats.student_id
+    ).filter(
+        GroupStudent.group_id == group.id,
+        StudentCourseStats.course_id == group.course_id
+    ).all()
+    
+    per_lesson = db.query(GroupLessonStats).filter(GroupLessonStats.group_id == group.id).all()
+    
+    return per_student, per_lesson
+
+
+def main():
+    random.seed(7)
+    reset_database()
+    
+    from app.database import SessionLocal
+    from app.models import Course, Lesson
+    from app.services import progress_service
+    
+    db = SessionLocal()
+    try:
+        center = create_learning_center(db)
+        course = Course(title="Course", learning_center_id=center.id)
+        db.add(course)
+        db.flush()
+        lessons = [Lesson(title=f"Lesson {i}", order=i, course_id=course.id) for i in range(LESSONS)]
+        db.add_all(lessons)
+        db.commit()
+        
+        for group_size in GROUP_SIZES:
+            group = seed(db, center, group_size, lessons)
+            db.expire_all()
+            
+            with timed(f"summaries, live joins, {group_size} students x {LESSONS} lessons (x{REPEAT})"):
+                for _ in range(REPEAT):
+                    live_summaries(db, group)
+            
+            with timed(f"summaries, aggregates, {group_size} students x {LESSONS} lessons (x{REPEAT})"):
+                for _ in range(REPEAT):
+                    aggregate_summaries(db, group)
+            
+            with timed(f"get_group_progress incl. matrix, {group_size} students (x{REPEAT})"):
+                for _ in range(REPEAT):
+                    progress_service.get_group_progress(db, group)
+        
+        with timed("record_lesson_completion x 200 (write cost)", 200):
+            from app.models import GroupStudent
+            member = db.query(GroupStudent).first()
+            for i in range(200):
+                progress_service.record_lesson_completion(
+                    db, member.student_id, lessons[i % LESSONS].id, score=i % 100
+                )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
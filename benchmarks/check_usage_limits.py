@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Concurrency check for the usage counters: many threads create students in
+one center at the same time and the student limit must still hold.
+
+The same load is run against the previous count()-then-insert check, which
+can overshoot the limit. Exits with status 1 if the counters let the limit
+slip. Use a Postgres DATABASE_URL for the most realistic race.
+
+    python benchmarks/check_usage_limits.py [limit] [attempts] [threads]
+"""
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from common import reset_database, create_learning_center, timed
+
+
+def count_then_insert(db, center_id, phone):
+    """The limit check create_user did before the counters"""
+    from fastapi import HTTPException
+    from app.models import LearningCenter, User, UserRole
+    
+    center = db.get(LearningCenter, center_id)
+    student_count = db.query(User).filter(
+        User.learning_center_id == center_id,
+        User.role == UserRole.STUDENT,
+        User.is_active == True
+    ).count()
+    if student_count >= center.student_limit:
+        raise HTTPException(status_code=400, detail="Student limit reached for this learning center")
+    db.add(User(phone=phone, name=phone, role=UserRole.STUDENT, learning_center_id=center_id))
+    db.commit()
+
+
+def counter_create(db, center_id, phone):
+    from app.models import UserRole
+    from app.services import user_service
+    
+    user_service.create_user(db, phone=phone, name=phone, role=UserRole.STUDENT, learning_center_id=center_id)
+
+
+def race(label, create, center_id, attempts, threads):
+    from fastapi import HTTPException
+    from app.database import SessionLocal
+    from app.models import LearningCenter, User, UserRole
+    
+    start = threading.Barrier(threads)
+    outcome = {"created": 0, "rejected": 0, "errors": 0}
+    lock = threading.Lock()
+    
+    def worker(worker_id):
+        start.wait()
+        for attempt in range(worker_id, attempts, threads):
+            db = SessionLocal()
+            try:
+                create(db, center_id, f"+998{center_id:03d}{attempt:06d}")
+                key = "created"
+            except HTTPException:
+                db.rollback()
+                key = "rejected"
+            except Exception:
+                # e.g. "database is locked" on SQLite
+                db.rollback()
+                key = "errors"
+            finally:
+                db.close()
+            with lock:
+                outcome[key] += 1
+    
+    with timed(f"{label}: {attempts} creates on {threads} threads"):
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(worker, range(threads)))
+    
+    db = SessionLocal()
+    try:
+        center = db.get(LearningCenter, center_id)
+        stored = db.query(User).filter(
+            User.learning_center_id == center_id,
+            User.role == UserRole.STUDENT,
+            User.is_active == True
+        ).count()
+        verdict = "OK" if stored <= center.student_limit else "LIMIT EXCEEDED"
+        print(
+            f"    limit {center.student_limit}, created {outcome['created']}, rejected {outcome['rejected']}, "
+            f"errors {outcome['errors']}, rows {stored}, counter {center.student_count}  -> {verdict}"
+        )
+        return stored <= center.student_limit and stored == center.student_count
+    finally:
+        db.close()
+
+
+def main(limit: int = 50, attempts: int = 400, threads: int = 16):
+    reset_database()
+    
+    from app.database import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        before = create_learning_center(db, name="count() check", phone="+998900000001", student_limit=limit).id
+        after = create_learning_center(db, name="usage counters", phone="+998900000002", student_limit=limit).id
+    finally:
+        db.close()
+    
+    race("count() check (before)", count_then_insert, before, attempts, threads)
+    held = race("usage counters", counter_create, after, attempts, threads)
+    return 0 if held else 1
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    sys.exit(main(*args))
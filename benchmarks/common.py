@@ -0,0 +1,68 @@
+"""
+Shared setup for the benchmark scripts.
+
+Benchmarks run against DATABASE_URL when it is set (use a disposable Postgres
+database for representative numbers) and fall back to a throwaway SQLite file.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_DEFAULT_ENV = {
+    "SECRET_KEY": "benchmark-secret",
+    "DATABASE_URL": "sqlite:////tmp/edu_tizim_benchmark.db",
+    "REDIS_URL": "redis://localhost:6379/15",
+    "SUPER_ADMIN_EMAIL": "bench@example.com",
+    "SUPER_ADMIN_PASSWORD": "bench",
+    "STORAGE_PATH": "/tmp/edu_tizim_benchmark_storage",
+    "ESKIZ_URL": "http://localhost",
+    "ESKIZ_EMAIL": "bench@example.com",
+    "ESKIZ_PASSWORD": "bench",
+    "ESKIZ_WEBHOOK_URL": "",
+    "NARAKEET": "bench",
+    "SLOW_QUERY_MS": "0",  # lock waits are expected here; keep them out of Redis
+}
+
+for _key, _value in _DEFAULT_ENV.items():
+    os.environ.setdefault(_key, _value)
+
+
+def reset_database():
+    """Drop and recreate every table in the benchmark database"""
+    from app.database import Base, engine
+    import app.models  # noqa: F401  (registers all tables)
+    
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def create_learning_center(db, **overrides):
+    from app.models import LearningCenter
+    
+    values = dict(
+        name="Benchmark Center",
+        phone="+998900000000",
+        student_limit=1_000_000,
+        teacher_limit=1_000,
+        group_limit=10_000,
+        is_paid=True,
+    )
+    values.update(overrides)
+    center = LearningCenter(**values)
+    db.add(center)
+    db.commit()
+    db.refresh(center)
+    return center
+
+
+@contextmanager
+def timed(label: str, rows: int = None):
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    rate = f"  ({rows / elapsed:,.0f} rows/s)" if rows else ""
+    print(f"{label:<48} {elapsed * 1000:10.1f} ms{rate}")
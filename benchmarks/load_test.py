@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Load test comparing server configurations.
+
+Each configuration is a set of run_prod.py flags. The script starts the
+server with them, waits for /health, keeps CONCURRENCY keep-alive
+connections busy for DURATION seconds on the given paths and reports
+requests/s, latency percentiles and errors. The server is stopped before
+the next configuration starts.
+
+    python benchmarks/load_test.py \
+        --config "--workers 1 --loop asyncio --http h11" \
+        --config "--workers 4" \
+        --path /health/live --path /api/v1/content/courses --token <access token>
+
+Run it against the production database engine (Postgres and Redis from the
+environment); numbers from SQLite say little about a multi-worker setup.
+With --url the script skips starting servers and measures a running one.
+"""
+import argparse
+import asyncio
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 8011
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("server did not become ready")
+
+
+async def run_load(url: str, paths, headers: dict, concurrency: int, duration: float) -> dict:
+    """Closed-loop load: every connection sends its next request as soon as the last one returns"""
+    latencies = []
+    statuses = {}
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=30.0) as client:
+        await wait_ready(client)
+        deadline = time.monotonic() + duration
+        
+        async def connection(index: int):
+            nonlocal errors
+            request = index
+            while time.monotonic() < deadline:
+                path = paths[request % len(paths)]
+                request += 1
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        
+        started = time.monotonic()
+        await asyncio.gather(*(connection(i) for i in range(concurrency)))
+        elapsed = time.monotonic() - started
+    
+    latencies.sort()
+    
+    def percentile(p: float) -> float:
+        return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else 0.0
+    
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "mean": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "errors": errors,
+        "statuses": statuses,
+    }
+
+
+def start_server(config: str) -> subprocess.Popen:
+    command = [sys.executable, os.path.join(ROOT, "run_prod.py"), "--port", str(PORT)] + shlex.split(config)
+    return subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def report(label: str, result: dict) -> None:
+    statuses = ", ".join(f"{code}: {count}" for code, count in sorted(result["statuses"].items()))
+    print(
+        f"{label:<44} {result['rps']:>9,.0f} req/s  "
+        f"p50 {result['p50']:>7.1f}  p95 {result['p95']:>7.1f}  p99 {result['p99']:>7.1f} ms  "
+        f"errors {result['errors']}  [{statuses}]"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare server configurations under load")
+    parser.add_argument("--config", action="append", help="run_prod.py flags for one configuration")
+    parser.add_argument("--url", help="measure an already running server instead")
+    parser.add_argument("--path", action="append", help="paths to request in turn (default /health/live)")
+    parser.add_argument("--token", help="Bearer token sent with every request")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    args = parser.parse_args()
+    
+    paths = args.path or ["/health/live"]
+    headers = {"Accept-Encoding": "gzip"}
+    if args.token:
+        headers["Authorization"] = f"Bearer {args.token}"
+    
+    def measure(url: str) -> dict:
+        asyncio.run(run_load(url, paths, headers, args.concurrency, args.warmup))
+        return asyncio.run(run_load(url, paths, headers, args.concurrency, args.duration))
+    
+    print(f"{args.concurrency} connections, {args.duration:.0f}s, paths: {' '.join(paths)}\n")
+    if args.url:
+        report(args.url, measure(args.url))
+        return
+    
+    for config in args.config or ["--workers 1 --loop asyncio --http h11", ""]:
+        process = start_server(config)
+        try:
+            report(config or "(defaults)", measure(f"http://127.0.0.1:{PORT}"))
+        finally:
+            stop_server(process)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Baseline schema
+
+Creates every table as create_all() did before the switch to migrations.
+Databases that were created by create_all() at that point already have
+this schema: mark them with `alembic stamp 0001`, then upgrade to head.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 20:52:40.492223
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _is_postgres() -> bool:
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    op.create_table(
+        'learning_centers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('logo', sa.String(), nullable=True),
+        sa.Column('phone', sa.String(), nullable=False),
+        sa.Column('student_limit', sa.Integer(), nullable=False),
+        sa.Column('teacher_limit', sa.Integer(), nullable=False),
+        sa.Column('group_limit', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('is_paid', sa.Boolean(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_learning_centers_id', 'learning_centers', ['id'])
+    
+    op.create_table(
+        'courses',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('learning_center_id', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['learning_center_id'], ['learning_centers.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_course_learning_center', 'courses', ['learning_center_id'])
+    op.create_index('ix_courses_id', 'courses', ['id'])
+    
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('phone', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('role', sa.Enum('ADMIN', 'TEACHER', 'STUDENT', name='userrole'), nullable=False),
+        sa.Column('learning_center_id', sa.Integer(), nullable=False),
+        sa.Column('coins', sa.Integer(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['learning_center_id'], ['learning_centers.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_user_learning_center', 'users', ['learning_center_id'])
+    op.create_index('ix_user_phone_center', 'users', ['phone', 'learning_center_id'])
+    op.create_index('ix_users_id', 'users', ['id'])
+    
+    op.create_table(
+        'groups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('learning_center_id', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('teacher_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+        sa.ForeignKeyConstraint(['learning_center_id'], ['learning_centers.id'], ),
+        sa.ForeignKeyConstraint(['teacher_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_group_course', 'groups', ['course_id'])
+    op.create_index('ix_group_learning_center', 'groups', ['learning_center_id'])
+    op.create_index('ix_group_teacher', 'groups', ['teacher_id'])
+    op.create_index('ix_groups_id', 'groups', ['id'])
+    
+    op.create_table(
+        'leaderboard',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('learning_center_id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('total_coins', sa.Integer(), nullable=True),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['learning_center_id'], ['learning_centers.id'], ),
+        sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_leaderboard_center_rank', 'leaderboard', ['learning_center_id', 'rank'])
+    op.create_index('ix_leaderboard_id', 'leaderboard', ['id'])
+    op.create_index('ix_leaderboard_learning_center', 'leaderboard', ['learning_center_id'])
+    op.create_index('ix_leaderboard_student', 'leaderboard', ['student_id'], unique=True)
+    
+    op.create_table(
+        'lessons',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('order', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_lesson_course', 'lessons', ['course_id'])
+    op.create_index('ix_lessons_id', 'lessons', ['id'])
+    
+    op.create_table(
+        'otp_requests',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('phone', sa.String(length=20), nullable=False),
+        sa.Column('learning_center_id', sa.Integer(), nullable=False),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['learning_center_id'], ['learning_centers.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_otp_requests_created_at', 'otp_requests', ['created_at'])
+    op.create_index('ix_otp_requests_id', 'otp_requests', ['id'])
+    op.create_index('ix_otp_requests_ip_address', 'otp_requests', ['ip_address'])
+    op.create_index('ix_otp_requests_phone', 'otp_requests', ['phone'])
+    op.create_index('ix_otp_requests_user_id', 'otp_requests', ['user_id'])
+    
+    op.create_table(
+        'coin_transactions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('lesson_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Integer(), nullable=False),
+        sa.Column('transaction_type', sa.Enum('LESSON_SCORE', 'BONUS', 'PENALTY', name='transactiontype'), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['lesson_id'], ['lessons.id'], ),
+        sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_coin_transaction_created', 'coin_transactions', ['created_at'])
+    op.create_index('ix_coin_transaction_lesson', 'coin_transactions', ['lesson_id'])
+    op.create_index('ix_coin_transaction_student', 'coin_transactions', ['student_id'])
+    op.create_index('ix_coin_transactions_id', 'coin_transactions', ['id'])
+    
+    op.create_table(
+        'group_students',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('joined_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+        sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_group_student_group', 'group_students', ['group_id'])
+    op.create_index('ix_group_student_student', 'group_students', ['student_id'])
+    op.create_index('ix_group_student_unique', 'group_students', ['group_id', 'student_id'], unique=True)
+    op.create_index('ix_group_students_id', 'group_students', ['id'])
+    
+    op.create_table(
+        'lesson_progress',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('lesson_id', sa.Integer(), nullable=False),
+        sa.Column('best_score', sa.Integer(), nullable=True),
+        sa.Column('total_coins_earned', sa.Integer(), nullable=True),
+        sa.Column('lesson_attempts', sa.Integer(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['lesson_id'], ['lessons.id'], ),
+        sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_lesson_progress_id', 'lesson_progress', ['id'])
+    op.create_index('ix_lesson_progress_lesson', 'lesson_progress', ['lesson_id'])
+    op.create_index('ix_lesson_progress_student', 'lesson_progress', ['student_id'])
+    op.create_index('ix_lesson_progress_student_lesson', 'lesson_progress', ['student_id', 'lesson_id'], unique=True)
+    
+    op.create_table(
+        'words',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('word', sa.String(), nullable=False),
+        sa.Column('translation', sa.String(), nullable=False),
+        sa.Column('definition', sa.Text(), nullable=True),
+        sa.Column('sentence', sa.String(), nullable=True),
+        sa.Column('difficulty', sa.Enum('EASY', 'MEDIUM', 'HARD', name='worddifficulty'), nullable=False),
+        sa.Column('audio', sa.String(), nullable=True),
+        sa.Column('image', sa.String(), nullable=True),
+        sa.Column('lesson_id', sa.Integer(), nullable=False),
+        sa.Column('order', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['lesson_id'], ['lessons.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_word_lesson', 'words', ['lesson_id'])
+    op.create_index('ix_word_lesson_order', 'words', ['lesson_id', 'order'])
+    op.create_index('ix_words_id', 'words', ['id'])
+    
+    op.create_table(
+        'word_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('word_id', sa.Integer(), nullable=False),
+        sa.Column('is_correct', sa.Boolean(), nullable=False),
+        sa.Column('attempted_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['word_id'], ['words.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_word_history_id', 'word_history', ['id'])
+    op.create_index('ix_word_history_student', 'word_history', ['student_id'])
+    op.create_index('ix_word_history_student_word', 'word_history', ['student_id', 'word_id'])
+    op.create_index('ix_word_history_word', 'word_history', ['word_id'])
+
+
+def downgrade() -> None:
+    op.drop_table('word_history')
+    op.drop_table('words')
+    op.drop_table('lesson_progress')
+    op.drop_table('group_students')
+    op.drop_table('coin_transactions')
+    op.drop_table('otp_requests')
+    op.drop_table('lessons')
+    op.drop_table('leaderboard')
+    op.drop_table('groups')
+    op.drop_table('users')
+    op.drop_table('courses')
+    op.drop_table('learning_centers')
+    
+    if _is_postgres():
+        for enum_type in ('transactiontype', 'worddifficulty', 'userrole'):
+            op.execute(f"DROP TYPE IF EXISTS {enum_type}")
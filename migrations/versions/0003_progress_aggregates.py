@@ -0,0 +1,63 @@
+"""Progress aggregates for the teacher dashboard
+
+Adds group_lesson_stats (per group and lesson) and student_course_stats
+(per student and course). Both are maintained incrementally from here on;
+fill them from existing progress with
+`python -m app.jobs.rebuild_progress_stats` before the release starts.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 23:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'group_lesson_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('lesson_id', sa.Integer(), nullable=False),
+        sa.Column('students_completed', sa.Integer(), nullable=False),
+        sa.Column('total_attempts', sa.Integer(), nullable=False),
+        sa.Column('score_sum', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+        sa.ForeignKeyConstraint(['lesson_id'], ['lessons.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_group_lesson_stats_group_lesson', 'group_lesson_stats', ['group_id', 'lesson_id'], unique=True)
+    op.create_index('ix_group_lesson_stats_id', 'group_lesson_stats', ['id'])
+    
+    op.create_table(
+        'student_course_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('lessons_completed', sa.Integer(), nullable=False),
+        sa.Column('total_attempts', sa.Integer(), nullable=False),
+        sa.Column('score_sum', sa.Integer(), nullable=False),
+        sa.Column('last_activity_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+        sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_student_course_stats_course', 'student_course_stats', ['course_id'])
+    op.create_index('ix_student_course_stats_id', 'student_course_stats', ['id'])
+    op.create_index('ix_student_course_stats_student_course', 'student_course_stats', ['student_id', 'course_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table('student_course_stats')
+    op.drop_table('group_lesson_stats')
@@ -0,0 +1,56 @@
+"""Per-word attempt counters
+
+Adds word_stats (lifetime attempts and correct answers per word) and
+word_daily_stats (the same per word and day, for the rolling windows of
+the hardest-words ranking). They count attempts recorded from here on.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 23:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'word_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('word_id', sa.Integer(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('correct', sa.Integer(), nullable=False),
+        sa.Column('last_attempt_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['word_id'], ['words.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_word_stats_id', 'word_stats', ['id'])
+    op.create_index('ix_word_stats_word', 'word_stats', ['word_id'], unique=True)
+    
+    op.create_table(
+        'word_daily_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('word_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('correct', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['word_id'], ['words.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_word_daily_stats_day', 'word_daily_stats', ['day'])
+    op.create_index('ix_word_daily_stats_id', 'word_daily_stats', ['id'])
+    op.create_index('ix_word_daily_stats_word_day', 'word_daily_stats', ['word_id', 'day'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table('word_daily_stats')
+    op.drop_table('word_stats')
@@ -0,0 +1,52 @@
+"""Per-student summary with the daily activity ring
+
+Adds student_stats: lesson, word and coin counters, streaks and a 366-byte
+ring of daily activity counts. Maintained incrementally from here on; fill
+it from existing progress and history with
+`python -m app.jobs.rebuild_progress_stats` before the release starts.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 23:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'student_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('lessons_completed', sa.Integer(), nullable=False),
+        sa.Column('lesson_attempts', sa.Integer(), nullable=False),
+        sa.Column('score_sum', sa.Integer(), nullable=False),
+        sa.Column('words_attempted', sa.Integer(), nullable=False),
+        sa.Column('words_correct', sa.Integer(), nullable=False),
+        sa.Column('coins_earned', sa.Integer(), nullable=False),
+        sa.Column('coins_this_week', sa.Integer(), nullable=False),
+        sa.Column('week_start', sa.Date(), nullable=True),
+        sa.Column('current_streak', sa.Integer(), nullable=False),
+        sa.Column('longest_streak', sa.Integer(), nullable=False),
+        sa.Column('last_active_date', sa.Date(), nullable=True),
+        sa.Column('activity', sa.LargeBinary(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_student_stats_id', 'student_stats', ['id'])
+    op.create_index('ix_student_stats_student', 'student_stats', ['student_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table('student_stats')
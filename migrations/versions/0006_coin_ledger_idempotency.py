@@ -0,0 +1,53 @@
+"""Idempotent coin ledger
+
+- coin_idempotency_keys holds client-supplied keys, unique per student, so
+  a retried award is recognised. It sits outside coin_transactions because
+  a unique index on the (later partitioned) ledger would have to include
+  its partition column.
+- coin_transactions.lesson_id becomes nullable for manual bonuses and
+  penalties.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 23:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'coin_idempotency_keys',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(length=64), nullable=False),
+        sa.Column('transaction_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_coin_idempotency_created', 'coin_idempotency_keys', ['created_at'])
+    op.create_index('ix_coin_idempotency_keys_id', 'coin_idempotency_keys', ['id'])
+    op.create_index('ix_coin_idempotency_student_key', 'coin_idempotency_keys', ['student_id', 'idempotency_key'], unique=True)
+    
+    with op.batch_alter_table('coin_transactions') as batch_op:
+        batch_op.alter_column('lesson_id', existing_type=sa.Integer(), nullable=True)
+
+
+def downgrade() -> None:
+    # Bonuses and penalties have no lesson and cannot be kept
+    op.execute("DELETE FROM coin_transactions WHERE lesson_id IS NULL")
+    with op.batch_alter_table('coin_transactions') as batch_op:
+        batch_op.alter_column('lesson_id', existing_type=sa.Integer(), nullable=False)
+    
+    op.drop_table('coin_idempotency_keys')
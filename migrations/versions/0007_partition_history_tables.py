@@ -0,0 +1,247 @@
+"""Partition the history tables by month
+
+word_history (attempted_at), coin_transactions (created_at) and
+otp_requests (created_at) become RANGE-partitioned tables on Postgres, so
+old months can be detached and archived instead of deleted row by row.
+Also adds archived_coin_totals, which keeps each student's sum of the
+archived coin transactions.
+
+Postgres cannot partition an existing table in place. Each table is
+rebuilt under a write lock in this transaction:
+
+1. create ``<table>_rebuilt`` partitioned by month, with its partition
+   column in the primary key and ids still drawn from ``<table>_id_seq``
+2. create a partition per month from the oldest row to three months ahead,
+   plus the DEFAULT partition
+3. copy the rows, drop the old table and rename the new one into place
+4. build the indexes (once per partition)
+
+Reads continue during the copy, writes wait for it; run it in a
+maintenance window on large databases. Rows without a timestamp get the
+table's oldest timestamp, since the partition column cannot be NULL.
+
+On SQLite the tables stay plain; only the indexes and NOT NULL timestamps
+change.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 23:10:00.000000
+
+"""
+from typing import List, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitions created ahead of the current month (as ensure_partitions does)
+MONTHS_AHEAD = 3
+
+# table -> partition column
+HISTORY_TABLES = {
+    'word_history': 'attempted_at',
+    'coin_transactions': 'created_at',
+    'otp_requests': 'created_at',
+}
+
+# Indexes before and after partitioning: (name, columns)
+BASELINE_INDEXES = {
+    'word_history': [
+        ('ix_word_history_id', ['id']),
+        ('ix_word_history_student', ['student_id']),
+        ('ix_word_history_student_word', ['student_id', 'word_id']),
+        ('ix_word_history_word', ['word_id']),
+    ],
+    'coin_transactions': [
+        ('ix_coin_transaction_created', ['created_at']),
+        ('ix_coin_transaction_lesson', ['lesson_id']),
+        ('ix_coin_transaction_student', ['student_id']),
+        ('ix_coin_transactions_id', ['id']),
+    ],
+    'otp_requests': [
+        ('ix_otp_requests_created_at', ['created_at']),
+        ('ix_otp_requests_id', ['id']),
+        ('ix_otp_requests_ip_address', ['ip_address']),
+        ('ix_otp_requests_phone', ['phone']),
+        ('ix_otp_requests_user_id', ['user_id']),
+    ],
+}
+PARTITIONED_INDEXES = {
+    'word_history': [
+        ('ix_word_history_student_word', ['student_id', 'word_id']),
+        ('ix_word_history_word', ['word_id']),
+    ],
+    'coin_transactions': [
+        ('ix_coin_transaction_created', ['created_at']),
+        ('ix_coin_transaction_lesson', ['lesson_id']),
+        ('ix_coin_transaction_student', ['student_id']),
+    ],
+    'otp_requests': [
+        ('ix_otp_requests_ip_created', ['ip_address', 'created_at']),
+        ('ix_otp_requests_phone', ['phone']),
+        ('ix_otp_requests_user_created', ['user_id', 'created_at']),
+    ],
+}
+
+
+def _is_postgres() -> bool:
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def _columns(table: str, partitioned: bool) -> List[sa.Column]:
+    """Columns of ``table``; before partitioning the baseline timestamps were nullable"""
+    id_column = sa.Column(
+        'id', sa.Integer(), nullable=False,
+        server_default=sa.text(f"nextval('{table}_id_seq'::regclass)")
+    )
+    if table == 'word_history':
+        return [
+            id_column,
+            sa.Column('student_id', sa.Integer(), sa.ForeignKey('users.id', name='word_history_student_id_fkey'), nullable=False),
+            sa.Column('word_id', sa.Integer(), sa.ForeignKey('words.id', name='word_history_word_id_fkey'), nullable=False),
+            sa.Column('is_correct', sa.Boolean(), nullable=False),
+            sa.Column('attempted_at', sa.DateTime(), nullable=not partitioned),
+        ]
+    if table == 'coin_transactions':
+        return [
+            id_column,
+            sa.Column('student_id', sa.Integer(), sa.ForeignKey('users.id', name='coin_transactions_student_id_fkey'), nullable=False),
+            sa.Column('lesson_id', sa.Integer(), sa.ForeignKey('lessons.id', name='coin_transactions_lesson_id_fkey'), nullable=True),
+            sa.Column('amount', sa.Integer(), nullable=False),
+            sa.Column(
+                'transaction_type',
+                postgresql.ENUM('LESSON_SCORE', 'BONUS', 'PENALTY', name='transactiontype', create_type=False),
+                nullable=False
+            ),
+            sa.Column('description', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=not partitioned),
+        ]
+    return [
+        id_column,
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', name='otp_requests_user_id_fkey'), nullable=False),
+        sa.Column('phone', sa.String(length=20), nullable=False),
+        sa.Column(
+            'learning_center_id', sa.Integer(),
+            sa.ForeignKey('learning_centers.id', name='otp_requests_learning_center_id_fkey'),
+            nullable=False
+        ),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    ]
+
+
+def _fill_missing_timestamps(table: str, column: str) -> None:
+    op.execute(
+        f"UPDATE {table} SET {column} = "
+        f"COALESCE((SELECT MIN({column}) FROM {table}), CURRENT_TIMESTAMP) "
+        f"WHERE {column} IS NULL"
+    )
+
+
+def _create_monthly_partitions(table: str, parent: str, column: str) -> None:
+    """Monthly partitions of ``parent`` from the oldest row of ``table`` to MONTHS_AHEAD"""
+    # Plain concatenation: a literal % would be escaped in the offline SQL
+    op.execute(f"""
+DO $$
+DECLARE
+    bound date := date_trunc('month', COALESCE((SELECT MIN({column}) FROM {table}), now()))::date;
+BEGIN
+    WHILE bound <= date_trunc('month', now()) + interval '{MONTHS_AHEAD} months' LOOP
+        EXECUTE 'CREATE TABLE ' || quote_ident('{table}_p' || to_char(bound, 'YYYYMM'))
+            || ' PARTITION OF {parent} FOR VALUES FROM (' || quote_literal(bound)
+            || ') TO (' || quote_literal((bound + interval '1 month')::date) || ')';
+        bound := (bound + interval '1 month')::date;
+    END LOOP;
+END $$
+""")
+
+
+def _rebuild(table: str, partitioned: bool, indexes: List[Tuple[str, List[str]]]) -> None:
+    """Replace ``table`` on Postgres by a copy that is (or is no longer) partitioned"""
+    column = HISTORY_TABLES[table]
+    rebuilt = f"{table}_rebuilt"
+    columns = _columns(table, partitioned)
+    column_list = ", ".join(c.name for c in columns)
+    
+    op.execute(f"LOCK TABLE {table} IN EXCLUSIVE MODE")
+    
+    if partitioned:
+        _fill_missing_timestamps(table, column)
+        op.create_table(
+            rebuilt,
+            *columns,
+            sa.PrimaryKeyConstraint('id', column, name=f'{rebuilt}_pkey'),
+            postgresql_partition_by=f'RANGE ({column})'
+        )
+        _create_monthly_partitions(table, rebuilt, column)
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {rebuilt} DEFAULT")
+    else:
+        op.create_table(rebuilt, *columns, sa.PrimaryKeyConstraint('id', name=f'{rebuilt}_pkey'))
+    
+    op.execute(f"INSERT INTO {rebuilt} ({column_list}) SELECT {column_list} FROM {table}")
+    
+    # The sequence is owned by the old id column and would be dropped with it
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {rebuilt}.id")
+    op.drop_table(table)
+    op.rename_table(rebuilt, table)
+    op.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {rebuilt}_pkey TO {table}_pkey")
+    
+    # On a partitioned table each partition gets its own index
+    for name, index_columns in indexes:
+        op.create_index(name, table, index_columns)
+
+
+def _replace_indexes(table: str, old: List[Tuple[str, List[str]]], new: List[Tuple[str, List[str]]]) -> None:
+    with op.batch_alter_table(table) as batch_op:
+        for name, _ in old:
+            if name not in dict(new):
+                batch_op.drop_index(name)
+        for name, columns in new:
+            if name not in dict(old):
+                batch_op.create_index(name, columns)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'archived_coin_totals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Integer(), nullable=False),
+        sa.Column('archived_through', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_coin_totals_id', 'archived_coin_totals', ['id'])
+    op.create_index('ix_archived_coin_totals_student', 'archived_coin_totals', ['student_id'], unique=True)
+    
+    for table, column in HISTORY_TABLES.items():
+        if _is_postgres():
+            _rebuild(table, True, PARTITIONED_INDEXES[table])
+            continue
+        
+        _fill_missing_timestamps(table, column)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=sa.DateTime(), nullable=False)
+        _replace_indexes(table, BASELINE_INDEXES[table], PARTITIONED_INDEXES[table])
+
+
+def downgrade() -> None:
+    for table, column in HISTORY_TABLES.items():
+        if _is_postgres():
+            _rebuild(table, False, BASELINE_INDEXES[table])
+            continue
+        
+        _replace_indexes(table, PARTITIONED_INDEXES[table], BASELINE_INDEXES[table])
+        if table != 'otp_requests':
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.alter_column(column, existing_type=sa.DateTime(), nullable=True)
+    
+    # Archived coins are gone from the ledger; their totals go with this table
+    op.drop_table('archived_coin_totals')
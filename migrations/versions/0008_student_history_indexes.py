@@ -0,0 +1,94 @@
+"""Student history indexes
+
+- lesson_progress (student_id, updated_at) serves the paginated progress
+  view; it replaces ix_lesson_progress_student, whose column is a prefix.
+- coin_transactions (student_id, created_at) serves per-student ledger
+  ranges; it replaces ix_coin_transaction_student.
+
+On Postgres the indexes are built with CREATE INDEX CONCURRENTLY so writes
+continue during the build. A partitioned table cannot be indexed
+concurrently as a whole, so its index is created ON ONLY the parent and
+each partition's index is built concurrently and attached.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 21:05:12.000000
+
+"""
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _is_postgres() -> bool:
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def _partitions(table: str) -> List[str]:
+    return list(op.get_bind().execute(sa.text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table ORDER BY child.relname"
+    ), {"table": table}).scalars())
+
+
+def _create_index(name: str, table: str, columns: List[str], partitioned: bool = False) -> None:
+    if not _is_postgres():
+        op.create_index(name, table, columns)
+        return
+    
+    column_list = ", ".join(columns)
+    with op.get_context().autocommit_block():
+        if not partitioned:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({column_list})")
+            return
+        
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} ({column_list})")
+        for partition in _partitions(table):
+            partition_index = f"{partition}_{name[3:]}"[:63]
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} "
+                f"ON {partition} ({column_list})"
+            )
+            op.execute(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}")
+
+
+def _drop_index(name: str, table: str, partitioned: bool = False) -> None:
+    if not _is_postgres():
+        op.drop_index(name, table_name=table)
+        return
+    
+    with op.get_context().autocommit_block():
+        # Partitioned indexes cannot be dropped concurrently
+        concurrently = "" if partitioned else "CONCURRENTLY "
+        op.execute(f"DROP INDEX {concurrently}IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    _create_index('ix_lesson_progress_student_updated', 'lesson_progress', ['student_id', 'updated_at'])
+    _drop_index('ix_lesson_progress_student', 'lesson_progress')
+    
+    _create_index(
+        'ix_coin_transaction_student_created',
+        'coin_transactions',
+        ['student_id', 'created_at'],
+        partitioned=True
+    )
+    _drop_index('ix_coin_transaction_student', 'coin_transactions', partitioned=True)
+
+
+def downgrade() -> None:
+    _create_index('ix_coin_transaction_student', 'coin_transactions', ['student_id'], partitioned=True)
+    _drop_index('ix_coin_transaction_student_created', 'coin_transactions', partitioned=True)
+    
+    _create_index('ix_lesson_progress_student', 'lesson_progress', ['student_id'])
+    _drop_index('ix_lesson_progress_student_updated', 'lesson_progress')
@@ -0,0 +1,111 @@
+"""Partial indexes on live (not soft-deleted / active) rows
+
+Content, group and user queries all filter deleted_at IS NULL (users also
+is_active), so plain indexes carried every soft-deleted row. Each plain
+index is replaced by a partial one whose predicate matches the queries:
+
+- words (lesson_id, order) and lessons (course_id, order) where not
+  deleted, including id so per-parent counts are index-only on Postgres;
+  they replace ix_word_lesson, ix_word_lesson_order and ix_lesson_course
+- courses (learning_center_id, is_active) where not deleted
+- groups (learning_center_id) and (teacher_id) where not deleted
+- users (learning_center_id, role) where active and where not deleted;
+  they replace ix_user_learning_center
+
+On Postgres the indexes are built with CREATE INDEX CONCURRENTLY, and the
+new ones are in place before the old ones are dropped.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 21:40:00.000000
+
+"""
+from typing import List, Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NOT_DELETED = "deleted_at IS NULL"
+
+# name, table, columns, Postgres predicate, SQLite predicate, included columns
+PARTIAL_INDEXES = [
+    ('ix_word_lesson_order_live', 'words', ['lesson_id', 'order'], NOT_DELETED, NOT_DELETED, ['id']),
+    ('ix_lesson_course_order_live', 'lessons', ['course_id', 'order'], NOT_DELETED, NOT_DELETED, ['id']),
+    ('ix_course_center_live', 'courses', ['learning_center_id', 'is_active'], NOT_DELETED, NOT_DELETED, None),
+    ('ix_group_center_live', 'groups', ['learning_center_id'], NOT_DELETED, NOT_DELETED, None),
+    ('ix_group_teacher_live', 'groups', ['teacher_id'], NOT_DELETED, NOT_DELETED, None),
+    ('ix_user_center_role_active', 'users', ['learning_center_id', 'role'], "is_active", "is_active = 1", None),
+    ('ix_user_center_role_live', 'users', ['learning_center_id', 'role'], NOT_DELETED, NOT_DELETED, None),
+]
+
+# name, table, columns
+REPLACED_INDEXES = [
+    ('ix_word_lesson', 'words', ['lesson_id']),
+    ('ix_word_lesson_order', 'words', ['lesson_id', 'order']),
+    ('ix_lesson_course', 'lessons', ['course_id']),
+    ('ix_course_learning_center', 'courses', ['learning_center_id']),
+    ('ix_group_learning_center', 'groups', ['learning_center_id']),
+    ('ix_group_teacher', 'groups', ['teacher_id']),
+    ('ix_user_learning_center', 'users', ['learning_center_id']),
+]
+
+
+def _is_postgres() -> bool:
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def _create_index(
+    name: str,
+    table: str,
+    columns: List[str],
+    postgres_where: Optional[str] = None,
+    sqlite_where: Optional[str] = None,
+    include: Optional[List[str]] = None
+) -> None:
+    if not _is_postgres():
+        op.create_index(
+            name, table, columns,
+            sqlite_where=sa.text(sqlite_where) if sqlite_where else None
+        )
+        return
+    
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    include_clause = f" INCLUDE ({', '.join(include)})" if include else ""
+    where_clause = f" WHERE {postgres_where}" if postgres_where else ""
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+            f"ON {table} ({column_list}){include_clause}{where_clause}"
+        )
+
+
+def _drop_index(name: str, table: str) -> None:
+    if not _is_postgres():
+        op.drop_index(name, table_name=table)
+        return
+    
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    for name, table, columns, postgres_where, sqlite_where, include in PARTIAL_INDEXES:
+        _create_index(name, table, columns, postgres_where, sqlite_where, include)
+    
+    for name, table, _ in REPLACED_INDEXES:
+        _drop_index(name, table)
+
+
+def downgrade() -> None:
+    for name, table, columns in REPLACED_INDEXES:
+        _create_index(name, table, columns)
+    
+    for name, table, *_ in PARTIAL_INDEXES:
+        _drop_index(name, table)
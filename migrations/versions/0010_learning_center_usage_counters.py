@@ -0,0 +1,78 @@
+"""Learning center usage counters
+
+Adds student_count, teacher_count and group_count to learning_centers and
+backfills them from users (active students/teachers) and groups (not
+deleted). From here on usage_service keeps them in step and enforces the
+limits against them.
+
+The backfill is a single UPDATE; run it while writes to the centers are
+quiet, or follow it with POST /super-admin/usage/recount.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 22:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = ('student_count', 'teacher_count', 'group_count')
+
+learning_centers = sa.table(
+    'learning_centers',
+    sa.column('id', sa.Integer),
+    *(sa.column(name, sa.Integer) for name in COUNTERS)
+)
+users = sa.table(
+    'users',
+    sa.column('id', sa.Integer),
+    sa.column('learning_center_id', sa.Integer),
+    sa.column('role', sa.String),
+    sa.column('is_active', sa.Boolean)
+)
+groups = sa.table(
+    'groups',
+    sa.column('id', sa.Integer),
+    sa.column('learning_center_id', sa.Integer),
+    sa.column('deleted_at', sa.DateTime)
+)
+
+
+def _count_users(role: str):
+    return sa.select(sa.func.count(users.c.id)).where(
+        users.c.learning_center_id == learning_centers.c.id,
+        users.c.role == role,
+        users.c.is_active == sa.true()
+    ).scalar_subquery()
+
+
+def upgrade() -> None:
+    for name in COUNTERS:
+        op.add_column(
+            'learning_centers',
+            sa.Column(name, sa.Integer(), server_default='0', nullable=False)
+        )
+    
+    op.execute(learning_centers.update().values(
+        student_count=_count_users('STUDENT'),
+        teacher_count=_count_users('TEACHER'),
+        group_count=sa.select(sa.func.count(groups.c.id)).where(
+            groups.c.learning_center_id == learning_centers.c.id,
+            groups.c.deleted_at.is_(None)
+        ).scalar_subquery()
+    ))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('learning_centers') as batch_op:
+        for name in reversed(COUNTERS):
+            batch_op.drop_column(name)
@@ -14,6 +14,7 @@ if __name__ == "__main__":
     print("📚 API Documentation: http://localhost:8001/docs")
     print("🔧 Redis UI: http://localhost:8001/redisinsight (if available)")
     print("🏥 Health Check: http://localhost:8001/health")
+    print("🗄️  Schema: run `alembic upgrade head` after pulling new migrations")
     print("📱 Learning Centers: http://localhost:8001/api/v1/auth/learning-centers")
     print("=" * 60)
     
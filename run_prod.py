@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Production runner for the Learning Center API
+
+Starts uvicorn with several worker processes on uvloop/httptools. Every
+setting can be overridden with an environment variable or a flag:
+
+    WEB_CONCURRENCY       workers (default: CPU count, lowered so that each
+                          worker gets MIN_CONNECTIONS_PER_WORKER connections)
+    DB_CONNECTION_BUDGET  Postgres connections all workers may hold together
+                          (default 80: keep it below max_connections minus
+                          what migrations, jobs and admin sessions need)
+    KEEP_ALIVE            idle keep-alive timeout in seconds (default 65, above
+                          the 60 s idle timeout of most load balancers)
+    GRACEFUL_TIMEOUT      seconds in-flight requests get on shutdown (default 30)
+
+Uvicorn speaks HTTP/1.1; terminate HTTP/2 and TLS at the reverse proxy in
+front of it. `kill -HUP <pid>` restarts the workers one at a time (new code,
+same socket), SIGTERM drains and stops them.
+"""
+import argparse
+import importlib.util
+import os
+import shutil
+import sys
+
+import uvicorn
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Connections per worker below this leave requests queueing for the pool
+MIN_CONNECTIONS_PER_WORKER = 4
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=_env_int("PORT", 8001))
+    # None: derived from the CPU count and the connection budget
+    parser.add_argument("--workers", type=int, default=_env_int("WEB_CONCURRENCY", 0) or None)
+    parser.add_argument("--db-connections", type=int, default=_env_int("DB_CONNECTION_BUDGET", 80))
+    parser.add_argument("--keep-alive", type=int, default=_env_int("KEEP_ALIVE", 65))
+    parser.add_argument("--graceful-timeout", type=int, default=_env_int("GRACEFUL_TIMEOUT", 30))
+    parser.add_argument("--backlog", type=int, default=_env_int("BACKLOG", 2048))
+    parser.add_argument("--loop", default=os.environ.get("UVICORN_LOOP", "uvloop"),
+                        choices=["uvloop", "asyncio", "auto"])
+    parser.add_argument("--http", default=os.environ.get("UVICORN_HTTP", "httptools"),
+                        choices=["httptools", "h11", "auto"])
+    parser.add_argument("--forwarded-allow-ips", default=os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1"))
+    return parser.parse_args(argv)
+
+
+def default_workers(budget: int) -> int:
+    """One worker per CPU, but no more than the budget gives MIN_CONNECTIONS_PER_WORKER each"""
+    return max(min(os.cpu_count() or 1, budget // MIN_CONNECTIONS_PER_WORKER), 1)
+
+
+def pool_sizes(workers: int, budget: int):
+    """Per-worker pool_size and max_overflow so that all workers stay within ``budget``"""
+    per_worker = budget // workers
+    if per_worker < MIN_CONNECTIONS_PER_WORKER:
+        advice = "raise the budget" if workers == 1 else "lower WEB_CONCURRENCY or raise the budget"
+        raise SystemExit(
+            f"DB_CONNECTION_BUDGET={budget} leaves {per_worker} connections for each of "
+            f"{workers} workers; {advice}"
+        )
+    # Keep about half open, allow bursts up to the worker's share
+    pool_size = (per_worker + 1) // 2
+    return pool_size, per_worker - pool_size
+
+
+def available(module: str, fallback: str, choice: str) -> str:
+    """``choice`` if its package is installed, otherwise uvicorn's ``fallback``"""
+    if choice == module and importlib.util.find_spec(module) is None:
+        print(f"{module} is not installed, using {fallback}")
+        return fallback
+    return choice
+
+
+def prepare_metrics_dir(workers: int) -> None:
+    """Fresh PROMETHEUS_MULTIPROC_DIR for multi-worker metrics (see docs/monitoring.md)"""
+    if workers == 1:
+        return
+    path = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+    # Samples of the previous run's workers would otherwise be summed in
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Only an explicit worker count can be too high for the budget
+    workers = max(args.workers, 1) if args.workers is not None else default_workers(args.db_connections)
+    
+    # Workers are spawned after this and read their pool settings from the environment
+    pool_size, max_overflow = pool_sizes(workers, args.db_connections)
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    prepare_metrics_dir(workers)
+    
+    loop = available("uvloop", "asyncio", args.loop)
+    http = available("httptools", "h11", args.http)
+    
+    print(f"Starting Learning Center API on {args.host}:{args.port}")
+    print(f"  workers: {workers} ({loop}, {http})")
+    print(f"  database pool per worker: {pool_size} + {max_overflow} overflow "
+          f"({workers * (pool_size + max_overflow)} of {args.db_connections} connections at most)")
+    print(f"  keep-alive: {args.keep_alive}s, graceful shutdown: {args.graceful_timeout}s")
+    print("  schema: run `alembic upgrade head` before starting a new release")
+    
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        proxy_headers=True,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+        log_level="info"
+    )
+
+
+if __name__ == "__main__":
+    main()